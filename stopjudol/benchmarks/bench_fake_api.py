@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Fake API Throughput Benchmark
+-----------------------------------------
+This script starts the fake YouTube Data API in-process and measures the
+throughput of comment scans and batched deletions through the real YouTubeAPI
+wrapper, with no network access and no quota.
+
+Exits with a non-zero status when a scan or a deletion does not complete, so it
+can run in CI.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+# Add the stopjudol directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from google.oauth2.credentials import Credentials
+
+from server.fake_youtube import FakeYouTubeAPI, create_app
+from server.core.youtube_api import YouTubeAPI
+from server.core.retry import RetryPolicy, CircuitBreaker
+from server.core.scan_scheduler import RateLimiter, ScanScheduler
+from server.core.capability_cache import ModerationCapabilityCache
+
+class NullAnalyzer:
+    """Analyzer that flags nothing, so the benchmark measures fetching only"""
+
+    def analyze_comments_batch(self, comments):
+        return []
+
+def start_fake_api(fake_api):
+    """
+    Serve the fake API on an ephemeral port in a background thread
+
+    Args:
+        fake_api (FakeYouTubeAPI): Fake API to serve
+
+    Returns:
+        str: Base URL of the fake API
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(fake_api))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark YouTubeAPI against the fake YouTube Data API")
+    parser.add_argument("--videos", type=int, default=20, help="Videos to scan")
+    parser.add_argument("--comments-per-video", type=int, default=300, help="Comment threads per video")
+    parser.add_argument("--concurrency", type=int, default=4, help="Videos scanned at the same time")
+    parser.add_argument("--rate-limit", type=float, default=50, help="API requests per second")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latency of the fake API")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with a 500 or 429")
+    parser.add_argument("--deletions", type=int, default=500, help="Comments to delete in each deletion run")
+    args = parser.parse_args()
+
+    fake_api = FakeYouTubeAPI(
+        config={
+            'latency_ms': args.latency_ms,
+            'error_rate': args.error_rate,
+            'error_codes': [429, 500],
+            'quota_limit': 10 ** 9,
+            'delete_own_only': True,
+        },
+        videos=args.videos,
+        comments_per_video=args.comments_per_video
+    )
+    base_url = start_fake_api(fake_api)
+
+    retry_policy = RetryPolicy(base_delay=0.05, breaker=CircuitBreaker())
+    rate_limiter = RateLimiter(args.rate_limit)
+    capability_cache = ModerationCapabilityCache()
+
+    def create_api():
+        return YouTubeAPI(Credentials(token='fake'), retry_policy=retry_policy,
+                          rate_limiter=rate_limiter, api_base_url=base_url,
+                          capability_cache=capability_cache)
+
+    print("=" * 60)
+    print(" StopJudol fake API benchmark ".center(60, "="))
+    print("=" * 60)
+
+    failed = False
+    video_ids = list(fake_api.videos)
+    for concurrency in sorted({1, args.concurrency}):
+        scheduler = ScanScheduler(create_api, NullAnalyzer(), concurrency=concurrency)
+        start = time.perf_counter()
+        result = scheduler.run(video_ids)
+        elapsed = time.perf_counter() - start
+        failed = failed or result['failed'] > 0
+        print(f"Scan, concurrency {concurrency:>2}: {result['scanned']} comments from {len(video_ids)} videos "
+              f"in {elapsed:.2f}s ({result['scanned'] / elapsed:.0f} comments/s, {result['failed']} failed)")
+
+    # Comments are not written by the fake channel, so the delete endpoint fails
+    # and they are moderated instead; the second run skips the failing path
+    comment_ids = list(fake_api.comments)[:args.deletions * 2]
+    for run, run_ids in (('cold', comment_ids[:args.deletions]), ('cached', comment_ids[args.deletions:])):
+        requests_before = fake_api.stats['http_requests']
+        quota_before = fake_api.stats['quota_used']
+        start = time.perf_counter()
+        results = create_api().delete_comments([
+            {'comment_id': comment_id, 'thread_id': comment_id, 'channel_id': fake_api.channel['id']}
+            for comment_id in run_ids
+        ])
+        elapsed = time.perf_counter() - start
+        removed = sum(1 for result in results if result['success'])
+        failed = failed or removed < len(run_ids)
+        print(f"Batch delete, {run:<6}: {removed}/{len(run_ids)} comments in {elapsed:.2f}s "
+              f"({removed / elapsed:.0f} comments/s, {fake_api.stats['http_requests'] - requests_before} HTTP requests, "
+              f"{fake_api.stats['quota_used'] - quota_before} quota units)")
+
+    print(f"Fake API: {fake_api.stats['http_requests']} HTTP requests, {fake_api.stats['batches']} batches, "
+          f"{fake_api.stats['errors_injected']} injected errors, {fake_api.stats['quota_used']} quota units")
+    print(f"Retry policy: {retry_policy.get_stats()}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
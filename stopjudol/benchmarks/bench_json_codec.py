@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - JSON Codec Benchmark
+--------------------------------
+This script measures an analyze_comments round trip of 10k comments with every
+JSON codec installed: each encode and decode step on its own, the server
+dispatch, and the full HTTP round trip through the real server application.
+
+The server runs in-process on an ephemeral port and shares the codec setting
+with the client side of the benchmark.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import threading
+
+import requests
+
+# Add the stopjudol directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from shared.utils import json_codec
+from bench_projection import make_comment_thread
+
+# Every tenth comment is gambling spam, so the response carries flagged comments too
+SPAM_TEXT = "Main di situs slot gacor, bonus new member 100% maxwin hari ini"
+CLEAN_TEXT = "Videonya bagus sekali! Ditunggu konten berikutnya ya kak"
+
+def make_comments(count):
+    """
+    Build synthetic comment threads, a tenth of them spam
+    
+    Args:
+        count (int): Number of comment threads
+    
+    Returns:
+        list: Comment thread resources
+    """
+    comments = [make_comment_thread(i) for i in range(count)]
+    for index, comment in enumerate(comments):
+        # The comment number in the synthetic text reads as a phone number to the analyzer
+        snippet = comment['snippet']['topLevelComment']['snippet']
+        snippet['textDisplay'] = snippet['textOriginal'] = SPAM_TEXT if index % 10 == 0 else CLEAN_TEXT
+    return comments
+
+def start_server(app):
+    """
+    Serve an application on an ephemeral port in a background thread
+    
+    Args:
+        app (web.Application): Application to serve
+    
+    Returns:
+        tuple: (base URL, event loop the server runs on)
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}", loop
+
+def best_of(repeat, func):
+    """
+    Time a function
+    
+    Args:
+        repeat (int): Runs to make
+        func (callable): Function to time
+    
+    Returns:
+        tuple: (fastest run in seconds, result of the last run)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def measure(codec_name, comments, server_url, server_loop, token, repeat):
+    """
+    Measure every step of the round trip with one codec
+    
+    Args:
+        codec_name (str): Codec to use
+        comments (list): Comments sent to analyze_comments
+        server_url (str): Base URL of the server
+        server_loop: Event loop the server runs on
+        token (str): Authentication token
+        repeat (int): Runs of each step, the fastest is kept
+    
+    Returns:
+        dict: Seconds per step, and the request and response sizes
+    """
+    import server.main
+    
+    json_codec.use_codec(codec_name)
+    request_data = {"jsonrpc": "2.0", "method": "analyze_comments", "params": {"comments": comments}, "id": 1}
+    
+    timings = {}
+    timings['client encode'], body = best_of(repeat, lambda: json_codec.dumps_bytes(request_data))
+    timings['server decode'], payload = best_of(repeat, lambda: json_codec.loads(body))
+    
+    def dispatch():
+        coroutine = server.main.dispatch_rpc(body.decode('utf-8'), payload)
+        return asyncio.run_coroutine_threadsafe(coroutine, server_loop).result()
+    
+    timings['server dispatch'], response_text = best_of(repeat, dispatch)
+    response_data = json_codec.loads(response_text)
+    if 'result' not in response_data:
+        raise Exception(f"analyze_comments failed: {response_data.get('error')}")
+    
+    timings['response encode'], _ = best_of(repeat, lambda: json_codec.dumps(response_data))
+    response_body = response_text.encode('utf-8')
+    timings['client decode'], _ = best_of(repeat, lambda: json_codec.loads(response_body))
+    
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    
+    def round_trip():
+        response = requests.post(f"{server_url}/rpc", data=json_codec.dumps_bytes(request_data), headers=headers)
+        response.raise_for_status()
+        return json_codec.loads(response.content)
+    
+    timings['HTTP round trip'], _ = best_of(repeat, round_trip)
+    
+    return {
+        'timings': timings,
+        'request_bytes': len(body),
+        'response_bytes': len(response_body),
+        'flagged': len(response_data['result'])
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codecs on an analyze_comments round trip")
+    parser.add_argument("--comments", type=int, default=10000, help="Comments sent to analyze_comments")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each step, the fastest is kept")
+    args = parser.parse_args()
+    
+    # The server logs every request and response at INFO; keep that out of the timings
+    logging.disable(logging.INFO)
+    
+    import server.main
+    from server.rpc.auth import create_token
+    
+    server_url, server_loop = start_server(server.main.app)
+    token = create_token({"username": "benchmark"})
+    comments = make_comments(args.comments)
+    
+    results = {}
+    for codec_name in json_codec.CODECS:
+        results[codec_name] = measure(codec_name, comments, server_url, server_loop, token, args.repeat)
+    
+    first = next(iter(results.values()))
+    print("=" * 60)
+    print(" StopJudol JSON codec benchmark ".center(60, "="))
+    print("=" * 60)
+    print(f"Comments: {args.comments}, flagged: {first['flagged']}")
+    print(f"Request: {first['request_bytes'] / 1e6:.1f} MB, response: {first['response_bytes'] / 1e6:.1f} MB")
+    if 'orjson' not in results:
+        print("orjson is not installed, only the json codec was measured")
+    
+    print(f"{'Step (ms)':20}" + "".join(f"{name:>12}" for name in results))
+    for step in first['timings']:
+        print(f"{step:20}" + "".join(f"{result['timings'][step] * 1000:>12.1f}" for result in results.values()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Partial Response Benchmark
+--------------------------------------
+This script measures how much the `fields` mask sent with commentThreads.list
+reduces the response size, JSON decode time and memory per comment.
+
+It uses a recorded response when one is given, otherwise a synthetic page with
+the same shape as a full commentThreads.list(part='snippet') response.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+# Add the stopjudol directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.core.projection import COMMENT_THREAD_FIELDS, apply_fields_mask
+
+def make_comment_thread(index):
+    """
+    Build a synthetic comment thread with every field the API returns
+    
+    Args:
+        index (int): Comment number, used to make IDs unique
+    
+    Returns:
+        dict: Comment thread resource
+    """
+    comment_id = f"Ugz{index:020d}AaABAg"
+    author_channel = f"UC{index:022d}"
+    text = f"Komentar nomor {index}, videonya bagus sekali! Ditunggu konten berikutnya ya kak"
+    return {
+        "kind": "youtube#commentThread",
+        "etag": f"etag-thread-{index:016x}",
+        "id": comment_id,
+        "snippet": {
+            "channelId": "UC0000000000000000000000",
+            "videoId": "dQw4w9WgXcQ",
+            "topLevelComment": {
+                "kind": "youtube#comment",
+                "etag": f"etag-comment-{index:016x}",
+                "id": comment_id,
+                "snippet": {
+                    "channelId": "UC0000000000000000000000",
+                    "videoId": "dQw4w9WgXcQ",
+                    "textDisplay": text,
+                    "textOriginal": text,
+                    "authorDisplayName": f"@pengguna{index}",
+                    "authorProfileImageUrl": f"https://yt3.ggpht.com/ytc/{author_channel}=s48-c-k-c0x00ffffff-no-rj",
+                    "authorChannelUrl": f"http://www.youtube.com/@pengguna{index}",
+                    "authorChannelId": {"value": author_channel},
+                    "canRate": True,
+                    "viewerRating": "none",
+                    "likeCount": index % 17,
+                    "publishedAt": "2025-04-15T12:00:00Z",
+                    "updatedAt": "2025-04-15T12:00:00Z"
+                }
+            },
+            "canReply": True,
+            "totalReplyCount": index % 3,
+            "isPublic": True
+        }
+    }
+
+def make_page(count):
+    """
+    Build a synthetic commentThreads.list response
+    
+    Args:
+        count (int): Number of comment threads in the page
+    
+    Returns:
+        dict: commentThreads.list response
+    """
+    return {
+        "kind": "youtube#commentThreadListResponse",
+        "etag": "etag-page",
+        "nextPageToken": "QURTSl9pM2RfZ2dHNlRUT0FfMnNNVUZmbGt2SmZ4",
+        "pageInfo": {"totalResults": count, "resultsPerPage": count},
+        "items": [make_comment_thread(i) for i in range(count)]
+    }
+
+def measure(body, repeat):
+    """
+    Measure decode time and decoded memory of a response body
+    
+    Args:
+        body (str): JSON response body
+        repeat (int): Number of decode runs to average
+    
+    Returns:
+        tuple: (seconds per decode, bytes allocated by one decoded page)
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(body)
+    elapsed = (time.perf_counter() - start) / repeat
+    
+    tracemalloc.start()
+    decoded = json.loads(body)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decoded
+    
+    return elapsed, memory
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Measure the effect of the commentThreads fields mask")
+    parser.add_argument("--response", help="Recorded full commentThreads.list response (JSON file)")
+    parser.add_argument("--comments", type=int, default=100, help="Comments per synthetic page")
+    parser.add_argument("--repeat", type=int, default=200, help="Decode runs to average")
+    args = parser.parse_args()
+    
+    if args.response:
+        with open(args.response, 'r', encoding='utf-8') as f:
+            full_page = json.load(f)
+    else:
+        full_page = make_page(args.comments)
+    
+    count = max(len(full_page.get('items', [])), 1)
+    full_body = json.dumps(full_page)
+    projected_body = json.dumps(apply_fields_mask(full_page, COMMENT_THREAD_FIELDS))
+    
+    full_time, full_memory = measure(full_body, args.repeat)
+    projected_time, projected_memory = measure(projected_body, args.repeat)
+    
+    print("=" * 60)
+    print(" StopJudol fields mask benchmark ".center(60, "="))
+    print("=" * 60)
+    print(f"Comments per page: {count}")
+    print(f"{'':22}{'full':>12}{'projected':>12}{'reduction':>12}")
+    rows = [
+        ("Bytes per page", len(full_body.encode('utf-8')), len(projected_body.encode('utf-8'))),
+        ("Decode time (us)", full_time * 1e6, projected_time * 1e6),
+        ("Memory per comment (B)", full_memory / count, projected_memory / count),
+    ]
+    for label, full, projected in rows:
+        print(f"{label:22}{full:>12.0f}{projected:>12.0f}{1 - projected / full:>12.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -71,6 +71,7 @@ def build_executable(onefile=True, console=False, clean=False):
         '--hidden-import=pkg_resources.py2_warn',
         '--hidden-import=PyQt6',
         '--hidden-import=jsonrpcclient',
+        '--hidden-import=aiohttp',
         '--hidden-import=google_auth_oauthlib',
         '--hidden-import=google.oauth2',
         os.path.join(current_dir, 'run_client.py')
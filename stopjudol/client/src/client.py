@@ -12,6 +12,7 @@ import sys
 import logging
 import threading
 import json
+import uuid
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLabel, QLineEdit, QTableWidget, 
@@ -36,7 +37,8 @@ from .auth.oauth_handler import OAuthHandler
 # Import RPC client and error handler
 from .rpc_client import RPCClient
 from .error_handler import ErrorHandler
-from .worker import FetchCommentsWorker, DeleteCommentsWorker, run_in_thread
+from .worker import (FetchCommentsWorker, DeleteCommentsWorker, run_in_thread, wait_for_deletions, wait_for_job,
+                     DELETE_BATCH_SIZE)
 from PyQt6.QtCore import QSettings
 
 class MainWindow(QMainWindow):
@@ -81,6 +83,12 @@ class MainWindow(QMainWindow):
         self.comments_data = []
         self.flagged_comments = []
         
+        # Scan IDs of failed scans by video ID, reused so a retry resumes the scan
+        self.pending_scan_ids = {}
+        
+        # Set when the window closes, so background threads stop waiting
+        self.is_closing = False
+        
         # Set up UI
         self.init_ui()
         
@@ -299,6 +307,11 @@ class MainWindow(QMainWindow):
         }
         return json.dumps(token_data)
     
+    def closeEvent(self, event):
+        """Stop background waits when the window closes"""
+        self.is_closing = True
+        super().closeEvent(event)
+    
     def get_channel_name_thread(self):
         """Get channel name in a background thread"""
         try:
@@ -364,37 +377,39 @@ class MainWindow(QMainWindow):
             # Update status
             self.status_bar.showMessage(f"Fetching comments for video {video_id}...")
             
-            # Fetch comments via RPC
-            success, comments = self.rpc_client.fetch_comments(video_id, self.credentials_json)
+            # Scan the video in a server-side job, resuming a previously failed scan of this video
+            scan_id = self.pending_scan_ids.setdefault(video_id, uuid.uuid4().hex)
+            success, job = self.rpc_client.start_scan(video_id, self.credentials_json, scan_id)
             
             if not success:
-                self.fetch_error.emit(f"Error fetching comments: {comments}")
-                return
-                
-            if not comments:
-                self.fetch_error.emit("No comments found for this video")
+                self.fetch_error.emit(f"Error fetching comments: {job}")
                 return
             
-            # Update progress
-            self.progress_update.emit(50, 100)
+            # Poll the job, showing the pages fetched so far; closing the window cancels it
+            status, flagged_comments = wait_for_job(
+                self.rpc_client,
+                job['job_id'],
+                progress_callback=self.progress_update.emit,
+                is_running=lambda: not self.is_closing
+            )
             
-            # Update status
-            self.status_bar.showMessage(f"Analyzing {len(comments)} comments...")
+            if self.is_closing:
+                return
             
-            # Analyze comments via RPC
-            success, flagged_comments = self.rpc_client.analyze_comments(comments)
+            if status['status'] != 'completed':
+                self.fetch_error.emit(f"Error fetching comments: {status.get('error') or status['status']}")
+                return
             
-            if not success:
-                self.fetch_error.emit(f"Error analyzing comments: {flagged_comments}")
+            self.pending_scan_ids.pop(video_id, None)
+                
+            if not status['comments_fetched']:
+                self.fetch_error.emit("No comments found for this video")
                 return
                 
             if not flagged_comments:
                 self.fetch_error.emit("No suspicious comments found")
                 return
             
-            # Update progress
-            self.progress_update.emit(100, 100)
-            
             # Send the results back to the main thread
             self.fetch_completed.emit(flagged_comments)
             
@@ -565,44 +580,68 @@ class MainWindow(QMainWindow):
         error_messages = []
         
         try:
-            for i, comment in enumerate(selected_comments):
+            total = len(selected_comments)
+            queued_ids = []
+            
+            # Queue the comments on the server, which deletes them in batches in
+            # the background and keeps going if the app is closed
+            for start in range(0, total, DELETE_BATCH_SIZE):
+                batch_indices = selected_indices[start:start + DELETE_BATCH_SIZE]
+                batch_comments = selected_comments[start:start + DELETE_BATCH_SIZE]
+                
+                # Get comment ID and thread ID for every comment in the batch
+                items = [
+                    {
+                        'comment_id': comment['snippet']['topLevelComment']['id'],
+                        'thread_id': comment['id'],
+                        'channel_id': comment['snippet'].get('channelId')
+                    }
+                    for comment in batch_comments
+                ]
+                
                 try:
-                    # Get comment ID and thread ID
-                    comment_id = comment['snippet']['topLevelComment']['id']
-                    thread_id = comment['id']
-                    
-                    # Update progress
-                    self.progress_update.emit(i + 1, len(selected_comments))
-                    
-                    # Delete comment via RPC client
-                    success, result = self.rpc_client.delete_comment(
-                        comment_id=comment_id, 
-                        thread_id=thread_id,
+                    success, result = self.rpc_client.enqueue_deletions(
+                        comments=items,
                         credentials_json=self.credentials_json
                     )
-                    
-                    if not success:
-                        error_indices.append(selected_indices[i])
-                        error_messages.append(str(result))
-                        continue
-                    
-                    action_type = result.get('action_type', 'none')
-                    success = result.get('success', False)
-                    
-                    if success:
-                        if action_type == 'deleted':
-                            deleted_indices.append(selected_indices[i])
-                            deleted_ids.append(comment_id)
-                        elif action_type == 'marked_as_spam':
-                            marked_as_spam_indices.append(selected_indices[i])
-                            marked_as_spam_ids.append(comment_id)
-                    else:
-                        error_indices.append(selected_indices[i])
-                        error_messages.append(result.get('message', 'Unknown error'))
-                        
                 except Exception as e:
-                    error_indices.append(selected_indices[i])
-                    error_messages.append(str(e))
+                    success, result = False, str(e)
+                
+                if not success:
+                    error_indices.extend(batch_indices)
+                    error_messages.extend([str(result)] * len(batch_indices))
+                    continue
+                
+                queued_ids.extend(zip(batch_indices, (item['comment_id'] for item in items)))
+            
+            # Wait for the queue to process them, updating the progress bar
+            finished = wait_for_deletions(
+                self.rpc_client,
+                [comment_id for _, comment_id in queued_ids],
+                self.credentials_json,
+                progress_callback=self.progress_update.emit,
+                is_running=lambda: not self.is_closing
+            )
+            
+            for index, comment_id in queued_ids:
+                result = finished.get(comment_id)
+                if result is None:
+                    # Not processed in time; the server keeps working on it in the background
+                    error_indices.append(index)
+                    error_messages.append("Still queued on the server, it will be processed in the background")
+                    continue
+                action_type = result.get('action_type') or 'none'
+                
+                if result.get('success', False):
+                    if action_type == 'deleted':
+                        deleted_indices.append(index)
+                        deleted_ids.append(comment_id)
+                    elif action_type == 'marked_as_spam':
+                        marked_as_spam_indices.append(index)
+                        marked_as_spam_ids.append(comment_id)
+                else:
+                    error_indices.append(index)
+                    error_messages.append(result.get('message') or 'Unknown error')
             
             # Update UI with results
             self.delete_completed.emit(
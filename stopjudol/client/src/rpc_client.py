@@ -7,25 +7,39 @@ StopJudol - RPC Client
 This module provides a client for communicating with the StopJudol JSON-RPC server.
 """
 
-import json
 import logging
+import itertools
 import requests
 from PyQt6.QtCore import QSettings
 from jsonrpcclient import request, parse, Ok, Error
+from shared.utils import json_codec, compression
 
 class RPCClient:
     """Client for communicating with the StopJudol JSON-RPC server"""
     
-    def __init__(self, server_url=None):
-        """Initialize the RPC client"""
+    def __init__(self, server_url=None, transport=None):
+        """
+        Initialize the RPC client
+        
+        Args:
+            server_url (str, optional): Server URL, defaults to the saved setting
+            transport (str, optional): "http" for one request per call, or "websocket"
+                for one long-lived connection that also receives server events;
+                defaults to the saved setting
+        """
         self.settings = QSettings("StopJudol", "Client")
         if server_url is not None:
             self.server_url = server_url
         else:
             self.server_url = self.settings.value("server/url", "http://localhost:5000")
         self.timeout = int(self.settings.value("server/timeout", 10))
+        self.stream_timeout = int(self.settings.value("server/stream_timeout", 60))
+        self.compress_min_bytes = int(self.settings.value("server/compress_min_bytes", compression.DEFAULT_MIN_BYTES))
+        self.transport = transport or self.settings.value("server/transport", "http")
         self.logger = logging.getLogger("RPCClient")
         self.token = None
+        self.request_ids = itertools.count(1)
+        self.websocket = None
     
     def set_server_url(self, url):
         """
@@ -36,6 +50,7 @@ class RPCClient:
         """
         self.server_url = url
         self.settings.setValue("server/url", url)
+        self.close()
     
     def set_token(self, token):
         """
@@ -77,6 +92,103 @@ class RPCClient:
             self.logger.error(f"Login error: {e}")
             return False, f"Error connecting to server: {str(e)}"
     
+    def _get_headers(self):
+        """Get the headers of an RPC request"""
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+    
+    def _post_rpc(self, request_data):
+        """
+        Send a request or batch to the server over HTTP
+        
+        Large bodies are gzipped, which the server always understands; the response
+        is compressed by the server with an encoding requests accepts and decodes.
+        
+        Args:
+            request_data (dict or list): Request, or list of requests for a batch
+        
+        Returns:
+            requests.Response: HTTP response
+        """
+        body = json_codec.dumps_bytes(request_data)
+        headers = self._get_headers()
+        if self.compress_min_bytes > 0 and len(body) >= self.compress_min_bytes:
+            body = compression.compress(body, "gzip")
+            headers["Content-Encoding"] = "gzip"
+        
+        return requests.post(f"{self.server_url}/rpc", data=body, headers=headers, timeout=self.timeout)
+    
+    def _next_id(self):
+        """Get a new request ID, so multiplexed responses can be matched to their calls"""
+        return next(self.request_ids)
+    
+    def _get_websocket(self):
+        """Get the WebSocket transport, created on first use"""
+        if self.websocket is None:
+            # Only the WebSocket transport needs aiohttp
+            from .ws_transport import WebSocketTransport
+            self.websocket = WebSocketTransport(self.server_url, self.token)
+        elif self.websocket.token != self.token:
+            self.websocket.set_token(self.token)
+        return self.websocket
+    
+    def add_notification_listener(self, callback):
+        """
+        Register a callback for events pushed by the server
+        
+        Events are scan_progress, deletion_progress and ruleset_changed. They are
+        only delivered with the WebSocket transport.
+        
+        Args:
+            callback (callable): Called with (event, params) on the transport's thread
+            
+        Returns:
+            bool: True if events will be delivered
+        """
+        if self.transport != "websocket":
+            return False
+        self._get_websocket().add_listener(callback)
+        return True
+    
+    def remove_notification_listener(self, callback):
+        """
+        Unregister a callback passed to add_notification_listener
+        
+        Args:
+            callback (callable): Callback to remove
+        """
+        if self.websocket is not None:
+            self.websocket.remove_listener(callback)
+    
+    def close(self):
+        """Close the WebSocket connection, if any"""
+        if self.websocket is not None:
+            self.websocket.close()
+            self.websocket = None
+    
+    def _parse_response(self, response_data):
+        """
+        Turn a JSON-RPC response object into a result tuple
+        
+        Args:
+            response_data (dict): Response object, None if the server sent none
+            
+        Returns:
+            tuple: (success, result or error message)
+        """
+        if not isinstance(response_data, dict):
+            return False, "Invalid response from server"
+        if "result" in response_data:
+            return True, response_data["result"]
+        elif "error" in response_data:
+            error_msg = response_data["error"]
+            self.logger.error(f"RPC error: {error_msg}")
+            return False, error_msg
+        else:
+            return False, "Invalid response from server"
+    
     def call(self, method, **params):
         """
         Call a method on the RPC server
@@ -89,40 +201,22 @@ class RPCClient:
             tuple: (success, result or error message)
         """
         try:
-            # Prepare headers
-            headers = {"Content-Type": "application/json"}
-            if self.token:
-                headers["Authorization"] = f"Bearer {self.token}"
-            
-            # Make the request
             # In jsonrpcclient 4.0.3, we need to create the request manually
             request_data = {
                 "jsonrpc": "2.0",
                 "method": method,
                 "params": params,
-                "id": 1
+                "id": self._next_id()
             }
             
-            response = requests.post(
-                f"{self.server_url}/rpc",
-                json=request_data,
-                headers=headers,
-                timeout=self.timeout
-            )
+            if self.transport == "websocket":
+                return self._parse_response(self._get_websocket().send(request_data, self.timeout))
+            
+            response = self._post_rpc(request_data)
             
             # Parse the response
             if response.status_code == 200:
-                # Handle the response manually
-                response_data = response.json()
-                
-                if "result" in response_data:
-                    return True, response_data["result"]
-                elif "error" in response_data:
-                    error_msg = response_data["error"]
-                    self.logger.error(f"RPC error: {error_msg}")
-                    return False, error_msg
-                else:
-                    return False, "Invalid response from server"
+                return self._parse_response(json_codec.loads(response.content))
             else:
                 self.logger.error(f"HTTP error: {response.status_code} - {response.text}")
                 return False, f"HTTP error: {response.status_code}"
@@ -130,18 +224,132 @@ class RPCClient:
             self.logger.error(f"RPC call error: {e}")
             return False, f"Error: {str(e)}"
     
-    def fetch_comments(self, video_id, credentials_json=None):
+    def fetch_comments(self, video_id, credentials_json=None, scan_id=None, include_replies=None):
         """
         Fetch comments for a YouTube video
         
         Args:
             video_id (str): YouTube video ID
             credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; reuse it when retrying a failed scan
+                so the server resumes where it stopped
+            include_replies (bool, optional): Also fetch replies; the server's
+                scan_replies setting is used when omitted
             
         Returns:
             tuple: (success, comments or error message)
         """
-        return self.call("fetch_comments", video_id=video_id, credentials_json=credentials_json)
+        return self.call("fetch_comments", video_id=video_id, credentials_json=credentials_json,
+                         scan_id=scan_id, include_replies=include_replies)
+    
+    def start_scan(self, video_id, credentials_json=None, scan_id=None, include_replies=None):
+        """
+        Start fetching and analyzing the comments of a video on the server
+        
+        Args:
+            video_id (str): YouTube video ID
+            credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; reuse it when retrying a failed scan
+                so the server resumes where it stopped
+            include_replies (bool, optional): Also scan replies; the server's
+                scan_replies setting is used when omitted
+            
+        Returns:
+            tuple: (success, job status with job_id or error message)
+        """
+        return self.call("start_scan", video_id=video_id, credentials_json=credentials_json,
+                         scan_id=scan_id, include_replies=include_replies)
+    
+    def get_job_status(self, job_id):
+        """
+        Get the progress of a scan job
+        
+        Args:
+            job_id (str): Job ID returned by start_scan
+            
+        Returns:
+            tuple: (success, job status or error message)
+        """
+        return self.call("get_job_status", job_id=job_id)
+    
+    def get_job_results(self, job_id, offset=0, limit=100):
+        """
+        Get a page of the comments a scan job flagged
+        
+        Args:
+            job_id (str): Job ID returned by start_scan
+            offset (int, optional): Index of the first flagged comment to return
+            limit (int, optional): Most flagged comments to return
+            
+        Returns:
+            tuple: (success, {"items", "next_offset", "total", "status"} or error message)
+        """
+        return self.call("get_job_results", job_id=job_id, offset=offset, limit=limit)
+    
+    def cancel_job(self, job_id):
+        """
+        Stop a scan job
+        
+        Args:
+            job_id (str): Job ID returned by start_scan
+            
+        Returns:
+            tuple: (success, job status or error message)
+        """
+        return self.call("cancel_job", job_id=job_id)
+    
+    def stream_scan(self, video_id, credentials_json=None, scan_id=None, include_replies=None):
+        """
+        Scan a video and iterate over its records while the server analyzes it
+        
+        Flagged comments arrive one page of latency after the scan starts, and
+        neither side keeps the whole result set. Stopping the iteration early
+        closes the connection, which stops the scan on the server.
+        
+        Args:
+            video_id (str): YouTube video ID
+            credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; reuse it to resume a scan that stopped
+            include_replies (bool, optional): Also scan replies; the server's
+                scan_replies setting is used when omitted
+            
+        Yields:
+            dict: progress, flagged, page and done records; the last record is
+                always a done record, with status "failed" and the error if the
+                request failed
+        """
+        payload = {
+            "video_id": video_id,
+            "credentials_json": credentials_json,
+            "scan_id": scan_id,
+            "include_replies": include_replies
+        }
+        try:
+            # The read timeout applies per record, not to the whole scan
+            with requests.post(
+                f"{self.server_url}/stream/scan",
+                data=json_codec.dumps_bytes(payload),
+                headers=self._get_headers(),
+                timeout=(self.timeout, self.stream_timeout),
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    self.logger.error(f"HTTP error: {response.status_code} - {response.text}")
+                    yield {"type": "done", "status": "failed", "error": f"HTTP error: {response.status_code}"}
+                    return
+                
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    record = json_codec.loads(line)
+                    yield record
+                    if record.get("type") == "done":
+                        return
+            
+            yield {"type": "done", "status": "failed", "error": "Stream ended before the scan finished"}
+        except Exception as e:
+            self.logger.error(f"Stream error: {e}")
+            yield {"type": "done", "status": "failed", "error": f"Error: {str(e)}"}
     
     def analyze_comments(self, comments):
         """
@@ -155,7 +363,48 @@ class RPCClient:
         """
         return self.call("analyze_comments", comments=comments)
     
-    def delete_comment(self, comment_id, thread_id=None, credentials_json=None):
+    def scan_channel(self, credentials_json, channel_id=None, published_after=None, max_items=None):
+        """
+        Scan and analyze the comments on every video of a channel
+        
+        Args:
+            credentials_json (str): OAuth credentials as JSON string
+            channel_id (str, optional): YouTube channel ID, defaults to the authenticated user's channel
+            published_after (str, optional): Watermark returned by the previous scan
+            max_items (int, optional): Maximum number of comment threads to scan
+            
+        Returns:
+            tuple: (success, scan result or error message)
+        """
+        return self.call("scan_channel",
+                         credentials_json=credentials_json,
+                         channel_id=channel_id,
+                         published_after=published_after,
+                         max_items=max_items)
+    
+    def scan_videos(self, credentials_json, video_ids=None, playlist_ids=None, channel_ids=None, scan_id=None):
+        """
+        Start scanning several videos in parallel on the server
+        
+        Args:
+            credentials_json (str): OAuth credentials as JSON string
+            video_ids (list, optional): Video IDs or URLs
+            playlist_ids (list, optional): Playlist IDs to expand into videos
+            channel_ids (list, optional): Channel IDs whose uploads are scanned
+            scan_id (str, optional): Scan ID; reuse it when retrying a failed job
+            
+        Returns:
+            tuple: (success, job status or error message); poll the job with
+                get_job_status and get_job_results like start_scan jobs
+        """
+        return self.call("scan_videos",
+                         credentials_json=credentials_json,
+                         video_ids=video_ids,
+                         playlist_ids=playlist_ids,
+                         channel_ids=channel_ids,
+                         scan_id=scan_id)
+    
+    def delete_comment(self, comment_id, thread_id=None, credentials_json=None, channel_id=None):
         """
         Delete a YouTube comment
         
@@ -163,6 +412,7 @@ class RPCClient:
             comment_id (str): Comment ID to delete
             thread_id (str, optional): Comment thread ID, used for moderation
             credentials_json (str, optional): OAuth credentials as JSON string
+            channel_id (str, optional): Channel the comment belongs to
             
         Returns:
             tuple: (success, result or error message)
@@ -171,6 +421,69 @@ class RPCClient:
         return self.call("delete_comment", 
                          comment_id=comment_id, 
                          thread_id=thread_id, 
+                         credentials_json=credentials_json,
+                         channel_id=channel_id)
+    
+    def delete_comments(self, comments, credentials_json=None):
+        """
+        Delete multiple YouTube comments in one call
+        
+        Args:
+            comments (list): List of {"comment_id": str, "thread_id": str} objects
+            credentials_json (str, optional): OAuth credentials as JSON string
+            
+        Returns:
+            tuple: (success, list of per-comment results or error message)
+        """
+        return self.call("delete_comments",
+                         comments=comments,
+                         credentials_json=credentials_json)
+    
+    def enqueue_deletions(self, comments, credentials_json=None):
+        """
+        Queue comments for deletion on the server and return immediately
+        
+        Args:
+            comments (list): List of {"comment_id": str, "thread_id": str} objects
+            credentials_json (str, optional): OAuth credentials as JSON string
+            
+        Returns:
+            tuple: (success, queued and duplicate counts or error message)
+        """
+        return self.call("enqueue_deletions",
+                         comments=comments,
+                         credentials_json=credentials_json)
+    
+    def get_moderation_queue_status(self, credentials_json=None, comment_ids=None):
+        """
+        Get the state of the deletions queued on the server with the given credentials
+        
+        Args:
+            credentials_json (str): OAuth credentials as JSON string
+            comment_ids (list, optional): Comment IDs to return the state of
+            
+        Returns:
+            tuple: (success, queue status or error message)
+        """
+        return self.call("get_moderation_queue_status",
+                         credentials_json=credentials_json,
+                         comment_ids=comment_ids)
+    
+    def moderate_comments(self, comment_ids, moderation_status="rejected", credentials_json=None):
+        """
+        Set the moderation status of multiple comments in one call
+        
+        Args:
+            comment_ids (list): Comment IDs to moderate
+            moderation_status (str, optional): rejected, published or heldForReview
+            credentials_json (str, optional): OAuth credentials as JSON string
+            
+        Returns:
+            tuple: (success, mapping of comment ID to result or error message)
+        """
+        return self.call("moderate_comments",
+                         comment_ids=comment_ids,
+                         moderation_status=moderation_status,
                          credentials_json=credentials_json)
     
     def get_channel_info(self, credentials_json):
@@ -310,3 +623,72 @@ class RPCClient:
             bool: True if quota is available, False otherwise
         """
         return self.call("check_api_quota", credentials_json=credentials_json)
+    
+    def get_quota_status(self, credentials_json=None, planned_pages=0, planned_deletions=0):
+        """
+        Get today's YouTube API quota usage and a cost forecast
+        
+        Args:
+            credentials_json (str, optional): OAuth credentials as JSON string
+            planned_pages (int, optional): Comment pages of a planned scan
+            planned_deletions (int, optional): Comments of a planned deletion batch
+            
+        Returns:
+            tuple: (success, quota status or error message)
+        """
+        return self.call("get_quota_status",
+                         credentials_json=credentials_json,
+                         planned_pages=planned_pages,
+                         planned_deletions=planned_deletions)
+    
+    def get_api_health(self):
+        """
+        Get the retry and circuit breaker counters of the server's YouTube API calls
+        
+        Returns:
+            tuple: (success, API health counters or error message)
+        """
+        return self.call("get_api_health")
+    
+    def watch_video(self, video_id, credentials_json=None):
+        """
+        Add a video to the server's watchlist
+        
+        Args:
+            video_id (str): YouTube video ID
+            credentials_json (str, optional): OAuth credentials as JSON string
+            
+        Returns:
+            tuple: (success, watchlist entry or error message)
+        """
+        return self.call("watch_video", video_id=video_id, credentials_json=credentials_json)
+    
+    def unwatch_video(self, video_id):
+        """
+        Remove a video from the server's watchlist
+        
+        Args:
+            video_id (str): YouTube video ID
+            
+        Returns:
+            tuple: (success, True if the video was watched or error message)
+        """
+        return self.call("unwatch_video", video_id=video_id)
+    
+    def get_watchlist(self):
+        """
+        Get the server's watchlist
+        
+        Returns:
+            tuple: (success, watchlist or error message)
+        """
+        return self.call("get_watchlist")
+    
+    def get_auto_moderation_status(self):
+        """
+        Get the state of the server's auto-moderation queue
+        
+        Returns:
+            tuple: (success, auto-moderation status or error message)
+        """
+        return self.call("get_auto_moderation_status")
\ No newline at end of file
@@ -7,10 +7,142 @@ StopJudol - Worker Threads
 This module provides worker threads for background operations.
 """
 
+import time
+import uuid
 import logging
+import threading
 import traceback
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
 
+# Number of comments sent to the server per enqueue_deletions call
+DELETE_BATCH_SIZE = 500
+
+# Seconds between two polls of the server's deletion queue
+QUEUE_POLL_SECONDS = 2
+
+# Seconds to wait for queued deletions; the server retries failures for up to an
+# hour, so comments still queued by then are reported as pending
+DELETE_WAIT_SECONDS = 300
+
+# Seconds between two polls of a scan job, and flagged comments fetched per call
+JOB_POLL_SECONDS = 1
+JOB_RESULTS_PAGE_SIZE = 500
+
+def wait_for_deletions(rpc_client, comment_ids, credentials_json, progress_callback=None, is_running=None,
+                       timeout=DELETE_WAIT_SECONDS):
+    """
+    Poll the server's deletion queue until the given comments are processed
+    
+    Args:
+        rpc_client: RPC client
+        comment_ids (list): IDs of the queued comments
+        credentials_json (str): OAuth credentials as JSON string
+        progress_callback (callable, optional): Called with (processed, total) after every poll
+        is_running (callable, optional): Returns False to stop waiting early
+        timeout (float, optional): Seconds to wait at most, None to wait until every
+            comment is processed
+        
+    Returns:
+        dict: Mapping of comment ID to its queue item; comments still queued when
+            waiting stopped are missing
+    """
+    finished = {}
+    comment_ids = list(dict.fromkeys(comment_ids))
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    
+    # With the WebSocket transport, the next poll happens as soon as the server reports progress
+    wake = threading.Event()
+    waiting = set(comment_ids)
+    def on_event(event, params):
+        if event == 'deletion_progress' and any(item['comment_id'] in waiting for item in params['items']):
+            wake.set()
+    rpc_client.add_notification_listener(on_event)
+    
+    try:
+        while len(finished) < len(comment_ids):
+            if is_running and not is_running():
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                logging.warning(f"{len(comment_ids) - len(finished)} comments are still queued for deletion")
+                break
+            
+            waiting_ids = [comment_id for comment_id in comment_ids if comment_id not in finished]
+            success, status = rpc_client.get_moderation_queue_status(credentials_json, waiting_ids)
+            if not success:
+                raise Exception(status)
+            
+            for item in status['items']:
+                if item['status'] in ('done', 'failed', 'unknown'):
+                    finished[item['comment_id']] = item
+                    waiting.discard(item['comment_id'])
+            
+            if progress_callback:
+                progress_callback(len(finished), len(comment_ids))
+            if len(finished) < len(comment_ids):
+                wake.wait(QUEUE_POLL_SECONDS)
+                wake.clear()
+    finally:
+        rpc_client.remove_notification_listener(on_event)
+    
+    return finished
+
+def wait_for_job(rpc_client, job_id, progress_callback=None, is_running=None):
+    """
+    Poll a scan job until it finishes, collecting the comments it flagged
+    
+    Args:
+        rpc_client: RPC client
+        job_id (str): Job ID returned by start_scan
+        progress_callback (callable, optional): Called with (pages fetched, pages
+            expected) after every poll
+        is_running (callable, optional): Returns False to cancel the job
+        
+    Returns:
+        tuple: (final job status, list of flagged comments)
+    """
+    flagged = []
+    offset = 0
+    
+    # With the WebSocket transport, the next poll happens as soon as the job reports progress
+    wake = threading.Event()
+    def on_event(event, params):
+        if event == 'scan_progress' and params.get('job_id') == job_id:
+            wake.set()
+    rpc_client.add_notification_listener(on_event)
+    
+    try:
+        while True:
+            if is_running and not is_running():
+                rpc_client.cancel_job(job_id)
+                is_running = None
+            
+            success, status = rpc_client.get_job_status(job_id)
+            if not success:
+                raise Exception(status)
+            
+            # Fetch what was flagged so far, so the last poll has little left to fetch
+            while offset is not None and offset < status['flagged_count']:
+                success, results = rpc_client.get_job_results(job_id, offset, JOB_RESULTS_PAGE_SIZE)
+                if not success:
+                    raise Exception(results)
+                flagged.extend(results['items'])
+                offset = results['next_offset']
+                if not results['items']:
+                    break
+            
+            if progress_callback:
+                # The expected page count is an estimate, so finished jobs jump to the end
+                total = max(status['pages_expected'], 1)
+                done = total if status['status'] not in ('queued', 'running') else min(status['pages_fetched'], total - 1)
+                progress_callback(done, total)
+            
+            if status['status'] not in ('queued', 'running'):
+                return status, flagged
+            wake.wait(JOB_POLL_SECONDS)
+            wake.clear()
+    finally:
+        rpc_client.remove_notification_listener(on_event)
+
 class Worker(QObject):
     """Base worker class for background operations"""
     
@@ -37,7 +169,7 @@ class Worker(QObject):
 class FetchCommentsWorker(Worker):
     """Worker for fetching comments"""
     
-    def __init__(self, rpc_client, video_id, credentials_json=None):
+    def __init__(self, rpc_client, video_id, credentials_json=None, scan_id=None):
         """
         Initialize the worker
         
@@ -45,11 +177,13 @@ class FetchCommentsWorker(Worker):
             rpc_client: RPC client
             video_id (str): YouTube video ID
             credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; pass the ID of a failed scan to resume it
         """
         super().__init__()
         self.rpc_client = rpc_client
         self.video_id = video_id
         self.credentials_json = credentials_json
+        self.scan_id = scan_id or uuid.uuid4().hex
     
     @pyqtSlot()
     def run(self):
@@ -57,21 +191,27 @@ class FetchCommentsWorker(Worker):
         try:
             self.is_running = True
             
-            # Fetch comments
-            success, result = self.rpc_client.fetch_comments(
+            # Scan the video in a server-side job
+            success, job = self.rpc_client.start_scan(
                 self.video_id, 
-                self.credentials_json
+                self.credentials_json,
+                self.scan_id
             )
             
             if not success:
-                self.error.emit(result)
+                self.error.emit(job)
                 return
             
-            # Analyze comments
-            success, analyzed_result = self.rpc_client.analyze_comments(result)
+            # Poll the job; stopping the worker cancels it
+            status, analyzed_result = wait_for_job(
+                self.rpc_client,
+                job['job_id'],
+                progress_callback=self.progress.emit,
+                is_running=lambda: self.is_running
+            )
             
-            if not success:
-                self.error.emit(analyzed_result)
+            if status['status'] == 'failed':
+                self.error.emit(status['error'])
                 return
             
             # Emit result
@@ -107,33 +247,58 @@ class DeleteCommentsWorker(Worker):
         try:
             self.is_running = True
             total = len(self.comments)
+            comment_ids = []
             
-            for i, comment in enumerate(self.comments):
+            # Queue every comment on the server, which deletes them in batches,
+            # retries failures and keeps going if this app is closed
+            for start in range(0, total, DELETE_BATCH_SIZE):
                 if not self.is_running:
                     break
                 
+                batch = self.comments[start:start + DELETE_BATCH_SIZE]
+                
                 # Get comment ID and thread ID
                 # This is critical - we need both the comment ID and thread ID
                 # The comment ID is used for direct deletion
                 # The thread ID is used for moderation (marking as spam)
-                comment_id = comment['snippet']['topLevelComment']['id']
-                thread_id = comment['id']
+                items = [
+                    {
+                        'comment_id': comment['snippet']['topLevelComment']['id'],
+                        'thread_id': comment['id'],
+                        'channel_id': comment['snippet'].get('channelId')
+                    }
+                    for comment in batch
+                ]
                 
-                # Update progress
-                self.progress.emit(i + 1, total)
-                
-                # Delete comment
-                success, result = self.rpc_client.delete_comment(
-                    comment_id, 
-                    thread_id, 
+                success, result = self.rpc_client.enqueue_deletions(
+                    items, 
                     self.credentials_json
                 )
-                
-                # Store result
+                if not success:
+                    self.error.emit(result)
+                    return
+                comment_ids.extend(item['comment_id'] for item in items)
+            
+            # Wait for the queue to process them
+            finished = wait_for_deletions(
+                self.rpc_client,
+                comment_ids,
+                self.credentials_json,
+                progress_callback=self.progress.emit,
+                is_running=lambda: self.is_running
+            )
+            
+            # Store results
+            for comment in self.comments:
+                item = finished.get(comment['snippet']['topLevelComment']['id'])
+                if item is None:
+                    # Still queued; the server keeps processing it in the background
+                    self.results.append({'comment': comment, 'success': False, 'pending': True, 'result': None})
+                    continue
                 self.results.append({
                     'comment': comment,
-                    'success': success,
-                    'result': result
+                    'success': bool(item.get('success')),
+                    'result': item
                 })
             
             # Emit results
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - WebSocket Transport
+-------------------------------
+This module sends JSON-RPC requests to the StopJudol server over one long-lived
+WebSocket connection instead of one HTTP request per call. Calls from any thread
+share the connection and are matched to their responses by ID, so several can
+be in flight at once. Notifications pushed by the server (scan progress,
+deletion progress, ruleset changes) are handed to registered listeners.
+
+The connection is run by a single background thread with its own event loop.
+"""
+
+import asyncio
+import logging
+import threading
+import aiohttp
+from shared.utils import json_codec
+
+class WebSocketTransport:
+    """JSON-RPC over a WebSocket connection shared by every calling thread"""
+    
+    def __init__(self, server_url, token=None):
+        """
+        Initialize the transport; the connection is opened on the first call
+        
+        Args:
+            server_url (str): HTTP URL of the server, e.g. http://localhost:5000
+            token (str, optional): Authentication token
+        """
+        if server_url.startswith("https://"):
+            self.url = "wss://" + server_url[len("https://"):].rstrip("/") + "/ws"
+        else:
+            self.url = "ws://" + server_url.split("://", 1)[-1].rstrip("/") + "/ws"
+        self.token = token
+        self.logger = logging.getLogger("WebSocketTransport")
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.pending = {}  # request ID -> future of the response
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.ws = None
+        self.connect_lock = None
+    
+    def _ensure_loop(self):
+        """Start the background thread running the connection's event loop"""
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(target=self.loop.run_forever, name="rpc-websocket", daemon=True)
+                self.thread.start()
+        return self.loop
+    
+    async def _connect(self, timeout):
+        """Open the connection unless it is open already"""
+        if self.connect_lock is None:
+            self.connect_lock = asyncio.Lock()
+        
+        # Calls arriving together share one connection attempt
+        async with self.connect_lock:
+            if self.ws is not None and not self.ws.closed:
+                return self.ws
+            
+            if self.session is None:
+                self.session = aiohttp.ClientSession()
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+            self.ws = await asyncio.wait_for(self.session.ws_connect(self.url, headers=headers, heartbeat=30), timeout)
+            asyncio.ensure_future(self._read(self.ws))
+            self.logger.info(f"Connected to {self.url}")
+            return self.ws
+    
+    async def _read(self, ws):
+        """Hand responses to their callers and notifications to the listeners"""
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json_codec.loads(message.data)
+                for item in data if isinstance(data, list) else [data]:
+                    if not isinstance(item, dict):
+                        continue
+                    if "method" in item and "id" not in item:
+                        self._notify(item["method"], item.get("params"))
+                        continue
+                    future = self.pending.pop(item.get("id"), None)
+                    if future is not None and not future.done():
+                        future.set_result(item)
+                    elif item.get("id") is None and "error" in item:
+                        # Cannot be matched to a call, which then times out
+                        self.logger.error(f"RPC error without request ID: {item['error']}")
+        except Exception as e:
+            self.logger.error(f"WebSocket read error: {e}")
+        finally:
+            # Calls still waiting will not get an answer on this connection
+            for request_id in list(self.pending):
+                future = self.pending.pop(request_id)
+                if not future.done():
+                    future.set_exception(Exception("WebSocket connection closed"))
+    
+    def _notify(self, method, params):
+        """Pass a server notification to every listener"""
+        for callback in list(self.listeners):
+            try:
+                callback(method, params)
+            except Exception as e:
+                self.logger.error(f"Error in notification listener: {e}")
+    
+    async def _send(self, request_data, timeout):
+        """Send a request or batch and wait for the responses of its IDs"""
+        ws = await self._connect(timeout)
+        requests_data = request_data if isinstance(request_data, list) else [request_data]
+        futures = []
+        for item in requests_data:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[item["id"]] = future
+            futures.append(future)
+        
+        try:
+            await ws.send_str(json_codec.dumps(request_data))
+            responses = await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        finally:
+            for item in requests_data:
+                self.pending.pop(item["id"], None)
+        return responses if isinstance(request_data, list) else responses[0]
+    
+    def send(self, request_data, timeout):
+        """
+        Send a JSON-RPC request or batch and wait for its response
+        
+        Args:
+            request_data (dict or list): Request, or list of requests for a batch;
+                every request needs a unique ID
+            timeout (float): Seconds to wait for the responses
+        
+        Returns:
+            dict or list: Response, or list of responses in request order
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._send(request_data, timeout), loop).result()
+    
+    def add_listener(self, callback):
+        """
+        Register a callback for server notifications; it runs on the transport's thread
+        
+        Args:
+            callback (callable): Called with (method, params) of every notification
+        """
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """
+        Unregister a notification callback
+        
+        Args:
+            callback (callable): Callback passed to add_listener
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def set_token(self, token):
+        """
+        Use another authentication token, reconnecting on the next call
+        
+        Args:
+            token (str): Authentication token
+        """
+        self.token = token
+        if self.loop is not None and self.ws is not None:
+            asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop).result()
+    
+    def close(self):
+        """Close the connection and stop the background thread"""
+        if self.loop is None:
+            return
+        
+        async def shutdown():
+            if self.ws is not None:
+                await self.ws.close()
+            if self.session is not None:
+                await self.session.close()
+        
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = self.thread = self.session = self.ws = self.connect_lock = None
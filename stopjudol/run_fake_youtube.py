@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Fake YouTube API Runner
+-----------------------------------
+This script starts a local fake YouTube Data API for offline load and integration
+testing. Start the server with STOPJUDOL_YOUTUBE_API_BASE_URL pointing at it.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the stopjudol directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.fake_youtube import FakeYouTubeAPI, create_app
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Run a fake YouTube Data API")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--fixture", help="Recorded channel data (JSON file)")
+    parser.add_argument("--videos", type=int, default=5, help="Synthetic videos")
+    parser.add_argument("--comments-per-video", type=int, default=250, help="Synthetic comment threads per video")
+    parser.add_argument("--spam-ratio", type=float, default=0.1, help="Share of synthetic comments that are spam")
+    parser.add_argument("--reply-ratio", type=float, default=0.2, help="Share of synthetic threads that have replies")
+    parser.add_argument("--max-replies", type=int, default=12, help="Maximum replies of a synthetic thread")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0, help="Random extra latency")
+    parser.add_argument("--page-size", type=int, default=100, help="Maximum comments per page")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls failing with an injected error")
+    parser.add_argument("--error-codes", default="403,429,500", help="Comma-separated statuses of injected errors")
+    parser.add_argument("--quota-limit", type=int, default=10000, help="Quota units before quotaExceeded")
+    parser.add_argument("--delete-own-only", action="store_true", help="Reject comments.delete on other users' comments like YouTube does")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the data generator and error injection")
+    args = parser.parse_args()
+    
+    fixture = None
+    if args.fixture:
+        with open(args.fixture, 'r', encoding='utf-8') as f:
+            fixture = json.load(f)
+    
+    fake_api = FakeYouTubeAPI(
+        config={
+            'latency_ms': args.latency_ms,
+            'latency_jitter_ms': args.latency_jitter_ms,
+            'page_size': args.page_size,
+            'error_rate': args.error_rate,
+            'error_codes': [int(code) for code in args.error_codes.split(',') if code],
+            'quota_limit': args.quota_limit,
+            'delete_own_only': args.delete_own_only,
+        },
+        fixture=fixture,
+        videos=args.videos,
+        comments_per_video=args.comments_per_video,
+        spam_ratio=args.spam_ratio,
+        reply_ratio=args.reply_ratio,
+        max_replies=args.max_replies,
+        seed=args.seed
+    )
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    print("=" * 50)
+    print(" StopJudol Fake YouTube API ".center(50, "="))
+    print("=" * 50)
+    print(f"Serving {len(fake_api.videos)} videos on port {args.port}")
+    print(f"Use STOPJUDOL_YOUTUBE_API_BASE_URL=http://127.0.0.1:{args.port}")
+    print("Press Ctrl+C to stop the server")
+    print("=" * 50)
+    
+    from aiohttp import web
+    web.run_app(create_app(fake_api), port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
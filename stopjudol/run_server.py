@@ -9,41 +9,35 @@ This script starts the StopJudol JSON-RPC server.
 
 import os
 import sys
-import logging
 from dotenv import load_dotenv
 
 # Add the stopjudol directory to the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the server main module
-import server.main
-app = server.main.app
+from shared.utils import logger_config
 
 if __name__ == "__main__":
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler("server.log")
-        ]
-    )
+    # Configure logging, written by a background thread
+    logger_config.configure_queue_logging("server.log")
     
     # Load environment variables
     load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "server", ".env"))
     
-    # Get port from environment or use default
+    # Get host, port and number of worker processes from environment or use defaults
+    host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", 5000))
+    workers = int(os.environ.get("WORKERS", 1))
+    use_uvloop = os.environ.get("UVLOOP", "").lower() in ("1", "true", "yes")
     
     # Print startup message
     print("=" * 50)
     print(" StopJudol JSON-RPC Server ".center(50, "="))
     print("=" * 50)
-    print(f"Starting server on port {port}...")
+    print(f"Starting server on port {port} with {workers} worker(s)...")
     print("Press Ctrl+C to stop the server")
     print("=" * 50)
     
-    # Run the server
-    from aiohttp import web
-    web.run_app(app, port=port)
+    # Run the server; several workers share the port through SO_REUSEPORT, and
+    # only the processes serving requests import the server application
+    from server import prefork
+    prefork.run(host, port, workers=workers, use_uvloop=use_uvloop)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Auto-Moderation
+---------------------------
+This module moderates flagged comments on the server without waiting for a person
+to review them, when the auto_delete setting is enabled. Every flagged comment is
+given a confidence from the reason it was flagged for, and only comments above the
+threshold of that reason are handed to the durable deletion queue. The queue deletes
+them in batches, retries failures and survives restarts, so a wave of judol comments
+costs a few requests instead of one per comment.
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+# Default minimum confidence of comments that are moderated automatically
+DEFAULT_MIN_CONFIDENCE = 0.8
+
+# Results kept for get_auto_moderation_status, and queued comments whose reason is
+# remembered until their result is reported
+MAX_RECENT_RESULTS = 200
+MAX_PENDING = 10000
+
+# Confidence of each reason category, from how rarely it matches legitimate comments
+REASON_CONFIDENCE = {
+    'blacklist': 0.9,
+    'whatsapp': 0.85,
+    'telegram': 0.85,
+    'url': 0.6,
+    'gambling_indicators': 0.5,  # At two indicators; substring matches hit ordinary words
+    'email': 0.5,
+    'phone_number': 0.5,
+    'obfuscated': 0.5,
+    'long_comment': 0.4
+}
+
+def score_reason(reason):
+    """
+    Get the category and confidence of an analysis reason
+    
+    Args:
+        reason (str): Reason returned by CommentAnalyzer.analyze
+    
+    Returns:
+        tuple: (category, confidence between 0 and 1)
+    """
+    reason = reason or ''
+    if reason.startswith('Blacklisted term'):
+        return 'blacklist', REASON_CONFIDENCE['blacklist']
+    if reason.startswith('Suspicious pattern: '):
+        category = reason[len('Suspicious pattern: '):]
+        return category, REASON_CONFIDENCE.get(category, 0.5)
+    if reason.startswith('Multiple gambling indicators'):
+        # Every indicator beyond the two required to flag adds confidence, so the
+        # default threshold is only reached with five of them
+        match = re.search(r'(\d+)', reason)
+        count = int(match.group(1)) if match else 2
+        confidence = REASON_CONFIDENCE['gambling_indicators'] + 0.1 * max(0, count - 2)
+        return 'gambling_indicators', round(min(0.9, confidence), 2)
+    if reason.startswith('Contains obfuscated characters'):
+        return 'obfuscated', REASON_CONFIDENCE['obfuscated']
+    if reason.startswith('Long comment with numbers'):
+        return 'long_comment', REASON_CONFIDENCE['long_comment']
+    return 'other', 0.0
+
+class AutoModerator:
+    """Hands confidently flagged comments to the deletion queue when auto_delete is enabled"""
+    
+    def __init__(self, config_manager, moderation_queue):
+        """
+        Initialize the auto-moderator
+        
+        Args:
+            config_manager (ConfigManager): Source of the auto-moderation settings
+            moderation_queue (ModerationQueue): Durable queue the comments are deleted through
+        """
+        self.config_manager = config_manager
+        self.moderation_queue = moderation_queue
+        self.lock = threading.Lock()
+        self.pending = OrderedDict()  # comment ID -> queued comment, until its result is reported
+        self.recent_results = deque(maxlen=MAX_RECENT_RESULTS)
+        self.counters = {'queued': 0, 'skipped': 0, 'deleted': 0, 'marked_as_spam': 0, 'failed': 0, 'dry_run': 0}
+    
+    def is_enabled(self):
+        """
+        Check whether flagged comments are moderated automatically
+        
+        Returns:
+            bool: Value of the auto_delete setting
+        """
+        return bool(self.config_manager.get_setting('auto_delete', False))
+    
+    def is_dry_run(self):
+        """
+        Check whether moderation is only logged instead of performed
+        
+        Returns:
+            bool: Value of the auto_moderation_dry_run setting
+        """
+        return bool(self.config_manager.get_setting('auto_moderation_dry_run', False))
+    
+    def get_threshold(self, category):
+        """
+        Get the minimum confidence of a reason category
+        
+        Args:
+            category (str): Reason category returned by score_reason
+        
+        Returns:
+            float: Per-category threshold from auto_moderation_thresholds, or
+                auto_moderation_min_confidence
+        """
+        thresholds = self.config_manager.get_setting('auto_moderation_thresholds', {}) or {}
+        if category in thresholds:
+            return float(thresholds[category])
+        return float(self.config_manager.get_setting('auto_moderation_min_confidence', DEFAULT_MIN_CONFIDENCE))
+    
+    def submit(self, flagged_comments, credentials_json, video_id=None):
+        """
+        Queue the flagged comments that pass their confidence threshold for deletion
+        
+        Comments already in the deletion queue are skipped by the queue itself, so a
+        comment whose deletion failed for good can be queued again by a later scan.
+        
+        Args:
+            flagged_comments (list): Comment threads with analysis_result set
+            credentials_json (str): OAuth credentials of the channel owner
+            video_id (str, optional): Video the comments belong to, for the log
+        
+        Returns:
+            int: Number of comments queued
+        """
+        if not self.is_enabled() or not flagged_comments:
+            return 0
+        if not credentials_json:
+            logging.warning("Auto-moderation skipped: credentials required for deletion")
+            return 0
+        
+        items = []
+        skipped = 0
+        for comment in flagged_comments:
+            reason = (comment.get('analysis_result') or {}).get('reason')
+            category, confidence = score_reason(reason)
+            if confidence < self.get_threshold(category):
+                skipped += 1
+                continue
+            items.append({
+                'comment_id': comment['snippet']['topLevelComment']['id'],
+                'thread_id': comment['id'],
+                'channel_id': comment['snippet'].get('channelId'),
+                'video_id': video_id or comment['snippet'].get('videoId'),
+                'reason': reason,
+                'category': category,
+                'confidence': round(confidence, 2)
+            })
+        
+        if items and self.is_dry_run():
+            self.record_results(items, [
+                {'comment_id': item['comment_id'], 'action_type': 'none', 'success': True,
+                 'message': 'Dry run: comment would be deleted'}
+                for item in items
+            ], dry_run=True)
+            queued = len(items)
+        elif items:
+            with self.lock:
+                for item in items:
+                    self.pending[item['comment_id']] = item
+                while len(self.pending) > MAX_PENDING:
+                    self.pending.popitem(last=False)
+            result = self.moderation_queue.enqueue(items, credentials_json)
+            queued = result['queued']
+            skipped += result['duplicates']
+        else:
+            queued = 0
+        
+        with self.lock:
+            self.counters['queued'] += queued
+            self.counters['skipped'] += skipped
+        if queued:
+            logging.info(f"Auto-moderation queued {queued} comments")
+        return queued
+    
+    def on_processed(self, processed):
+        """
+        Record the final results of queued comments, called by the deletion queue
+        
+        Args:
+            processed (list): State of every comment of a processed queue batch
+        """
+        finished = [item for item in processed if item['status'] in ('done', 'failed')]
+        with self.lock:
+            items = [self.pending.pop(item['comment_id'], None) for item in finished]
+        results = [result for item, result in zip(items, finished) if item]
+        if results:
+            self.record_results([item for item in items if item], results)
+    
+    def record_results(self, items, results, dry_run=False):
+        """
+        Log the results of moderated comments
+        
+        Args:
+            items (list): Queued comments
+            results (list): One result per comment with comment_id, action_type,
+                success and message
+            dry_run (bool, optional): The comments were only logged
+        
+        Returns:
+            list: Logged results
+        """
+        results_by_id = {result['comment_id']: result for result in results}
+        logged = []
+        with self.lock:
+            for item in items:
+                result = results_by_id[item['comment_id']]
+                entry = {
+                    'comment_id': item['comment_id'],
+                    'thread_id': item['thread_id'],
+                    'video_id': item['video_id'],
+                    'reason': item['reason'],
+                    'confidence': item['confidence'],
+                    'action_type': result['action_type'],
+                    'success': result['success'],
+                    'message': result.get('message'),
+                    'dry_run': dry_run,
+                    'timestamp': time.time()
+                }
+                self.recent_results.appendleft(entry)
+                logged.append(entry)
+                
+                if entry['dry_run']:
+                    self.counters['dry_run'] += 1
+                elif not entry['success']:
+                    self.counters['failed'] += 1
+                else:
+                    self.counters[entry['action_type']] += 1
+        
+        for entry in logged:
+            logging.info(f"Auto-moderation {entry['action_type']} comment {entry['comment_id']} "
+                         f"(success: {entry['success']}, reason: {entry['reason']}, "
+                         f"confidence: {entry['confidence']}): {entry['message']}")
+        return logged
+    
+    def get_status(self):
+        """
+        Get the auto-moderation settings, queue size, counters and recent results
+        
+        Returns:
+            dict: Auto-moderation status
+        """
+        with self.lock:
+            return {
+                'enabled': self.is_enabled(),
+                'dry_run': self.is_dry_run(),
+                'queued': len(self.pending),
+                'counters': dict(self.counters),
+                'recent_results': list(self.recent_results)
+            }
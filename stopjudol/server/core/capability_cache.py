@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Moderation Capability Cache
+---------------------------------------
+This module remembers which moderation path worked for a channel and set of
+credentials. Deleting someone else's comment always fails with a 403 before
+setModerationStatus is tried, and a moderator without owner rights then fails
+again before markAsSpam; once the working path is known, later deletions go
+straight to it. Entries expire so a change of permissions is noticed.
+"""
+
+import time
+import hashlib
+import threading
+
+# Moderation paths, from the most to the least effective
+PATH_DELETE = 'delete'
+PATH_MODERATE = 'moderate'
+PATH_SPAM = 'spam'
+
+# Default time a remembered path is trusted before the full chain is tried again
+DEFAULT_TTL_SECONDS = 60 * 60
+
+def get_credentials_key(credentials):
+    """
+    Get a stable, non-secret key identifying a set of credentials
+    
+    Args:
+        credentials (Credentials): OAuth credentials, or None when using the API key
+    
+    Returns:
+        str: Hash of the refresh token, or of the access token if there is none
+    """
+    secret = getattr(credentials, 'refresh_token', None) or getattr(credentials, 'token', None)
+    if not secret:
+        return 'anonymous'
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()[:16]
+
+class ModerationCapabilityCache:
+    """Thread-safe TTL cache of the moderation path that works per credentials and channel"""
+    
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache
+        
+        Args:
+            ttl_seconds (float, optional): Time a remembered path is trusted
+        """
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = {}  # (credentials key, channel ID) -> (expires_at, path)
+        self.library_has_set_moderation_status = None  # Unknown until first tried
+        self.counters = {'hits': 0, 'misses': 0, 'updates': 0, 'invalidations': 0}
+    
+    def get(self, credentials_key, channel_id):
+        """
+        Get the path that worked last time
+        
+        Args:
+            credentials_key (str): Key returned by get_credentials_key
+            channel_id (str): Channel the comments belong to, None if unknown
+        
+        Returns:
+            str: PATH_DELETE, PATH_MODERATE, PATH_SPAM or None if unknown or expired
+        """
+        key = (credentials_key, channel_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            self.counters['hits' if entry else 'misses'] += 1
+            return entry[1] if entry else None
+    
+    def record(self, credentials_key, channel_id, path):
+        """
+        Remember the path that worked, or forget it
+        
+        Args:
+            credentials_key (str): Key returned by get_credentials_key
+            channel_id (str): Channel the comments belong to, None if unknown
+            path (str): Path that handled the comments, None if every path failed
+        """
+        if not self.ttl_seconds:
+            return
+        
+        key = (credentials_key, channel_id)
+        with self.lock:
+            if path:
+                if self.entries.get(key, (None, None))[1] != path:
+                    self.counters['updates'] += 1
+                self.entries[key] = (time.monotonic() + self.ttl_seconds, path)
+            elif self.entries.pop(key, None):
+                self.counters['invalidations'] += 1
+    
+    def clear(self):
+        """Forget every remembered path"""
+        with self.lock:
+            self.entries.clear()
+            self.library_has_set_moderation_status = None
+    
+    def get_stats(self):
+        """
+        Get the cache counters
+        
+        Returns:
+            dict: Hits, misses, updates, invalidations and entries
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+        return stats
@@ -10,11 +10,15 @@ This module handles loading and saving configuration settings, blacklists, and w
 import os
 import sys
 import json
+import asyncio
 import logging
 import shutil
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Seconds between checks for changes made by other processes
+RELOAD_CHECK_SECONDS = 1
+
 class ConfigManager:
     """Manager for application configuration and settings"""
     
@@ -58,8 +62,14 @@ class ConfigManager:
         # Ensure user config directory exists
         os.makedirs(self.user_config_dir, exist_ok=True)
         
-        # Load or create configuration
+        # Load or create configuration; the stamp of the file tells when another
+        # process (e.g. another server worker) changed it
+        self.config_stamp = None
         self.config = self.load_config()
+        self.config_stamp = self.config_stamp or self._get_config_stamp()
+        
+        # Callbacks told about changes of the blacklist, whitelist and settings
+        self.listeners = []
     
     def load_config(self):
         """
@@ -132,9 +142,35 @@ class ConfigManager:
                 'educational', 'learning', 'course', 'class'
             ],
             'settings': {
-                'auto_delete': False,
-                'check_interval_seconds': 0,  # 0 means disabled
-                'max_comments_per_scan': 500
+                'auto_delete': False,  # Moderate confidently flagged comments on the server
+                'check_interval_seconds': 0,  # Watchlist checks, 0 means disabled
+                'max_comments_per_scan': 500,
+                'quota_daily_limit': 10000,
+                'page_cache_max_mb': 50,
+                'max_channel_scan_items': 1000,
+                'max_videos_per_scan': 50,
+                'scan_concurrency': 4,
+                'scan_rate_limit': 10,
+                'youtube_api_base_url': None,  # None means the real YouTube Data API
+                'scan_replies': False,
+                'shared_cache_ttl_seconds': 300,
+                'shared_cache_max_mb': 64,
+                'watch_max_interval_seconds': 21600,
+                'watch_quota_share': 0.2,
+                'watch_quota_reserve': 1000,
+                'auto_moderation_dry_run': False,
+                'auto_moderation_min_confidence': 0.8,
+                'auto_moderation_thresholds': {},  # Per-reason overrides, e.g. {"url": 0.5}
+                'capability_cache_ttl_seconds': 3600,
+                'rpc_max_batch_size': 100,  # Requests per JSON-RPC batch
+                'rpc_max_request_mb': 64,  # Largest accepted request body
+                'rpc_compress_min_bytes': 1024,  # Smallest response body sent compressed
+                'rpc_log_sample_rate': 0.0,  # Share of RPC calls logged with full bodies
+                'rpc_log_max_chars': 1000,  # Longest RPC body summary in the log
+                'rpc_log_full_max_chars': 100000,  # Longest RPC body logged for sampled calls
+                'scan_job_concurrency': 4,
+                'scan_job_max_pages': 100,
+                'scan_job_ttl_seconds': 3600
             }
         }
         
@@ -153,12 +189,79 @@ class ConfigManager:
             config = self.config
         
         try:
-            with open(self.user_config_path, 'w', encoding='utf-8') as f:
+            # Written to a temporary file and moved into place, so other processes
+            # never read a half-written file
+            temp_path = f"{self.user_config_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, self.user_config_path)
+            self.config_stamp = (stat.st_ino, stat.st_mtime_ns)
             logging.info(f"Saved configuration to {self.user_config_path}")
         except Exception as e:
             logging.error(f"Error saving config: {e}")
     
+    def _get_config_stamp(self):
+        """Get the inode and modification time of the user config file"""
+        try:
+            stat = os.stat(self.user_config_path)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            return None
+    
+    def reload_if_changed(self):
+        """
+        Reload the configuration if another process saved it since it was loaded
+        
+        Returns:
+            bool: True if the configuration was reloaded
+        """
+        stamp = self._get_config_stamp()
+        if stamp is None or stamp == self.config_stamp:
+            return False
+        
+        try:
+            with open(self.user_config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except Exception as e:
+            logging.error(f"Error reloading config: {e}")
+            return False
+        
+        self.config = config
+        self.config_stamp = stamp
+        logging.info(f"Reloaded configuration changed by another process from {self.user_config_path}")
+        self._notify('all', {'action': 'reloaded'})
+        return True
+    
+    async def run(self):
+        """Reload the configuration whenever another process changes it, until cancelled"""
+        while True:
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logging.error(f"Error watching config: {e}")
+            await asyncio.sleep(RELOAD_CHECK_SECONDS)
+    
+    def add_listener(self, callback):
+        """
+        Register a callback for configuration changes
+        
+        Args:
+            callback (callable): Called with (section, change) after the blacklist,
+                whitelist or settings change; section is 'blacklist', 'whitelist',
+                'settings' or 'all' after a reset or a reload
+        """
+        self.listeners.append(callback)
+    
+    def _notify(self, section, change):
+        """Tell the listeners about a configuration change"""
+        for callback in self.listeners:
+            try:
+                callback(section, change)
+            except Exception as e:
+                logging.error(f"Error notifying config listener: {e}")
+    
     def get_blacklist(self):
         """
         Get the blacklist of keywords
@@ -223,11 +326,15 @@ class ConfigManager:
             key (str): Setting key
             value: Setting value
         """
+        # Start from changes other processes made, so they are not overwritten
+        self.reload_if_changed()
+        
         if 'settings' not in self.config:
             self.config['settings'] = {}
         
         self.config['settings'][key] = value
         self.save_config()
+        self._notify('settings', {'action': 'set', 'key': key})
     
     def add_blacklist_term(self, term, category="Other"):
         """
@@ -237,6 +344,9 @@ class ConfigManager:
             term (str): Term to add
             category (str, optional): Category for the term. Defaults to "Other".
         """
+        # Start from changes other processes made, so they are not overwritten
+        self.reload_if_changed()
+        
         if 'blacklist' not in self.config:
             self.config['blacklist'] = []
         
@@ -247,6 +357,7 @@ class ConfigManager:
             self.config['blacklist'].append(term)
             self.config['blacklist_categories'][term] = category
             self.save_config()
+            self._notify('blacklist', {'action': 'added', 'term': term})
     
     def remove_blacklist_term(self, term):
         """
@@ -255,6 +366,9 @@ class ConfigManager:
         Args:
             term (str): Term to remove
         """
+        # Start from changes other processes made, so they are not overwritten
+        self.reload_if_changed()
+        
         if 'blacklist' in self.config and term in self.config['blacklist']:
             self.config['blacklist'].remove(term)
             
@@ -263,6 +377,7 @@ class ConfigManager:
                 del self.config['blacklist_categories'][term]
                 
             self.save_config()
+            self._notify('blacklist', {'action': 'removed', 'term': term})
     
     def add_whitelist_term(self, term):
         """
@@ -271,12 +386,16 @@ class ConfigManager:
         Args:
             term (str): Term to add
         """
+        # Start from changes other processes made, so they are not overwritten
+        self.reload_if_changed()
+        
         if 'whitelist' not in self.config:
             self.config['whitelist'] = []
         
         if term not in self.config['whitelist']:
             self.config['whitelist'].append(term)
             self.save_config()
+            self._notify('whitelist', {'action': 'added', 'term': term})
     
     def remove_whitelist_term(self, term):
         """
@@ -285,9 +404,13 @@ class ConfigManager:
         Args:
             term (str): Term to remove
         """
+        # Start from changes other processes made, so they are not overwritten
+        self.reload_if_changed()
+        
         if 'whitelist' in self.config and term in self.config['whitelist']:
             self.config['whitelist'].remove(term)
             self.save_config()
+            self._notify('whitelist', {'action': 'removed', 'term': term})
     
     def reset_to_defaults(self):
         """Reset configuration to defaults"""
@@ -297,6 +420,7 @@ class ConfigManager:
                     self.config = json.load(f)
                 self.save_config()
                 logging.info("Reset configuration to defaults")
+                self._notify('all', {'action': 'reset'})
                 return True
             except Exception as e:
                 logging.error(f"Error resetting to defaults: {e}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Server Events
+-------------------------
+This module fans server events out to the clients connected over WebSocket:
+scan progress, deletion progress and ruleset changes. Events can be published
+from any thread; every subscriber has a bounded queue, and a subscriber that
+falls behind loses its oldest events instead of holding up the publisher.
+Events about the work of one owner only reach the subscribers that claimed
+that owner.
+"""
+
+import asyncio
+import logging
+import threading
+
+# Events queued per subscriber before the oldest are dropped
+DEFAULT_MAX_QUEUED = 256
+
+class EventHub:
+    """Thread-safe publisher of JSON-RPC notifications to subscribed connections"""
+    
+    def __init__(self, max_queued=DEFAULT_MAX_QUEUED):
+        """
+        Initialize the hub
+        
+        Args:
+            max_queued (int, optional): Events queued per subscriber
+        """
+        self.max_queued = max_queued
+        self.lock = threading.Lock()
+        self.subscribers = {}  # queue -> (event loop the queue belongs to, claimed owners)
+        self.counters = {'published': 0, 'dropped': 0}
+    
+    def subscribe(self):
+        """
+        Subscribe to events; must be called from the subscriber's event loop
+        
+        Returns:
+            asyncio.Queue: Queue the events are delivered to as notification dicts
+        """
+        queue = asyncio.Queue(maxsize=self.max_queued)
+        with self.lock:
+            self.subscribers[queue] = (asyncio.get_running_loop(), set())
+        return queue
+    
+    def claim(self, queue, owner):
+        """
+        Deliver the events of an owner to a queue from now on
+        
+        Args:
+            queue (asyncio.Queue): Queue returned by subscribe
+            owner (str): Owner key, as passed to publish
+        """
+        with self.lock:
+            if queue in self.subscribers:
+                self.subscribers[queue][1].add(owner)
+    
+    def unsubscribe(self, queue):
+        """
+        Stop delivering events to a queue
+        
+        Args:
+            queue (asyncio.Queue): Queue returned by subscribe
+        """
+        with self.lock:
+            self.subscribers.pop(queue, None)
+    
+    def _deliver(self, queue, notification):
+        """Queue a notification, dropping the oldest one if the queue is full"""
+        if queue.full():
+            queue.get_nowait()
+            with self.lock:
+                self.counters['dropped'] += 1
+        queue.put_nowait(notification)
+    
+    def publish(self, event, params, owners=None):
+        """
+        Send an event to the subscribers allowed to see it
+        
+        Args:
+            event (str): Event name, sent as the notification method
+            params (dict): Event data, sent as the notification params
+            owners (list, optional): Owner keys of the event; only subscribers that
+                claimed one of them get it. None sends it to every subscriber
+        """
+        notification = {'jsonrpc': '2.0', 'method': event, 'params': params}
+        with self.lock:
+            subscribers = [
+                (queue, loop) for queue, (loop, claimed) in self.subscribers.items()
+                if owners is None or not claimed.isdisjoint(owners)
+            ]
+            self.counters['published'] += 1
+        
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, notification)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(queue)
+            except Exception as e:
+                logging.error(f"Error publishing {event} event: {e}")
+    
+    def get_stats(self):
+        """
+        Get the hub counters
+        
+        Returns:
+            dict: Subscribers, published and dropped events
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            stats['subscribers'] = len(self.subscribers)
+        return stats
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Moderation Queue
+----------------------------
+This module keeps a durable queue of comment deletions in SQLite. A client can
+enqueue thousands of deletions and return immediately; the server works through
+them in batches, retries failures with exponential backoff and picks up where it
+left off after a restart. Each comment is queued at most once, so enqueueing the
+same comments again is safe.
+
+Credentials are kept in memory only. Deletions queued before a restart resume
+as soon as the client supplies the same credentials again.
+"""
+
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+
+# Comments sent to the API per batch
+DEFAULT_BATCH_SIZE = 50
+
+# Attempts before a deletion is given up
+MAX_ATTEMPTS = 8
+
+# Backoff of failed deletions, doubling per attempt
+BASE_RETRY_SECONDS = 30
+MAX_RETRY_SECONDS = 60 * 60
+
+# Delay of deletions after the quota ran out
+QUOTA_RETRY_SECONDS = 60 * 60
+
+# Deletions in progress for longer than this were left by a stopped server or
+# worker, and are taken again; a batch normally finishes within a minute
+LEASE_SECONDS = 15 * 60
+
+# Finished deletions are kept this long for status queries
+MAX_DONE_AGE_SECONDS = 7 * 24 * 60 * 60
+
+# How often the queue is checked for due deletions
+TICK_SECONDS = 1
+
+# Messages of results that will not change when retried
+PERMANENT_ERRORS = (
+    'Permission denied',
+    'Bad request',
+    'Invalid comment ID format',
+    'Cannot mark as spam',
+    'Failed to mark comment as spam'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moderation_queue (
+    comment_id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    channel_id TEXT,
+    owner TEXT NOT NULL,
+    status TEXT NOT NULL,
+    action_type TEXT,
+    success INTEGER,
+    message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moderation_queue_due ON moderation_queue (status, owner, next_attempt_at);
+"""
+
+def get_credentials_owner(credentials_json):
+    """
+    Get a stable, non-secret key identifying the owner of a credentials JSON string
+    
+    Args:
+        credentials_json (str): OAuth credentials as JSON string
+    
+    Returns:
+        str: Hash of the refresh token (or of the whole credentials if there is none)
+    """
+    credentials_data = json.loads(credentials_json)
+    secret = credentials_data.get('refresh_token') or credentials_json
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()[:16]
+
+class ModerationQueue:
+    """Durable, idempotent queue of comment deletions with retries"""
+    
+    def __init__(self, db_path, api_factory, batch_size=DEFAULT_BATCH_SIZE, on_processed=None):
+        """
+        Initialize the queue
+        
+        Args:
+            db_path (str): Path of the SQLite database
+            api_factory (callable): Returns a YouTubeAPI for a credentials JSON string
+            batch_size (int, optional): Comments sent to the API per batch
+            on_processed (callable, optional): Called with the state of every comment
+                of a batch and the owner of the batch after it was processed
+        """
+        self.db_path = db_path
+        self.api_factory = api_factory
+        self.batch_size = batch_size
+        self.on_processed = on_processed
+        self.lock = threading.Lock()
+        self.credentials = {}  # owner -> credentials JSON, never written to disk
+        self.random = random.Random()
+        
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.executescript(SCHEMA)
+            self.db.execute(
+                "DELETE FROM moderation_queue WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - MAX_DONE_AGE_SECONDS,)
+            )
+    
+    def register_credentials(self, credentials_json):
+        """
+        Remember the credentials of an owner so their queued deletions can run
+        
+        Args:
+            credentials_json (str): OAuth credentials as JSON string
+        
+        Returns:
+            str: Owner key of the credentials
+        """
+        owner = get_credentials_owner(credentials_json)
+        with self.lock:
+            self.credentials[owner] = credentials_json
+        return owner
+    
+    def enqueue(self, comments, credentials_json):
+        """
+        Queue comments for deletion
+        
+        Comments that are already queued or deleted are left as they are; comments
+        whose deletion failed for good are queued again.
+        
+        Args:
+            comments (list): List of {"comment_id": str, "thread_id": str, "channel_id": str}
+                objects; channel_id is optional
+            credentials_json (str): OAuth credentials as JSON string
+        
+        Returns:
+            dict: Number of comments queued and of duplicates that were skipped
+        """
+        owner = self.register_credentials(credentials_json)
+        now = time.time()
+        queued = 0
+        duplicates = 0
+        
+        with self.lock, self.db:
+            for item in comments:
+                comment_id = item.get('comment_id')
+                if not comment_id or not isinstance(comment_id, str):
+                    continue
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO moderation_queue "
+                    "(comment_id, thread_id, channel_id, owner, status, next_attempt_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, 'pending', ?, ?, ?)",
+                    (comment_id, item.get('thread_id'), item.get('channel_id'), owner, now, now, now)
+                )
+                if not cursor.rowcount:
+                    cursor = self.db.execute(
+                        "UPDATE moderation_queue SET status = 'pending', owner = ?, attempts = 0, "
+                        "next_attempt_at = ?, updated_at = ? WHERE comment_id = ? AND status = 'failed'",
+                        (owner, now, now, comment_id)
+                    )
+                if cursor.rowcount:
+                    queued += 1
+                else:
+                    duplicates += 1
+        
+        logging.info(f"Queued {queued} comments for deletion ({duplicates} already queued)")
+        return {'queued': queued, 'duplicates': duplicates}
+    
+    def _take_due_batch(self):
+        """
+        Mark the next due batch of an owner with known credentials as in progress
+        
+        A taken deletion is leased until LEASE_SECONDS from now, through its
+        next_attempt_at; deletions whose lease expired are due again, so the work
+        of a stopped server or worker is retried without touching running batches.
+        
+        Returns:
+            tuple: (credentials JSON, list of rows) or (None, []) if nothing is due
+        """
+        now = time.time()
+        with self.lock, self.db:
+            # Take the write lock first, so server workers sharing the database
+            # never pick the same rows
+            self.db.execute("BEGIN IMMEDIATE")
+            for owner, credentials_json in self.credentials.items():
+                rows = self.db.execute(
+                    "SELECT comment_id, thread_id, channel_id, attempts FROM moderation_queue "
+                    "WHERE status IN ('pending', 'in_progress') AND owner = ? AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (owner, now, self.batch_size)
+                ).fetchall()
+                if rows:
+                    self.db.executemany(
+                        "UPDATE moderation_queue SET status = 'in_progress', attempts = attempts + 1, "
+                        "next_attempt_at = ?, updated_at = ? WHERE comment_id = ?",
+                        [(now + LEASE_SECONDS, now, row['comment_id']) for row in rows]
+                    )
+                    return credentials_json, rows
+        return None, []
+    
+    def _get_retry_delay(self, attempts, message):
+        """Get the delay before the next attempt of a failed deletion"""
+        if 'quota' in (message or '').lower():
+            return QUOTA_RETRY_SECONDS
+        delay = min(MAX_RETRY_SECONDS, BASE_RETRY_SECONDS * 2 ** (attempts - 1))
+        return delay * self.random.uniform(0.8, 1.2)
+    
+    def process_due(self):
+        """
+        Delete the next due batch
+        
+        Returns:
+            int: Number of comments processed
+        """
+        credentials_json, rows = self._take_due_batch()
+        if not rows:
+            return 0
+        
+        try:
+            youtube_api = self.api_factory(credentials_json)
+            results = youtube_api.delete_comments(
+                [{'comment_id': row['comment_id'], 'thread_id': row['thread_id'], 'channel_id': row['channel_id']}
+                 for row in rows]
+            )
+        except Exception as e:
+            logging.error(f"Error processing moderation queue: {e}")
+            results = [
+                {'comment_id': row['comment_id'], 'action_type': 'none', 'success': False, 'message': f'Error: {str(e)}'}
+                for row in rows
+            ]
+        
+        results_by_id = {result['comment_id']: result for result in results}
+        now = time.time()
+        updates = []
+        for row in rows:
+            result = results_by_id.get(row['comment_id'], {'action_type': 'none', 'success': False,
+                                                            'message': 'Invalid comment ID format'})
+            message = result.get('message') or ''
+            status = 'done'
+            next_attempt_at = now
+            if not result['success']:
+                if message.startswith('Comment not found'):
+                    # Gone already, e.g. deleted by an attempt that was interrupted
+                    result = {'action_type': 'deleted', 'success': True, 'message': 'Comment already removed'}
+                elif message.startswith(PERMANENT_ERRORS) or row['attempts'] + 1 >= MAX_ATTEMPTS:
+                    status = 'failed'
+                else:
+                    status = 'pending'
+                    next_attempt_at = now + self._get_retry_delay(row['attempts'] + 1, message)
+            updates.append((status, result['action_type'], int(result['success']), result.get('message'),
+                            next_attempt_at, now, row['comment_id']))
+        
+        with self.lock, self.db:
+            self.db.executemany(
+                "UPDATE moderation_queue SET status = ?, action_type = ?, success = ?, message = ?, "
+                "next_attempt_at = ?, updated_at = ? WHERE comment_id = ?",
+                updates
+            )
+        
+        if self.on_processed:
+            try:
+                self.on_processed([
+                    {'comment_id': comment_id, 'status': status, 'action_type': action_type,
+                     'success': bool(success), 'message': message, 'next_attempt_at': next_attempt_at}
+                    for status, action_type, success, message, next_attempt_at, _, comment_id in updates
+                ], get_credentials_owner(credentials_json))
+            except Exception as e:
+                logging.error(f"Error reporting moderation queue progress: {e}")
+        return len(rows)
+    
+    def get_status(self, credentials_json, comment_ids=None):
+        """
+        Get the queue counters and, optionally, the state of given comments,
+        limited to the deletions of one owner
+        
+        Args:
+            credentials_json (str): OAuth credentials as JSON string of the owner
+            comment_ids (list, optional): Comment IDs to return the state of
+        
+        Returns:
+            dict: Counts per status, deletions waiting for credentials and, if
+                comment_ids is given, one item per comment; comments queued by
+                other owners are reported as unknown
+        """
+        owner = get_credentials_owner(credentials_json)
+        with self.lock:
+            counts = {'pending': 0, 'in_progress': 0, 'done': 0, 'failed': 0}
+            waiting_for_credentials = 0
+            for row in self.db.execute(
+                "SELECT status, COUNT(*) AS count FROM moderation_queue WHERE owner = ? GROUP BY status", (owner,)
+            ):
+                counts[row['status']] = counts.get(row['status'], 0) + row['count']
+                if row['status'] == 'pending' and owner not in self.credentials:
+                    waiting_for_credentials += row['count']
+            
+            status = {'counts': counts, 'waiting_for_credentials': waiting_for_credentials}
+            if comment_ids:
+                items = {}
+                for start in range(0, len(comment_ids), 500):
+                    chunk = comment_ids[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    for row in self.db.execute(
+                        "SELECT comment_id, status, action_type, success, message, attempts, next_attempt_at "
+                        f"FROM moderation_queue WHERE comment_id IN ({placeholders}) AND owner = ?",
+                        chunk + [owner]
+                    ):
+                        item = dict(row)
+                        item['success'] = bool(item['success']) if item['success'] is not None else None
+                        items[row['comment_id']] = item
+                status['items'] = [
+                    items.get(comment_id, {'comment_id': comment_id, 'status': 'unknown'}) for comment_id in comment_ids
+                ]
+            return status
+    
+    async def run(self):
+        """Work through the queue in the background until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Keep going without a pause while batches are due
+                if await loop.run_in_executor(None, self.process_due):
+                    continue
+            except Exception as e:
+                logging.error(f"Error in moderation queue: {e}")
+            await asyncio.sleep(TICK_SECONDS)
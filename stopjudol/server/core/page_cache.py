@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Comment Page Cache
+------------------------------
+This module provides an on-disk cache of commentThreads.list pages. Each page is
+stored with its etag so a rescan can send If-None-Match and reuse the cached
+items when YouTube answers 304 Not Modified.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# Default size cap of the cache directory
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# Share of the size cap written before the directory is measured again
+RESCAN_FRACTION = 0.1
+
+class CommentPageCache:
+    """
+    Size-capped on-disk LRU cache of comment pages keyed by video, page token and format
+    
+    The page files are the only state: reads touch the file's modification time and
+    eviction removes the least recently touched files, so every worker process
+    sharing the directory sees the same recency without rewriting an index.
+    """
+    
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the page cache
+        
+        Args:
+            cache_dir (str): Directory the cached pages are stored in
+            max_bytes (int, optional): Maximum total size of the cached pages
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        # Bytes written since the directory was last measured, other workers write too
+        self.unmeasured_bytes = 0
+        self.total_bytes = self._measure()[0]
+    
+    def make_key(self, video_id, page_token, text_format, **params):
+        """
+        Build the cache key of a page
+        
+        Args:
+            video_id (str): YouTube video ID
+            page_token (str): Page token, None for the first page
+            text_format (str): Text format of the comments (html or plainText)
+            **params: Other request parameters that change the page contents
+        
+        Returns:
+            str: Cache key
+        """
+        parts = [video_id, page_token or '', text_format]
+        parts.extend(f"{name}={params[name]}" for name in sorted(params))
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    
+    def _page_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _measure(self):
+        """
+        List the cached pages
+        
+        Returns:
+            tuple: Total size in bytes and (last used, size, path) of every page
+        """
+        pages = []
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    pages.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logging.error(f"Error listing page cache: {e}")
+        return sum(page[1] for page in pages), pages
+    
+    def get(self, key):
+        """
+        Get a cached page
+        
+        Args:
+            key (str): Cache key from make_key
+        
+        Returns:
+            dict: {'etag': str, 'response': dict} or None if not cached
+        """
+        path = self._page_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cached page {key}: {e}")
+            self._remove(path)
+            return None
+        
+        # Mark the page as recently used without rewriting it
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+    
+    def put(self, key, etag, response):
+        """
+        Store a page, evicting the least recently used pages above the size cap
+        
+        Args:
+            key (str): Cache key from make_key
+            etag (str): Etag of the response
+            response (dict): API response
+        """
+        if not etag:
+            return
+        
+        data = json.dumps({'etag': etag, 'response': response})
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        
+        # Write to a temporary file first, so readers never see a partial page
+        path = self._page_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.error(f"Error writing cached page {key}: {e}")
+            self._remove(temp_path)
+            return
+        
+        with self.lock:
+            self.unmeasured_bytes += size
+            if (self.total_bytes + self.unmeasured_bytes <= self.max_bytes
+                    and self.unmeasured_bytes <= self.max_bytes * RESCAN_FRACTION):
+                return
+            self._evict()
+    
+    def _evict(self):
+        """Measure the directory and remove the least recently used pages above the cap (caller holds the lock)"""
+        total_bytes, pages = self._measure()
+        if total_bytes > self.max_bytes:
+            pages.sort()
+            for _, size, path in pages:
+                if total_bytes <= self.max_bytes:
+                    break
+                self._remove(path)
+                total_bytes -= size
+        self.total_bytes = total_bytes
+        self.unmeasured_bytes = 0
+    
+    def _remove(self, path):
+        """Remove a page file, ignoring pages another worker already removed"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
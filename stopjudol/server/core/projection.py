@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Partial Response Projection
+---------------------------------------
+This module defines the `fields` masks sent with YouTube Data API list calls so the
+API only returns the fields the analyzer and the client actually read.
+It also provides helpers to parse a mask and apply it to a response locally.
+"""
+
+# Fields of a comment snippet that are read by the analyzer and the client table
+COMMENT_SNIPPET_FIELDS = 'authorDisplayName,textDisplay,publishedAt'
+
+# Fields of a commentThreads.list response (etag is kept for conditional refetches);
+# channelId is the channel of the video, used to pick the moderation path on deletion
+COMMENT_THREAD_FIELDS = (
+    'etag,nextPageToken,'
+    'items(id,snippet(channelId,videoId,totalReplyCount,'
+    f'topLevelComment(id,snippet({COMMENT_SNIPPET_FIELDS}))))'
+)
+
+# Fields of a reply comment; parentId links it to its thread
+COMMENT_REPLY_FIELDS = f'id,snippet(parentId,{COMMENT_SNIPPET_FIELDS})'
+
+# Fields of a commentThreads.list(part='snippet,replies') response
+COMMENT_THREAD_WITH_REPLIES_FIELDS = (
+    'etag,nextPageToken,'
+    'items(id,snippet(channelId,videoId,totalReplyCount,'
+    f'topLevelComment(id,snippet({COMMENT_SNIPPET_FIELDS}))),'
+    f'replies(comments({COMMENT_REPLY_FIELDS})))'
+)
+
+# Fields of a comments.list(parentId=...) response
+COMMENT_LIST_FIELDS = f'nextPageToken,items({COMMENT_REPLY_FIELDS})'
+
+# Fields of a videos.list response used by get_video_info
+VIDEO_FIELDS = 'items(id,snippet(title,channelId,publishedAt),statistics(commentCount))'
+
+# Fields of a videos.list(part='status') response used by is_public_video
+VIDEO_STATUS_FIELDS = 'items(status(privacyStatus))'
+
+# Fields of a channels.list response used by get_channel_name
+CHANNEL_FIELDS = 'items(id,snippet(title))'
+
+# Fields of a channels.list(part='contentDetails') response used to find the uploads playlist
+CHANNEL_UPLOADS_FIELDS = 'items(contentDetails(relatedPlaylists(uploads)))'
+
+# Fields of a playlistItems.list response used to expand a playlist into video IDs
+PLAYLIST_ITEM_FIELDS = 'nextPageToken,items(contentDetails(videoId))'
+
+def parse_fields_mask(mask):
+    """
+    Parse a `fields` mask into a nested selection tree
+    
+    Args:
+        mask (str): Mask such as 'nextPageToken,items(id,snippet(title))'
+    
+    Returns:
+        dict: Field name mapped to a sub-tree, or None when the whole field is selected
+    """
+    def parse(pos):
+        tree = {}
+        name = ''
+        while pos < len(mask):
+            char = mask[pos]
+            if char == '(':
+                tree[name.strip()], pos = parse(pos + 1)
+                name = ''
+            elif char == ')':
+                if name.strip():
+                    tree[name.strip()] = None
+                return tree, pos
+            elif char == ',':
+                if name.strip():
+                    tree[name.strip()] = None
+                name = ''
+            else:
+                name += char
+            pos += 1
+        if name.strip():
+            tree[name.strip()] = None
+        return tree, pos
+    
+    tree, _ = parse(0)
+    return tree
+
+def apply_fields_mask(payload, mask):
+    """
+    Apply a `fields` mask to an API response the same way the API does
+    
+    Args:
+        payload: Decoded JSON response
+        mask (str or dict): Mask string or a tree from parse_fields_mask
+    
+    Returns:
+        Projected copy of the payload
+    """
+    tree = parse_fields_mask(mask) if isinstance(mask, str) else mask
+    
+    if isinstance(payload, list):
+        return [apply_fields_mask(item, tree) for item in payload]
+    if not isinstance(payload, dict):
+        return payload
+    
+    projected = {}
+    for name, sub_tree in tree.items():
+        if name in payload:
+            value = payload[name]
+            projected[name] = value if sub_tree is None else apply_fields_mask(value, sub_tree)
+    return projected
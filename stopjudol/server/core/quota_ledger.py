@@ -0,0 +1,408 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - YouTube API Quota Ledger
+------------------------------------
+This module keeps track of the YouTube Data API quota units spent by the server.
+Usage is persisted per day and per Google Cloud project, and the day rolls over
+at midnight Pacific time, which is when YouTube resets the daily quota.
+"""
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where the server runs as a single process
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
+    except ZoneInfoNotFoundError:
+        # Windows without the tzdata package; use Pacific standard time
+        PACIFIC_TZ = timezone(timedelta(hours=-8))
+except ImportError:
+    PACIFIC_TZ = timezone(timedelta(hours=-8))
+
+# Unit cost of every YouTube Data API method we call
+# See https://developers.google.com/youtube/v3/determine_quota_cost
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'commentThreads.list': 1,
+    'comments.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+    'comments.delete': 50,
+    'comments.markAsSpam': 50,
+    'comments.setModerationStatus': 50,
+}
+
+# Default daily quota of a Google Cloud project
+DEFAULT_DAILY_LIMIT = 10000
+
+# Number of days of history kept in the ledger file
+HISTORY_DAYS = 7
+
+# Recorded usage is written to the ledger file by run() every this many seconds,
+# or sooner once this many units are pending, so other server processes see it
+# with at most this much delay
+FLUSH_SECONDS = 5
+FLUSH_UNITS = 500
+
+def pacific_date(now=None):
+    """
+    Get the current quota day
+    
+    Args:
+        now (datetime, optional): Timezone-aware time to convert. Defaults to now.
+    
+    Returns:
+        str: Date in Pacific time as YYYY-MM-DD
+    """
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(PACIFIC_TZ).strftime('%Y-%m-%d')
+
+def get_method_cost(api_method):
+    """
+    Get the quota cost of a YouTube API method
+    
+    Args:
+        api_method (str): Method name, e.g. 'commentThreads.list'
+    
+    Returns:
+        int: Quota units charged per call
+    """
+    return QUOTA_COSTS.get(api_method, 1)
+
+class QuotaLedger:
+    """Persistent record of YouTube API quota usage per day and project"""
+    
+    def __init__(self, config_manager, ledger_path=None):
+        """
+        Initialize the quota ledger
+        
+        Args:
+            config_manager: ConfigManager instance used for settings and paths
+            ledger_path (str, optional): Path to the ledger file. If None, stored in
+                the user config directory.
+        """
+        self.config_manager = config_manager
+        self.ledger_path = ledger_path or os.path.join(config_manager.user_config_dir, 'quota_ledger.json')
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.ledger_stamp = None  # Inode and modification time of the file last read or written
+        self.ledger = self.load_ledger()
+        
+        # Usage recorded since the last flush, keyed by (date, project); usage being
+        # flushed stays visible until the ledger read back from disk replaces it
+        self.pending = {}
+        self.flushing = {}
+        self.pending_units = 0
+        self.wakeup = None  # (event loop, asyncio.Event) of run(), set to flush early
+    
+    def _get_ledger_stamp(self):
+        """Get the inode and modification time of the ledger file"""
+        try:
+            stat = os.stat(self.ledger_path)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            return None
+    
+    def _read_ledger(self):
+        """
+        Read the ledger file
+        
+        Returns:
+            tuple: (usage keyed by date, then by project; stamp of the file read)
+        """
+        if os.path.exists(self.ledger_path):
+            try:
+                stamp = self._get_ledger_stamp()
+                with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                    return json.load(f), stamp
+            except Exception as e:
+                logging.error(f"Error loading quota ledger: {e}")
+        return {}, None
+    
+    def load_ledger(self):
+        """
+        Load the ledger from disk
+        
+        Returns:
+            dict: Usage keyed by date, then by project
+        """
+        ledger, stamp = self._read_ledger()
+        if stamp is not None:
+            self.ledger_stamp = stamp
+        return ledger
+    
+    def _refresh(self):
+        """Read the ledger again if another server process saved it (caller holds the lock)"""
+        if self._get_ledger_stamp() != self.ledger_stamp and os.path.exists(self.ledger_path):
+            self.ledger = self.load_ledger()
+    
+    def save_ledger(self, ledger=None):
+        """
+        Save the ledger to disk, dropping days older than HISTORY_DAYS
+        
+        Args:
+            ledger (dict, optional): Ledger to save, defaults to the one in memory
+        
+        Returns:
+            tuple: Stamp of the saved file, or None if it could not be saved
+        """
+        ledger = self.ledger if ledger is None else ledger
+        for day in sorted(ledger)[:-HISTORY_DAYS]:
+            del ledger[day]
+        
+        try:
+            # Moved into place, so other processes never read a half-written file
+            temp_path = f"{self.ledger_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(ledger, f, indent=4)
+                f.flush()
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, self.ledger_path)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except Exception as e:
+            logging.error(f"Error saving quota ledger: {e}")
+            return None
+    
+    def flush(self):
+        """
+        Write the usage recorded since the last flush to the ledger file
+        
+        The file is locked only while it is read, updated and saved; server
+        workers in other processes wait for the lock, and their usage is read
+        before this one is added, so none is lost.
+        """
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self.flushing = pending
+                self.pending_units = 0
+            if not pending:
+                return
+            
+            with open(self.ledger_path + '.lock', 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                ledger, _ = self._read_ledger()
+                for (day, project), usage in pending.items():
+                    entry = ledger.setdefault(day, {}).setdefault(
+                        project, {'units_used': 0, 'by_method': {}, 'exhausted': False}
+                    )
+                    entry['units_used'] += usage['units_used']
+                    for api_method, units in usage['by_method'].items():
+                        entry['by_method'][api_method] = entry['by_method'].get(api_method, 0) + units
+                    entry['exhausted'] = entry['exhausted'] or usage['exhausted']
+                stamp = self.save_ledger(ledger)
+            
+            with self.lock:
+                if stamp is None:
+                    # Keep the usage in memory and try again on the next flush
+                    self._merge_pending(pending)
+                else:
+                    self.ledger = ledger
+                    self.ledger_stamp = stamp
+                self.flushing = {}
+    
+    def _merge_pending(self, usage_by_key):
+        """Add usage that could not be flushed back to the pending usage (caller holds the lock)"""
+        for key, usage in usage_by_key.items():
+            pending = self._get_pending(*key)
+            pending['units_used'] += usage['units_used']
+            for api_method, units in usage['by_method'].items():
+                pending['by_method'][api_method] = pending['by_method'].get(api_method, 0) + units
+            pending['exhausted'] = pending['exhausted'] or usage['exhausted']
+    
+    def _get_pending(self, day, project):
+        """Get (and create if needed) the unflushed usage of a day and project (caller holds the lock)"""
+        return self.pending.setdefault((day, project), {'units_used': 0, 'by_method': {}, 'exhausted': False})
+    
+    def _get_usage(self, project):
+        """
+        Get today's usage of a project, saved and not yet flushed (caller holds the lock)
+        
+        Returns:
+            dict: units_used, by_method and exhausted
+        """
+        self._refresh()
+        day = pacific_date()
+        entry = self.ledger.get(day, {}).get(project, {})
+        usage = {
+            'units_used': entry.get('units_used', 0),
+            'by_method': dict(entry.get('by_method', {})),
+            'exhausted': entry.get('exhausted', False)
+        }
+        for unflushed in (self.flushing, self.pending):
+            extra = unflushed.get((day, project))
+            if extra:
+                usage['units_used'] += extra['units_used']
+                for api_method, units in extra['by_method'].items():
+                    usage['by_method'][api_method] = usage['by_method'].get(api_method, 0) + units
+                usage['exhausted'] = usage['exhausted'] or extra['exhausted']
+        return usage
+    
+    def _request_flush(self):
+        """Wake run() up to flush before FLUSH_SECONDS are over"""
+        wakeup = self.wakeup
+        if wakeup is not None:
+            try:
+                wakeup[0].call_soon_threadsafe(wakeup[1].set)
+            except RuntimeError:
+                # The loop of run() is closed
+                pass
+    
+    async def run(self):
+        """Flush recorded usage periodically until cancelled, then one last time"""
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        self.wakeup = (loop, wakeup)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                try:
+                    await loop.run_in_executor(None, self.flush)
+                except Exception as e:
+                    logging.error(f"Error flushing quota ledger: {e}")
+        finally:
+            self.wakeup = None
+            self.flush()
+    
+    def get_daily_limit(self):
+        """
+        Get the daily quota limit of a project
+        
+        Returns:
+            int: Daily quota units
+        """
+        return int(self.config_manager.get_setting('quota_daily_limit', DEFAULT_DAILY_LIMIT))
+    
+    def record(self, api_method, project='default', count=1):
+        """
+        Record YouTube API calls
+        
+        Usage is only kept in memory here; run() writes it to the ledger file every
+        FLUSH_SECONDS, or sooner once FLUSH_UNITS units are pending, so API calls
+        never wait for the disk.
+        
+        Args:
+            api_method (str): Method name, e.g. 'comments.delete'
+            project (str, optional): Project the calls were billed to
+            count (int, optional): Number of calls made
+        
+        Returns:
+            int: Quota units charged
+        """
+        units = get_method_cost(api_method) * count
+        with self.lock:
+            pending = self._get_pending(pacific_date(), project)
+            pending['units_used'] += units
+            pending['by_method'][api_method] = pending['by_method'].get(api_method, 0) + units
+            self.pending_units += units
+            due = self.pending_units >= FLUSH_UNITS
+        if due:
+            self._request_flush()
+        return units
+    
+    def mark_exhausted(self, project='default'):
+        """
+        Record that YouTube reported quotaExceeded for a project
+        
+        Args:
+            project (str, optional): Project that ran out of quota
+        """
+        with self.lock:
+            self._get_pending(pacific_date(), project)['exhausted'] = True
+        # Other server processes should stop spending right away
+        self._request_flush()
+    
+    def get_units_used(self, project='default'):
+        """
+        Get the units spent today
+        
+        Args:
+            project (str, optional): Project to check
+        
+        Returns:
+            int: Units used since the last Pacific midnight
+        """
+        with self.lock:
+            return self._get_usage(project)['units_used']
+    
+    def get_units_remaining(self, project='default'):
+        """
+        Get the units left today
+        
+        Args:
+            project (str, optional): Project to check
+        
+        Returns:
+            int: Units remaining, 0 if YouTube reported the quota as exhausted
+        """
+        with self.lock:
+            usage = self._get_usage(project)
+        if usage['exhausted']:
+            return 0
+        return max(self.get_daily_limit() - usage['units_used'], 0)
+    
+    def forecast(self, planned_pages=0, planned_deletions=0):
+        """
+        Estimate the cost of a planned scan or deletion batch
+        
+        Args:
+            planned_pages (int, optional): Comment pages to fetch
+            planned_deletions (int, optional): Comments to delete
+        
+        Returns:
+            dict: Estimated units for the scan, the deletions and in total
+        """
+        scan_units = planned_pages * get_method_cost('commentThreads.list')
+        deletion_units = planned_deletions * get_method_cost('comments.delete')
+        return {
+            'scan_units': scan_units,
+            'deletion_units': deletion_units,
+            'total_units': scan_units + deletion_units
+        }
+    
+    def get_status(self, project='default', planned_pages=0, planned_deletions=0):
+        """
+        Get the quota status of a project
+        
+        Args:
+            project (str, optional): Project to check
+            planned_pages (int, optional): Comment pages to include in the forecast
+            planned_deletions (int, optional): Deletions to include in the forecast
+        
+        Returns:
+            dict: Usage, remaining units and forecast for today
+        """
+        with self.lock:
+            entry = self._get_usage(project)
+        
+        remaining = self.get_units_remaining(project)
+        forecast = self.forecast(planned_pages, planned_deletions)
+        forecast['fits_budget'] = forecast['total_units'] <= remaining
+        
+        return {
+            'date': pacific_date(),
+            'project': project,
+            'daily_limit': self.get_daily_limit(),
+            'units_used': entry.get('units_used', 0),
+            'units_remaining': remaining,
+            'by_method': entry.get('by_method', {}),
+            'forecast': forecast
+        }
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - YouTube API Retry Policy
+------------------------------------
+This module classifies YouTube API errors by their structured reason, retries
+transient failures with exponential backoff and jitter, and trips a circuit
+breaker that fails fast while the API is degraded.
+"""
+
+import json
+import time
+import random
+import socket
+import logging
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Error reasons that are transient even though they come with a 403
+RETRYABLE_REASONS = {
+    'backendError',
+    'internalError',
+    'rateLimitExceeded',
+    'userRateLimitExceeded',
+    'serviceUnavailable',
+}
+
+# Error reasons that will not go away by retrying
+NON_RETRYABLE_REASONS = {
+    'quotaExceeded',
+    'dailyLimitExceeded',
+    'commentsDisabled',
+    'forbidden',
+    'insufficientPermissions',
+    'videoNotFound',
+    'commentNotFound',
+    'channelNotFound',
+    'playlistNotFound',
+    'authError',
+}
+
+# Error reasons that mean the daily quota is used up
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker rejects a call while the API is degraded"""
+
+def get_error_status(error):
+    """
+    Get the HTTP status of an API error
+    
+    Args:
+        error (Exception): Error raised by an API call
+    
+    Returns:
+        int: HTTP status, or None if the error is not an HttpError
+    """
+    if isinstance(error, HttpError):
+        return error.resp.status
+    return None
+
+def get_error_reason(error):
+    """
+    Get the structured reason of an API error, e.g. 'quotaExceeded'
+    
+    Args:
+        error (Exception): Error raised by an API call
+    
+    Returns:
+        str: First reason in the error payload, or None if there is none
+    """
+    if not isinstance(error, HttpError):
+        return None
+    
+    try:
+        content = error.content.decode('utf-8') if isinstance(error.content, bytes) else error.content
+        details = json.loads(content).get('error', {})
+    except (ValueError, AttributeError):
+        return None
+    
+    if not isinstance(details, dict):
+        return None
+    errors = details.get('errors') or []
+    if errors and errors[0].get('reason'):
+        return errors[0]['reason']
+    return details.get('status')
+
+def is_quota_error(error):
+    """
+    Check whether an API error means the daily quota is exhausted
+    
+    Args:
+        error (Exception): Error raised by an API call
+    
+    Returns:
+        bool: True for quotaExceeded and dailyLimitExceeded
+    """
+    return get_error_reason(error) in QUOTA_REASONS
+
+def is_retryable(error):
+    """
+    Check whether an API call that raised an error is worth retrying
+    
+    Args:
+        error (Exception): Error raised by an API call
+    
+    Returns:
+        bool: True for transient server, rate limit and network errors
+    """
+    if isinstance(error, HttpError):
+        reason = get_error_reason(error)
+        if reason in NON_RETRYABLE_REASONS:
+            return False
+        if reason in RETRYABLE_REASONS:
+            return True
+        return get_error_status(error) in RETRYABLE_STATUS_CODES
+    
+    return isinstance(error, (socket.timeout, ConnectionError, httplib2.HttpLib2Error))
+
+class CircuitBreaker:
+    """Circuit breaker that opens after repeated transient failures"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize the circuit breaker
+        
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the circuit
+            reset_timeout (float, optional): Seconds before a trial call is let through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self.lock = threading.Lock()
+    
+    def before_call(self):
+        """
+        Check whether a call may go through
+        
+        While half open, a single trial call is let through and the other calls are
+        rejected until its outcome is recorded. A trial call whose outcome is never
+        recorded is given up after reset_timeout, and the next call becomes the trial.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open with a trial call running
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError("YouTube API is temporarily unavailable. Please try again later.")
+            elif self.state == self.HALF_OPEN:
+                if now - self.probe_started_at < self.reset_timeout:
+                    self.rejected_calls += 1
+                    raise CircuitOpenError("YouTube API is temporarily unavailable. Please try again later.")
+            else:
+                return
+            # Let a trial call through
+            self.state = self.HALF_OPEN
+            self.probe_started_at = now
+    
+    def record_success(self):
+        """Record a call that reached a healthy API"""
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+    
+    def record_failure(self):
+        """Record a call that failed with a transient error"""
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logging.warning("YouTube API circuit breaker opened")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def get_stats(self):
+        """
+        Get the breaker counters
+        
+        Returns:
+            dict: State and counters of the breaker
+        """
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected_calls
+            }
+
+class RetryPolicy:
+    """Retry policy with exponential backoff, full jitter and a circuit breaker"""
+    
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, breaker=None):
+        """
+        Initialize the retry policy
+        
+        Args:
+            max_attempts (int, optional): Attempts per call, including the first one
+            base_delay (float, optional): Backoff before the first retry, in seconds
+            max_delay (float, optional): Upper bound of the backoff, in seconds
+            breaker (CircuitBreaker, optional): Breaker shared by every call
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.lock = threading.Lock()
+        self.counters = {'calls': 0, 'retries': 0, 'gave_up': 0, 'non_retryable': 0}
+    
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+    
+    def get_delay(self, attempt):
+        """
+        Get the backoff before a retry
+        
+        Args:
+            attempt (int): Number of attempts made so far (1 for the first retry)
+        
+        Returns:
+            float: Seconds to wait, chosen uniformly up to the exponential bound
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+    
+    def record_outcome(self, error):
+        """
+        Feed the outcome of a call into the circuit breaker
+        
+        Args:
+            error (Exception): Error raised by the call, or None on success
+        """
+        if error is None or not is_retryable(error):
+            # The API answered, so it is healthy even if the request was rejected
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+    
+    def call(self, func):
+        """
+        Call a function, retrying transient YouTube API errors
+        
+        Args:
+            func (callable): Function performing one API call
+        
+        Returns:
+            The return value of func
+        
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            Exception: The last error if it is not retryable or attempts ran out
+        """
+        self._count('calls')
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                self.record_outcome(e)
+                if not is_retryable(e):
+                    self._count('non_retryable')
+                    raise
+                if attempt >= self.max_attempts:
+                    self._count('gave_up')
+                    logging.error(f"Giving up after {attempt} attempts: {e}")
+                    raise
+                
+                delay = self.get_delay(attempt)
+                logging.warning(f"Transient YouTube API error ({get_error_reason(e) or e}), retrying in {delay:.1f}s")
+                self._count('retries')
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self.record_outcome(None)
+                return result
+    
+    def get_stats(self):
+        """
+        Get the retry and breaker counters for monitoring
+        
+        Returns:
+            dict: Retry counters and breaker state
+        """
+        with self.lock:
+            stats = dict(self.counters)
+        stats['breaker'] = self.breaker.get_stats()
+        return stats
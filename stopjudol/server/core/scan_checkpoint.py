@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Scan Checkpoints
+----------------------------
+This module persists the progress of comment scans so a scan that fails part-way
+(quota, server errors, client timeouts) can resume from the last fetched page.
+Each scan is stored as an append-only JSON lines file with one record per page.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# Page tokens stop being valid after a while, so old checkpoints are discarded
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+class ScanCheckpointStore:
+    """On-disk store of page-token checkpoints and partial results per scan"""
+    
+    def __init__(self, checkpoint_dir, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        """
+        Initialize the checkpoint store
+        
+        Args:
+            checkpoint_dir (str): Directory the checkpoints are stored in
+            max_age_seconds (int, optional): Age after which a checkpoint is discarded
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.max_age_seconds = max_age_seconds
+        self.lock = threading.Lock()
+        
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.cleanup()
+    
+    def _path(self, video_id, scan_id):
+        key = hashlib.sha1(f"{video_id}|{scan_id}".encode('utf-8')).hexdigest()
+        return os.path.join(self.checkpoint_dir, f"{key}.jsonl")
+    
+    def load(self, video_id, scan_id):
+        """
+        Load the checkpoint of a scan
+        
+        Args:
+            video_id (str): YouTube video ID
+            scan_id (str): Scan ID chosen by the client
+        
+        Returns:
+            dict: {'next_page_token', 'pages_fetched', 'items'} or None if there is
+                no usable checkpoint
+        """
+        path = self._path(video_id, scan_id)
+        with self.lock:
+            if not os.path.exists(path):
+                return None
+            
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                os.remove(path)
+                return None
+            
+            checkpoint = {'next_page_token': None, 'pages_fetched': 0, 'items': []}
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = f.readlines()
+                
+                for count, line in enumerate(lines):
+                    try:
+                        page = json.loads(line)
+                    except ValueError:
+                        # A partially written last page; drop it so new pages append cleanly
+                        with open(path, 'w', encoding='utf-8') as f:
+                            f.writelines(lines[:count])
+                        break
+                    checkpoint['items'].extend(page['items'])
+                    checkpoint['next_page_token'] = page['next_page_token']
+                    checkpoint['pages_fetched'] = page['page']
+            except Exception as e:
+                logging.error(f"Error loading scan checkpoint: {e}")
+                return None
+            
+            return checkpoint if checkpoint['pages_fetched'] else None
+    
+    def save_page(self, video_id, scan_id, page, items, next_page_token):
+        """
+        Append a fetched page to the checkpoint of a scan
+        
+        Args:
+            video_id (str): YouTube video ID
+            scan_id (str): Scan ID chosen by the client
+            page (int): Number of pages fetched so far, including this one
+            items (list): Items of this page
+            next_page_token (str): Token of the next page to fetch
+        """
+        record = json.dumps({'page': page, 'next_page_token': next_page_token, 'items': items})
+        with self.lock:
+            try:
+                with open(self._path(video_id, scan_id), 'a', encoding='utf-8') as f:
+                    f.write(record + '\n')
+            except Exception as e:
+                logging.error(f"Error saving scan checkpoint: {e}")
+    
+    def delete(self, video_id, scan_id):
+        """
+        Delete the checkpoint of a finished scan
+        
+        Args:
+            video_id (str): YouTube video ID
+            scan_id (str): Scan ID chosen by the client
+        """
+        with self.lock:
+            try:
+                os.remove(self._path(video_id, scan_id))
+            except OSError:
+                pass
+    
+    def cleanup(self):
+        """Remove checkpoints older than max_age_seconds"""
+        now = time.time()
+        with self.lock:
+            for name in os.listdir(self.checkpoint_dir):
+                path = os.path.join(self.checkpoint_dir, name)
+                try:
+                    if now - os.path.getmtime(path) > self.max_age_seconds:
+                        os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Scan Jobs
+---------------------
+This module runs comment scans as background jobs. Starting a job returns its
+ID right away; the client then polls the job for the pages fetched and the
+comments analyzed and flagged so far, pages through the flagged comments and
+can cancel the job. No HTTP request stays open for the length of a scan, so
+large videos no longer run into the client's timeout. Multi-video scans run
+as jobs too, reporting their progress per video.
+
+Jobs are kept in memory and forgotten a while after they finish.
+"""
+
+import math
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of jobs running at the same time
+DEFAULT_CONCURRENCY = 4
+
+# Finished jobs are kept this long for status and result queries
+DEFAULT_MAX_AGE_SECONDS = 60 * 60
+
+# Comment threads per page, used to estimate the pages of a scan
+COMMENTS_PER_PAGE = 100
+
+# Most flagged comments returned per get_results call
+MAX_RESULTS_PER_PAGE = 500
+
+# Job states
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
+
+def estimate_pages(youtube_api, video_id, max_pages):
+    """
+    Estimate the pages a scan fetches from the comment count of its video
+    
+    Args:
+        youtube_api (YouTubeAPI): API wrapper used for the scan
+        video_id (str): YouTube video ID
+        max_pages (int): Most comment pages the scan fetches
+    
+    Returns:
+        tuple: (comment count or None if unknown, expected pages); without a
+            comment count, max_pages is expected
+    """
+    try:
+        video = youtube_api.get_video_info(video_id)
+        comment_count = int(((video or {}).get('statistics') or {}).get('commentCount'))
+    except Exception:
+        return None, max_pages
+    return comment_count, min(max_pages, max(1, math.ceil(comment_count / COMMENTS_PER_PAGE)))
+
+class ScanJob:
+    """State and results of one background scan"""
+    
+    def __init__(self, video_id, max_pages, id_prefix='', video_ids=None, credentials_json=None):
+        """
+        Initialize the job
+        
+        Args:
+            video_id (str): YouTube video ID, None for a multi-video job
+            max_pages (int): Most comment pages the scan fetches
+            id_prefix (str, optional): Prefix of the job ID
+            video_ids (list, optional): Videos of a multi-video job
+            credentials_json (str, optional): OAuth credentials the job runs with,
+                never part of its progress
+        """
+        self.job_id = id_prefix + uuid.uuid4().hex
+        self.credentials_json = credentials_json
+        self.video_id = video_id
+        self.video_ids = video_ids
+        self.videos = []  # Progress of every finished video of a multi-video job
+        self.max_pages = max_pages
+        self.status = STATUS_QUEUED
+        self.pages_fetched = 0
+        self.pages_expected = max_pages
+        self.comments_expected = None
+        self.comments_fetched = 0
+        self.comments_analyzed = 0
+        self.flagged = []
+        self.error = None
+        self.cancel_requested = False
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at = None
+    
+    def to_dict(self):
+        """
+        Get the progress of the job
+        
+        Returns:
+            dict: Job ID, status, counters and error
+        """
+        status = {
+            'job_id': self.job_id,
+            'video_id': self.video_id,
+            'status': self.status,
+            'pages_fetched': self.pages_fetched,
+            'max_pages': self.max_pages,
+            'pages_expected': self.pages_expected,
+            'comments_expected': self.comments_expected,
+            'comments_fetched': self.comments_fetched,
+            'comments_analyzed': self.comments_analyzed,
+            'flagged_count': len(self.flagged),
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at
+        }
+        if self.video_ids is not None:
+            status['videos_expected'] = len(self.video_ids)
+            status['videos_done'] = len(self.videos)
+            status['videos_failed'] = sum(1 for video in self.videos if video['status'] == 'failed')
+            status['videos'] = list(self.videos)
+        return status
+
+class ScanJobManager:
+    """Runs scans in a thread pool and keeps their progress for polling"""
+    
+    def __init__(self, api_factory, analyzer_factory, checkpoint_store=None, on_flagged=None, on_progress=None,
+                 concurrency=DEFAULT_CONCURRENCY, max_age_seconds=DEFAULT_MAX_AGE_SECONDS, id_prefix='',
+                 comment_cache=None):
+        """
+        Initialize the job manager
+        
+        Args:
+            api_factory (callable): Returns a YouTubeAPI for a credentials JSON string or None
+            analyzer_factory (callable): Returns a CommentAnalyzer
+            checkpoint_store (ScanCheckpointStore, optional): Lets a failed job resume
+                when it is started again with the same scan ID
+            on_flagged (callable, optional): Called with (video ID, flagged comments,
+                credentials JSON) when a job completes
+            on_progress (callable, optional): Called with the progress of a job and
+                the credentials JSON it runs with after every page and when it finishes
+            concurrency (int, optional): Number of jobs running at the same time
+            max_age_seconds (int, optional): Time finished jobs are kept
+            id_prefix (str, optional): Prefix of the job IDs, naming the server
+                worker that runs them
+            comment_cache (SharedCommentCache, optional): Shares the comments of
+                public videos between jobs, so concurrent and repeated scans of a
+                video fetch it once
+        """
+        self.api_factory = api_factory
+        self.analyzer_factory = analyzer_factory
+        self.checkpoint_store = checkpoint_store
+        self.on_flagged = on_flagged
+        self.on_progress = on_progress
+        self.max_age_seconds = max_age_seconds
+        self.id_prefix = id_prefix
+        self.comment_cache = comment_cache
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='scan-job')
+    
+    def start(self, video_id, credentials_json=None, scan_id=None, include_replies=False, max_pages=10):
+        """
+        Start scanning the comments of a video in the background
+        
+        Args:
+            video_id (str): YouTube video ID
+            credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; reusing the ID of a failed job resumes
+                from its last fetched page
+            include_replies (bool, optional): Also scan replies
+            max_pages (int, optional): Most comment pages to fetch
+        
+        Returns:
+            dict: Progress of the new job
+        """
+        job = ScanJob(video_id, max_pages, self.id_prefix, credentials_json=credentials_json)
+        with self.lock:
+            self._cleanup()
+            self.jobs[job.job_id] = job
+            status = job.to_dict()
+        
+        self.executor.submit(self._run, job, credentials_json, scan_id, include_replies)
+        logging.info(f"Started scan job {job.job_id} for video {video_id}")
+        return status
+    
+    def _run(self, job, credentials_json, scan_id, include_replies):
+        """Run a job in a worker thread"""
+        with self.lock:
+            if job.cancel_requested:
+                return
+            job.status = STATUS_RUNNING
+            job.updated_at = time.time()
+        
+        try:
+            youtube_api = self.api_factory(credentials_json)
+            analyzer = self.analyzer_factory()
+            comments_expected, pages_expected = estimate_pages(youtube_api, job.video_id, job.max_pages)
+            with self.lock:
+                job.comments_expected = comments_expected
+                job.pages_expected = pages_expected
+            
+            def on_page(pages_fetched, items):
+                # Analyzed as copies, since the items may be shared through the comment cache
+                flagged = analyzer.analyze_comments_batch([dict(item) for item in items])
+                with self.lock:
+                    job.pages_fetched = pages_fetched
+                    job.comments_fetched += len(items)
+                    job.comments_analyzed += len(items)
+                    job.flagged.extend(flagged)
+                    job.updated_at = time.time()
+                    status = job.to_dict()
+                self._report(status, job.credentials_json)
+                return not job.cancel_requested
+            
+            def fetch():
+                return youtube_api.get_all_comments(
+                    job.video_id, max_pages=job.max_pages, checkpoint_store=self.checkpoint_store,
+                    scan_id=scan_id, include_replies=include_replies, on_page=on_page
+                )
+            
+            if self.comment_cache is None:
+                fetch()
+            else:
+                fetched = []
+                def fetch_shared():
+                    fetched.append(True)
+                    comments = fetch()
+                    # Cancelled scans stopped early, and only public videos look the same to every reader
+                    return comments, not job.cancel_requested and youtube_api.is_public_video(job.video_id)
+                
+                comments = self.comment_cache.get_or_fetch((job.video_id, include_replies, job.max_pages), fetch_shared)
+                if not fetched:
+                    # Fetched by another job; its pages are analyzed as if this job fetched them
+                    for start in range(0, len(comments), COMMENTS_PER_PAGE):
+                        if not on_page(start // COMMENTS_PER_PAGE + 1, comments[start:start + COMMENTS_PER_PAGE]):
+                            break
+            
+            with self.lock:
+                job.status = STATUS_CANCELLED if job.cancel_requested else STATUS_COMPLETED
+            
+            if job.status == STATUS_COMPLETED and self.on_flagged and job.flagged:
+                self.on_flagged(job.video_id, list(job.flagged), credentials_json)
+        except Exception as e:
+            logging.error(f"Error in scan job {job.job_id}: {e}")
+            with self.lock:
+                job.status = STATUS_FAILED
+                job.error = str(e)
+        finally:
+            with self.lock:
+                job.finished_at = job.updated_at = time.time()
+                status = job.to_dict()
+            self._report(status, job.credentials_json)
+            logging.info(f"Scan job {job.job_id} {job.status}: {job.comments_analyzed} comments analyzed, "
+                         f"{len(job.flagged)} flagged")
+    
+    def start_videos(self, video_ids, scheduler, credentials_json=None, scan_id=None):
+        """
+        Start scanning several videos in the background
+        
+        Args:
+            video_ids (list): YouTube video IDs
+            scheduler (ScanScheduler): Scheduler running the videos, usually on a
+                thread pool shared by every multi-video job
+            credentials_json (str, optional): OAuth credentials as JSON string
+            scan_id (str, optional): Scan ID; reusing the ID of a failed job resumes
+                every video from its last fetched page
+        
+        Returns:
+            dict: Progress of the new job
+        """
+        job = ScanJob(None, 0, self.id_prefix, video_ids=list(video_ids), credentials_json=credentials_json)
+        with self.lock:
+            self._cleanup()
+            self.jobs[job.job_id] = job
+            status = job.to_dict()
+        
+        self.executor.submit(self._run_videos, job, scheduler, credentials_json, scan_id)
+        logging.info(f"Started scan job {job.job_id} for {len(video_ids)} videos")
+        return status
+    
+    def _run_videos(self, job, scheduler, credentials_json, scan_id):
+        """Run a multi-video job in a worker thread"""
+        with self.lock:
+            if job.cancel_requested:
+                return
+            job.status = STATUS_RUNNING
+            job.updated_at = time.time()
+        
+        try:
+            def on_video(video_status, flagged):
+                with self.lock:
+                    job.videos.append(video_status)
+                    job.comments_fetched += video_status['comments']
+                    job.comments_analyzed += video_status['comments']
+                    job.flagged.extend(flagged)
+                    job.updated_at = time.time()
+                    status = job.to_dict()
+                self._report(status, job.credentials_json)
+            
+            scheduler.run(job.video_ids, scan_id, progress_callback=on_video,
+                          is_cancelled=lambda: job.cancel_requested)
+            
+            with self.lock:
+                job.status = STATUS_CANCELLED if job.cancel_requested else STATUS_COMPLETED
+            
+            if job.status == STATUS_COMPLETED and self.on_flagged and job.flagged:
+                self.on_flagged(None, list(job.flagged), credentials_json)
+        except Exception as e:
+            logging.error(f"Error in scan job {job.job_id}: {e}")
+            with self.lock:
+                job.status = STATUS_FAILED
+                job.error = str(e)
+        finally:
+            with self.lock:
+                job.finished_at = job.updated_at = time.time()
+                status = job.to_dict()
+            self._report(status, job.credentials_json)
+            logging.info(f"Scan job {job.job_id} {job.status}: {len(job.videos)} videos, "
+                         f"{job.comments_analyzed} comments analyzed, {len(job.flagged)} flagged")
+    
+    def _report(self, status, credentials_json):
+        """Pass the progress of a job to on_progress"""
+        if self.on_progress:
+            try:
+                self.on_progress(status, credentials_json)
+            except Exception as e:
+                logging.error(f"Error reporting scan job progress: {e}")
+    
+    def _cleanup(self):
+        """Forget finished jobs older than max_age_seconds; the lock must be held"""
+        cutoff = time.time() - self.max_age_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self.jobs[job_id]
+    
+    def get_status(self, job_id):
+        """
+        Get the progress of a job
+        
+        Args:
+            job_id (str): Job ID returned by start
+        
+        Returns:
+            dict: Progress of the job, or None if the job is unknown
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+    
+    def get_results(self, job_id, offset=0, limit=100):
+        """
+        Get a page of the comments a job flagged so far
+        
+        Args:
+            job_id (str): Job ID returned by start
+            offset (int, optional): Index of the first flagged comment to return
+            limit (int, optional): Most flagged comments to return
+        
+        Returns:
+            dict: Flagged comments, the offset of the next page (None once every
+                flagged comment of a finished job was returned) and the job status,
+                or None if the job is unknown
+        """
+        offset = max(0, int(offset))
+        limit = max(1, min(int(limit), MAX_RESULTS_PER_PAGE))
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            
+            items = job.flagged[offset:offset + limit]
+            next_offset = offset + len(items)
+            if job.status in FINISHED_STATUSES and next_offset >= len(job.flagged):
+                next_offset = None
+            return {
+                'job_id': job_id,
+                'status': job.status,
+                'items': items,
+                'offset': offset,
+                'next_offset': next_offset,
+                'total': len(job.flagged)
+            }
+    
+    def cancel(self, job_id):
+        """
+        Stop a job after the page it is fetching; what it flagged so far is kept
+        
+        Args:
+            job_id (str): Job ID returned by start
+        
+        Returns:
+            dict: Progress of the job, or None if the job is unknown
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return None
+            
+            cancelled_queued = job.status == STATUS_QUEUED
+            if job.status not in FINISHED_STATUSES:
+                job.cancel_requested = True
+                if cancelled_queued:
+                    job.status = STATUS_CANCELLED
+                    job.finished_at = job.updated_at = time.time()
+            status = job.to_dict()
+        
+        # Running jobs report once they stop after their current page
+        if cancelled_queued:
+            self._report(status, job.credentials_json)
+        return status
+    
+    def shutdown(self):
+        """Cancel every unfinished job and stop the worker threads"""
+        with self.lock:
+            job_ids = [job_id for job_id, job in self.jobs.items() if job.status not in FINISHED_STATUSES]
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self.executor.shutdown(wait=False)
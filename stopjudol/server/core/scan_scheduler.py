@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Multi-Video Scan Scheduler
+--------------------------------------
+This module scans many videos at once. Pagination inside a video stays
+sequential, but up to N videos are fetched in parallel, each on its own worker
+thread with its own API client, under a request rate budget shared by all of them.
+Schedulers given the same thread pool share its N workers, so concurrent scans
+together never run more than N videos at a time.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Default number of videos scanned at the same time
+DEFAULT_CONCURRENCY = 4
+
+# Default request budget, in API requests per second across all workers
+DEFAULT_RATE_LIMIT = 10.0
+
+# Default maximum number of videos in one scan job
+DEFAULT_MAX_VIDEOS = 50
+
+class RateLimiter:
+    """Thread-safe token bucket limiting the request rate of all API wrappers sharing it"""
+    
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=None):
+        """
+        Initialize the rate limiter
+        
+        Args:
+            rate (float, optional): Requests allowed per second
+            burst (float, optional): Requests allowed at once after an idle period,
+                defaults to one second worth of requests
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, count=1):
+        """
+        Wait until the budget allows count more requests
+        
+        Args:
+            count (int, optional): Number of requests about to be made
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Reserve the tokens right away so waiting callers are served in order
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        
+        if wait > 0:
+            time.sleep(wait)
+
+def resolve_video_ids(youtube_api, video_ids=None, playlist_ids=None, channel_ids=None, max_videos=DEFAULT_MAX_VIDEOS):
+    """
+    Expand the targets of a scan job into a list of video IDs
+    
+    Args:
+        youtube_api (YouTubeAPI): API wrapper used to expand playlists and channels
+        video_ids (list, optional): Video IDs or URLs
+        playlist_ids (list, optional): Playlist IDs, expanded through playlistItems.list
+        channel_ids (list, optional): Channel IDs, expanded through their uploads playlist
+        max_videos (int, optional): Maximum number of videos to return
+    
+    Returns:
+        list: Unique video IDs in the order they were given
+    """
+    resolved = []
+    
+    def add(video_id):
+        if video_id and video_id not in resolved and len(resolved) < max_videos:
+            resolved.append(video_id)
+    
+    for video_id in video_ids or []:
+        add(youtube_api.extract_video_id(video_id) or video_id)
+    
+    playlist_ids = list(playlist_ids or [])
+    for channel_id in channel_ids or []:
+        uploads_playlist_id = youtube_api.get_upload_playlist_id(channel_id)
+        if uploads_playlist_id:
+            playlist_ids.append(uploads_playlist_id)
+    
+    for playlist_id in playlist_ids:
+        if len(resolved) >= max_videos:
+            break
+        for video_id in youtube_api.get_playlist_video_ids(playlist_id, max_videos - len(resolved)):
+            add(video_id)
+    
+    return resolved
+
+class ScanScheduler:
+    """Scans a list of videos with bounded parallelism and merges the flagged comments"""
+    
+    def __init__(self, api_factory, analyzer, concurrency=DEFAULT_CONCURRENCY, checkpoint_store=None,
+                 include_replies=False, executor=None):
+        """
+        Initialize the scheduler
+        
+        Args:
+            api_factory (callable): Returns a new YouTubeAPI; called once per worker
+                thread because the underlying HTTP client is not thread-safe
+            analyzer (CommentAnalyzer): Analyzer the fetched comments are fed to
+            concurrency (int, optional): Number of videos scanned at the same time
+            checkpoint_store (ScanCheckpointStore, optional): Store for scan checkpoints
+            include_replies (bool, optional): Also scan the replies of every thread
+            executor (ThreadPoolExecutor, optional): Pool shared with other schedulers;
+                its size replaces concurrency. Without one, every run uses its own pool.
+        """
+        self.api_factory = api_factory
+        self.analyzer = analyzer
+        self.concurrency = max(1, int(concurrency))
+        self.checkpoint_store = checkpoint_store
+        self.include_replies = include_replies
+        self.executor = executor
+        self.local = threading.local()
+    
+    def _get_api(self):
+        """Get the API wrapper of the current worker thread"""
+        if not hasattr(self.local, 'youtube_api'):
+            self.local.youtube_api = self.api_factory()
+        return self.local.youtube_api
+    
+    def scan_video(self, video_id, scan_id=None, is_cancelled=None):
+        """
+        Fetch and analyze the comments of one video
+        
+        Args:
+            video_id (str): YouTube video ID
+            scan_id (str, optional): Scan ID used for checkpoints
+            is_cancelled (callable, optional): Returns True to skip the video
+        
+        Returns:
+            tuple: (per-video progress dict, list of flagged comments)
+        """
+        if is_cancelled and is_cancelled():
+            return {'video_id': video_id, 'status': 'cancelled', 'comments': 0, 'flagged': 0,
+                    'error': None, 'seconds': 0}, []
+        
+        started_at = time.monotonic()
+        try:
+            comments = self._get_api().get_all_comments(
+                video_id, checkpoint_store=self.checkpoint_store, scan_id=scan_id,
+                include_replies=self.include_replies
+            )
+            flagged_comments = self.analyzer.analyze_comments_batch(comments)
+            status = {
+                'video_id': video_id,
+                'status': 'done',
+                'comments': len(comments),
+                'flagged': len(flagged_comments),
+                'error': None
+            }
+        except Exception as e:
+            logging.error(f"Error scanning video {video_id}: {e}")
+            flagged_comments = []
+            status = {'video_id': video_id, 'status': 'failed', 'comments': 0, 'flagged': 0, 'error': str(e)}
+        
+        status['seconds'] = round(time.monotonic() - started_at, 2)
+        return status, flagged_comments
+    
+    def run(self, video_ids, scan_id=None, progress_callback=None, is_cancelled=None):
+        """
+        Scan a list of videos
+        
+        Args:
+            video_ids (list): YouTube video IDs
+            scan_id (str, optional): Scan ID; retrying a failed job with the same ID
+                resumes every video from its last checkpointed page
+            progress_callback (callable, optional): Called with the progress dict and
+                the flagged comments of each video as soon as it finishes
+            is_cancelled (callable, optional): Returns True to skip the videos not
+                started yet
+        
+        Returns:
+            dict: Flagged comments of all videos, progress per video and totals
+        """
+        videos = {video_id: {'video_id': video_id, 'status': 'pending'} for video_id in video_ids}
+        flagged_by_video = {}
+        
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='scan')
+        try:
+            futures = [executor.submit(self.scan_video, video_id, scan_id, is_cancelled) for video_id in video_ids]
+            for future in as_completed(futures):
+                status, flagged_comments = future.result()
+                videos[status['video_id']] = status
+                flagged_by_video[status['video_id']] = flagged_comments
+                if progress_callback:
+                    progress_callback(status, flagged_comments)
+        finally:
+            if executor is not self.executor:
+                executor.shutdown()
+        
+        # Keep the flagged comments in the order the videos were given
+        flagged = []
+        for video_id in video_ids:
+            flagged.extend(flagged_by_video.get(video_id, []))
+        
+        video_list = [videos[video_id] for video_id in video_ids]
+        return {
+            'flagged': flagged,
+            'videos': video_list,
+            'scanned': sum(video.get('comments', 0) for video in video_list),
+            'failed': sum(1 for video in video_list if video['status'] == 'failed')
+        }
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Scan Streaming
+--------------------------
+This module runs a scan of a video and hands out its results as a stream of
+records while the scan is running: every flagged comment is emitted as soon as
+its page is analyzed, followed by a summary of the page and the progress so
+far, and a final done record. Pages are analyzed and forgotten one at a time,
+so the full result set is never held in memory.
+
+Record types:
+    progress: {"type": "progress", "pages_fetched", "pages_expected",
+               "comments_expected", "comments_analyzed", "flagged_count"}
+    flagged:  {"type": "flagged", "item": comment thread with analysis_result}
+    page:     {"type": "page", "page", "comments", "flagged"}
+    done:     {"type": "done", "status", "pages_fetched", "comments_analyzed",
+               "flagged_count", "error"}
+"""
+
+import logging
+
+from .scan_jobs import estimate_pages, STATUS_COMPLETED, STATUS_CANCELLED, STATUS_FAILED
+
+def stream_scan(youtube_api, analyzer, video_id, emit, checkpoint_store=None, scan_id=None,
+                include_replies=False, max_pages=10, on_flagged=None):
+    """
+    Scan the comments of a video, emitting records as each page is analyzed
+    
+    Args:
+        youtube_api (YouTubeAPI): API wrapper used for the scan
+        analyzer (CommentAnalyzer): Analyzer of the fetched comments
+        video_id (str): YouTube video ID
+        emit (callable): Called with every record; returning False stops the
+            scan, e.g. when the reader went away
+        checkpoint_store (ScanCheckpointStore, optional): Lets a stopped scan
+            resume when it is started again with the same scan ID
+        scan_id (str, optional): Scan ID chosen by the client
+        include_replies (bool, optional): Also scan replies
+        max_pages (int, optional): Most comment pages to fetch
+        on_flagged (callable, optional): Called with the flagged comments of every page
+    
+    Returns:
+        dict: The done record
+    """
+    state = {'open': True, 'pages_fetched': 0, 'comments_analyzed': 0, 'flagged_count': 0}
+    comments_expected, pages_expected = estimate_pages(youtube_api, video_id, max_pages)
+    
+    def send(record):
+        if state['open'] and emit(record) is False:
+            state['open'] = False
+        return state['open']
+    
+    def send_progress():
+        return send({
+            'type': 'progress',
+            'pages_fetched': state['pages_fetched'],
+            'pages_expected': pages_expected,
+            'comments_expected': comments_expected,
+            'comments_analyzed': state['comments_analyzed'],
+            'flagged_count': state['flagged_count']
+        })
+    
+    def on_page(pages_fetched, items):
+        flagged = analyzer.analyze_comments_batch(items)
+        state['pages_fetched'] = pages_fetched
+        state['comments_analyzed'] += len(items)
+        state['flagged_count'] += len(flagged)
+        
+        if on_flagged and flagged:
+            on_flagged(flagged)
+        for item in flagged:
+            send({'type': 'flagged', 'item': item})
+        send({'type': 'page', 'page': pages_fetched, 'comments': len(items), 'flagged': len(flagged)})
+        return send_progress()
+    
+    error = None
+    send_progress()
+    try:
+        if state['open']:
+            youtube_api.get_all_comments(
+                video_id, max_pages=max_pages, checkpoint_store=checkpoint_store, scan_id=scan_id,
+                include_replies=include_replies, on_page=on_page, keep_items=False
+            )
+        status = STATUS_COMPLETED if state['open'] else STATUS_CANCELLED
+    except Exception as e:
+        logging.error(f"Error streaming scan of video {video_id}: {e}")
+        status = STATUS_FAILED
+        error = str(e)
+    
+    done = {
+        'type': 'done',
+        'status': status,
+        'pages_fetched': state['pages_fetched'],
+        'comments_analyzed': state['comments_analyzed'],
+        'flagged_count': state['flagged_count'],
+        'error': error
+    }
+    send(done)
+    logging.info(f"Streamed scan of video {video_id} {status}: {state['comments_analyzed']} comments analyzed, "
+                 f"{state['flagged_count']} flagged")
+    return done
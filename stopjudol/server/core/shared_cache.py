@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Shared Comment Cache
+--------------------------------
+This module provides a server-wide, in-memory cache of fetched comments shared by
+every client. Comment threads of a public video are the same for every authorized
+reader, so a video scanned by one moderator can be served to the next one without
+paying the pagination and quota cost again. Concurrent requests for the same
+video share one upstream fetch.
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Default time an entry stays fresh
+DEFAULT_TTL_SECONDS = 300
+
+# Default memory cap of the cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class SharedCommentCache:
+    """Thread-safe TTL cache with a memory cap and in-flight request deduplication"""
+    
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache
+        
+        Args:
+            ttl_seconds (float, optional): Time an entry stays fresh, 0 disables caching
+            max_bytes (int, optional): Approximate memory cap, measured as JSON size
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires_at, size, value), least recently used first
+        self.in_flight = {}  # key -> Future of the running fetch
+        self.total_bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'shared_fetches': 0, 'evictions': 0}
+    
+    def _get_fresh(self, key):
+        """Get a fresh entry and mark it as recently used (caller holds the lock)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+    
+    def _remove(self, key):
+        """Remove an entry (caller holds the lock)"""
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry[1]
+    
+    def _store(self, key, value):
+        """Store a value, evicting the least recently used entries above the cap"""
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.counters['evictions'] += 1
+    
+    def get_or_fetch(self, key, fetch):
+        """
+        Get a cached value, fetching it if it is missing or stale
+        
+        If another thread is already fetching the same key, this call waits for
+        that fetch instead of starting a new one. Cached values are shared between
+        callers and must not be modified.
+        
+        Args:
+            key: Hashable cache key
+            fetch (callable): Returns (value, cacheable); values that are not
+                cacheable (e.g. comments of a private video) are only returned to
+                the caller that fetched them
+        
+        Returns:
+            The cached or fetched value
+        """
+        if not self.ttl_seconds:
+            return fetch()[0]
+        
+        with self.lock:
+            entry = self._get_fresh(key)
+            if entry:
+                self.counters['hits'] += 1
+                return entry[2]
+            
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+                self.counters['misses'] += 1
+            else:
+                self.counters['shared_fetches'] += 1
+        
+        if not owner:
+            try:
+                value, cacheable = future.result()
+                if cacheable:
+                    return value
+            except Exception:
+                # The failure may be specific to the other caller's credentials
+                pass
+            # Fetch with our own credentials
+            return fetch()[0]
+        
+        try:
+            value, cacheable = fetch()
+        except Exception as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        
+        if cacheable:
+            self._store(key, value)
+        with self.lock:
+            self.in_flight.pop(key, None)
+        future.set_result((value, cacheable))
+        return value
+    
+    def clear(self):
+        """Remove every entry"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+        logging.info("Shared comment cache cleared")
+    
+    def get_stats(self):
+        """
+        Get the cache counters
+        
+        Returns:
+            dict: Hits, misses, shared fetches, evictions, entries and size
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+            stats['bytes'] = self.total_bytes
+        return stats
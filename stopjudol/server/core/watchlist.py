@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Watchlist Monitor
+-----------------------------
+This module rescans a watchlist of videos in the background. Each check fetches
+only the comments posted since the previous one, and the interval of every video
+adapts to its recent comment velocity: busy uploads are checked every minute,
+quiet videos rarely. Checks are jittered and stretched to fit a share of the
+daily quota, and stop entirely when the quota runs low.
+
+Credentials are kept in memory only; after a restart a video is checked again
+once its credentials are supplied, or with the API key if one is configured.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+
+# Interval bounds, in seconds
+MIN_INTERVAL_SECONDS = 60
+DEFAULT_MAX_INTERVAL_SECONDS = 6 * 60 * 60
+
+# A check is scheduled when about this many new comments are expected
+TARGET_COMMENTS_PER_CHECK = 20
+
+# Weight of the latest measurement in the velocity average
+VELOCITY_SMOOTHING = 0.5
+
+# Random spread of every interval, as a fraction of it
+INTERVAL_JITTER = 0.1
+
+# Pages fetched per check at most; the first check of a video only sets the baseline
+MAX_PAGES_PER_CHECK = 5
+
+# How often the monitor looks for due videos, and how many it checks at a time
+TICK_SECONDS = 5
+MAX_CHECKS_PER_TICK = 5
+
+# Delay of all checks while the quota is below the reserve
+QUOTA_BACKOFF_SECONDS = 15 * 60
+
+# Flagged comments kept per video
+MAX_FLAGGED_PER_VIDEO = 200
+
+def compute_interval(velocity, base_interval, max_interval):
+    """
+    Compute the check interval of a video from its comment velocity
+    
+    Args:
+        velocity (float): Smoothed new comments per hour, None before the second check
+        base_interval (float): Interval used while the velocity is unknown
+        max_interval (float): Interval of videos without new comments
+    
+    Returns:
+        float: Interval in seconds between MIN_INTERVAL_SECONDS and max_interval
+    """
+    if velocity is None:
+        interval = base_interval
+    elif velocity <= 0:
+        interval = max_interval
+    else:
+        interval = 3600 * TARGET_COMMENTS_PER_CHECK / velocity
+    return max(MIN_INTERVAL_SECONDS, min(max_interval, interval))
+
+class WatchlistMonitor:
+    """Background monitor that rescans watched videos at adaptive intervals"""
+    
+    def __init__(self, config_manager, api_factory, analyzer_factory, quota_ledger=None,
+                 watchlist_path=None, on_flagged=None):
+        """
+        Initialize the monitor
+        
+        Args:
+            config_manager (ConfigManager): Source of the check settings
+            api_factory (callable): Returns a YouTubeAPI for a credentials JSON string
+                (or None to use the API key)
+            analyzer_factory (callable): Returns a CommentAnalyzer
+            quota_ledger (QuotaLedger, optional): Ledger used to keep a quota reserve
+            watchlist_path (str, optional): File the watchlist is persisted to
+            on_flagged (callable, optional): Called with (video_id, flagged comments,
+                credentials JSON) when a check finds new flagged comments
+        """
+        self.config_manager = config_manager
+        self.api_factory = api_factory
+        self.analyzer_factory = analyzer_factory
+        self.quota_ledger = quota_ledger
+        self.watchlist_path = watchlist_path or os.path.join(config_manager.user_config_dir, 'watchlist.json')
+        self.on_flagged = on_flagged
+        self.lock = threading.Lock()
+        self.random = random.Random()
+        
+        self.entries = self.load_watchlist()
+        self.credentials = {}  # video_id -> credentials JSON, never written to disk
+        self.checking = set()
+    
+    def load_watchlist(self):
+        """
+        Load the watchlist from disk
+        
+        Returns:
+            dict: Watchlist entries keyed by video ID
+        """
+        if os.path.exists(self.watchlist_path):
+            try:
+                with open(self.watchlist_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading watchlist: {e}")
+        return {}
+    
+    def save_watchlist(self):
+        """Save the watchlist to disk (caller holds the lock)"""
+        try:
+            with open(self.watchlist_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=4)
+        except Exception as e:
+            logging.error(f"Error saving watchlist: {e}")
+    
+    def is_enabled(self):
+        """
+        Check whether background checks are enabled
+        
+        Returns:
+            bool: True if check_interval_seconds is greater than 0
+        """
+        return float(self.config_manager.get_setting('check_interval_seconds', 0) or 0) > 0
+    
+    def _get_intervals(self):
+        """Get the base and maximum interval from the settings"""
+        base_interval = float(self.config_manager.get_setting('check_interval_seconds', 0) or 0) or 300
+        max_interval = float(self.config_manager.get_setting('watch_max_interval_seconds', DEFAULT_MAX_INTERVAL_SECONDS))
+        return base_interval, max(max_interval, MIN_INTERVAL_SECONDS)
+    
+    def watch(self, video_id, credentials_json=None):
+        """
+        Add a video to the watchlist, or update its credentials
+        
+        Args:
+            video_id (str): YouTube video ID
+            credentials_json (str, optional): OAuth credentials as JSON string
+        
+        Returns:
+            dict: Watchlist entry of the video
+        """
+        with self.lock:
+            if credentials_json:
+                self.credentials[video_id] = credentials_json
+            
+            if video_id not in self.entries:
+                self.entries[video_id] = {
+                    'video_id': video_id,
+                    'added_at': time.time(),
+                    'last_checked_at': None,
+                    'next_check_at': time.time(),  # Check right away to set the baseline
+                    'interval': None,
+                    'velocity': None,
+                    'last_seen_id': None,
+                    'last_seen_published_at': None,
+                    'checks': 0,
+                    'errors': 0,
+                    'last_error': None,
+                    'flagged': []
+                }
+                logging.info(f"Watching video {video_id}")
+            self.save_watchlist()
+            return dict(self.entries[video_id])
+    
+    def unwatch(self, video_id):
+        """
+        Remove a video from the watchlist
+        
+        Args:
+            video_id (str): YouTube video ID
+        
+        Returns:
+            bool: True if the video was on the watchlist
+        """
+        with self.lock:
+            self.credentials.pop(video_id, None)
+            removed = self.entries.pop(video_id, None) is not None
+            if removed:
+                self.save_watchlist()
+                logging.info(f"Stopped watching video {video_id}")
+            return removed
+    
+    def get_watchlist(self):
+        """
+        Get the watchlist
+        
+        Returns:
+            list: Watchlist entries, each with 'has_credentials' set
+        """
+        with self.lock:
+            entries = []
+            for video_id, entry in self.entries.items():
+                entry = dict(entry)
+                entry['has_credentials'] = video_id in self.credentials
+                entries.append(entry)
+            return entries
+    
+    def _quota_project(self, credentials_json):
+        """Get the project the quota of a check is billed to"""
+        if credentials_json:
+            return json.loads(credentials_json).get('client_id') or 'default'
+        return 'default'
+    
+    def _budget_factor(self):
+        """
+        Get the factor all intervals are stretched by to fit the quota share
+        
+        Returns:
+            float: 1.0 when the planned checks fit watch_quota_share of the daily quota
+        """
+        if not self.quota_ledger:
+            return 1.0
+        
+        with self.lock:
+            intervals = [entry['interval'] for entry in self.entries.values() if entry['interval']]
+        calls_per_day = sum(86400 / interval for interval in intervals)
+        allowed = self.quota_ledger.get_daily_limit() * float(self.config_manager.get_setting('watch_quota_share', 0.2))
+        if not calls_per_day or allowed <= 0:
+            return 1.0
+        return max(1.0, calls_per_day / allowed)
+    
+    def get_due_videos(self, now=None):
+        """
+        Get the videos whose next check is due
+        
+        Args:
+            now (float, optional): Current time
+        
+        Returns:
+            list: Video IDs, most overdue first
+        """
+        now = now or time.time()
+        with self.lock:
+            due = [
+                entry for video_id, entry in self.entries.items()
+                if entry['next_check_at'] <= now and video_id not in self.checking
+            ]
+        due.sort(key=lambda entry: entry['next_check_at'])
+        return [entry['video_id'] for entry in due]
+    
+    def check_video(self, video_id):
+        """
+        Fetch and analyze the new comments of a watched video
+        
+        Args:
+            video_id (str): YouTube video ID
+        
+        Returns:
+            list: Newly flagged comments
+        """
+        with self.lock:
+            entry = self.entries.get(video_id)
+            if not entry:
+                return []
+            entry = dict(entry)
+            credentials_json = self.credentials.get(video_id)
+            self.checking.add(video_id)
+        
+        now = time.time()
+        base_interval, max_interval = self._get_intervals()
+        flagged_comments = []
+        
+        try:
+            if not credentials_json and not self.config_manager.get_api_key():
+                # Wait until the client supplies credentials again
+                entry['next_check_at'] = now + base_interval
+                return []
+            
+            reserve = int(self.config_manager.get_setting('watch_quota_reserve', 1000))
+            project = self._quota_project(credentials_json)
+            if self.quota_ledger and self.quota_ledger.get_units_remaining(project) <= reserve:
+                logging.warning(f"Quota below the watchlist reserve, postponing check of video {video_id}")
+                entry['next_check_at'] = now + QUOTA_BACKOFF_SECONDS
+                return []
+            
+            youtube_api = self.api_factory(credentials_json)
+            first_check = entry['last_checked_at'] is None
+            new_items = youtube_api.get_new_comments(
+                video_id,
+                entry['last_seen_id'],
+                entry['last_seen_published_at'],
+                max_pages=1 if first_check else MAX_PAGES_PER_CHECK
+            )
+            
+            if new_items:
+                newest = new_items[0]
+                entry['last_seen_id'] = newest['id']
+                entry['last_seen_published_at'] = newest['snippet']['topLevelComment']['snippet'].get('publishedAt')
+            
+            if not first_check:
+                hours = max((now - entry['last_checked_at']) / 3600, 1 / 3600)
+                rate = len(new_items) / hours
+                velocity = entry['velocity']
+                entry['velocity'] = rate if velocity is None else (
+                    VELOCITY_SMOOTHING * rate + (1 - VELOCITY_SMOOTHING) * velocity
+                )
+            
+            flagged_comments = self.analyzer_factory().analyze_comments_batch(new_items)
+            if flagged_comments:
+                logging.warning(f"Watchlist found {len(flagged_comments)} new flagged comments on video {video_id}")
+                entry['flagged'] = (flagged_comments + entry['flagged'])[:MAX_FLAGGED_PER_VIDEO]
+            
+            entry['interval'] = compute_interval(entry['velocity'], base_interval, max_interval)
+            interval = entry['interval'] * self._budget_factor()
+            entry['next_check_at'] = now + interval * self.random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
+            entry['last_checked_at'] = now
+            entry['checks'] += 1
+            entry['last_error'] = None
+        except Exception as e:
+            logging.error(f"Error checking watched video {video_id}: {e}")
+            entry['errors'] += 1
+            entry['last_error'] = str(e)
+            # Back off on failures without giving up on the video
+            entry['next_check_at'] = now + min(max_interval, (entry['interval'] or base_interval) * 2)
+        finally:
+            with self.lock:
+                self.checking.discard(video_id)
+                if video_id in self.entries:
+                    self.entries[video_id] = entry
+                    self.save_watchlist()
+        
+        if flagged_comments and self.on_flagged:
+            try:
+                self.on_flagged(video_id, flagged_comments, credentials_json)
+            except Exception as e:
+                logging.error(f"Error handling flagged comments of video {video_id}: {e}")
+        
+        return flagged_comments
+    
+    async def tick(self):
+        """Check the videos that are due"""
+        if not self.is_enabled():
+            return
+        
+        loop = asyncio.get_running_loop()
+        for video_id in self.get_due_videos()[:MAX_CHECKS_PER_TICK]:
+            await loop.run_in_executor(None, self.check_video, video_id)
+    
+    async def run(self):
+        """Run the monitor until cancelled"""
+        logging.info("Watchlist monitor started")
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logging.error(f"Error in watchlist monitor: {e}")
+            await asyncio.sleep(TICK_SECONDS)
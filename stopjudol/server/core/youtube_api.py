@@ -12,22 +12,178 @@ import logging
 import time
 import httplib2
 import json
-from urllib.parse import urlparse, parse_qs
+import threading
+import google_auth_httplib2
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs, urlencode
 from googleapiclient.discovery import build
+from googleapiclient.http import BatchHttpRequest, build_http
 from googleapiclient.errors import HttpError
+from .projection import (
+    COMMENT_THREAD_FIELDS, COMMENT_THREAD_WITH_REPLIES_FIELDS, COMMENT_LIST_FIELDS,
+    VIDEO_FIELDS, VIDEO_STATUS_FIELDS, CHANNEL_FIELDS,
+    CHANNEL_UPLOADS_FIELDS, PLAYLIST_ITEM_FIELDS
+)
+from .retry import CircuitOpenError, get_error_reason, get_error_status, is_quota_error, is_retryable
+from .capability_cache import PATH_DELETE, PATH_MODERATE, PATH_SPAM, get_credentials_key
+
+# Default cap on the number of comment threads returned by a channel-wide scan
+DEFAULT_CHANNEL_SCAN_ITEMS = 1000
+
+# commentThreads.list returns at most this many replies inline; threads with
+# more replies are fetched with comments.list(parentId=...)
+INLINE_REPLY_LIMIT = 5
+
+# Maximum number of comments.list(parentId=...) calls in flight at once
+MAX_REPLY_WORKERS = 4
+
+# YouTube accepts at most 50 sub-requests in a single batch HTTP request
+MAX_BATCH_SIZE = 50
+
+# Maximum number of comma-separated IDs sent in one setModerationStatus call
+MAX_MODERATION_IDS = 50
+
+# setModerationStatus errors caused by a single ID, which fail the whole call;
+# such calls are split until the refused IDs are found
+PER_ID_MODERATION_ERRORS = ('commentNotFound', 'operationNotSupported')
+
+SET_MODERATION_STATUS_URL = "https://www.googleapis.com/youtube/v3/comments/setModerationStatus"
 
 class YouTubeAPI:
     """Wrapper for YouTube Data API v3"""
     
-    def __init__(self, credentials):
+    def __init__(self, credentials, quota_ledger=None, page_cache=None, retry_policy=None, rate_limiter=None,
+                 api_base_url=None, capability_cache=None, api_key=None):
         """
         Initialize the YouTube API client
         
         Args:
             credentials: OAuth2 credentials object
+            quota_ledger (QuotaLedger, optional): Ledger that records the quota cost of every call
+            page_cache (CommentPageCache, optional): On-disk cache used for conditional page fetches
+            retry_policy (RetryPolicy, optional): Retry and circuit breaker policy for API calls
+            rate_limiter (RateLimiter, optional): Request budget shared with other API wrappers
+            api_base_url (str, optional): Base URL of a YouTube Data API stand-in, such as
+                the fake server used for offline testing. Defaults to the real API.
+            capability_cache (ModerationCapabilityCache, optional): Cache of the moderation
+                path that works per channel, used to skip paths that are known to fail
+            api_key (str, optional): API key used for read-only calls when no
+                credentials are given
         """
-        self.youtube = build('youtube', 'v3', credentials=credentials)
+        self.credentials = credentials
+        build_options = {'credentials': credentials}
+        if not credentials and api_key:
+            build_options['developerKey'] = api_key
+        self.api_base_url = api_base_url.rstrip('/') if api_base_url else None
+        if self.api_base_url:
+            self.youtube = build('youtube', 'v3', **build_options,
+                                 client_options={'api_endpoint': f"{self.api_base_url}/"})
+            self.set_moderation_status_url = f"{self.api_base_url}/youtube/v3/comments/setModerationStatus"
+        else:
+            self.youtube = build('youtube', 'v3', **build_options)
+            self.set_moderation_status_url = SET_MODERATION_STATUS_URL
         self.channel_info = None
+        self.quota_ledger = quota_ledger
+        self.page_cache = page_cache
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        # Per-thread HTTP clients for concurrent calls; httplib2 is not thread-safe
+        self.local = threading.local()
+        # Quota is billed to the Google Cloud project that owns the OAuth client
+        self.quota_project = getattr(credentials, 'client_id', None) or 'default'
+        self.capability_cache = capability_cache
+        self.credentials_key = get_credentials_key(credentials)
+    
+    def _record_quota(self, api_method, count=1):
+        """
+        Record the quota cost of API calls in the ledger, if one is configured
+        
+        Args:
+            api_method (str): Method name, e.g. 'commentThreads.list'
+            count (int, optional): Number of calls made
+        """
+        if self.quota_ledger:
+            self.quota_ledger.record(api_method, self.quota_project, count)
+    
+    def _throttle(self, count=1):
+        """
+        Wait for the rate limiter, if one is configured
+        
+        Args:
+            count (int, optional): Number of requests about to be made
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire(count)
+    
+    def _new_batch(self, callback):
+        """
+        Create a batch HTTP request
+        
+        The discovery document hardcodes the batch endpoint of the real API, so it
+        is pointed at the configured base URL explicitly.
+        
+        Args:
+            callback (callable): Called with (request_id, response, exception) per sub-request
+            
+        Returns:
+            BatchHttpRequest: Empty batch request
+        """
+        if self.api_base_url:
+            return BatchHttpRequest(callback=callback, batch_uri=f"{self.api_base_url}/batch")
+        return self.youtube.new_batch_http_request(callback=callback)
+    
+    def _call(self, func):
+        """
+        Run a function performing an API call under the retry policy, if any
+        
+        Args:
+            func (callable): Function performing one attempt of the call
+            
+        Returns:
+            The return value of func
+        """
+        try:
+            if self.retry_policy:
+                return self.retry_policy.call(func)
+            return func()
+        except HttpError as e:
+            if self.quota_ledger and is_quota_error(e):
+                self.quota_ledger.mark_exhausted(self.quota_project)
+            raise
+    
+    def _thread_http(self):
+        """
+        Get the HTTP client of the current thread
+        
+        Returns:
+            httplib2.Http: Authorized HTTP client used only by this thread
+        """
+        if not hasattr(self.local, 'http'):
+            if self.credentials:
+                self.local.http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=build_http())
+            else:
+                self.local.http = build_http()
+        return self.local.http
+    
+    def _execute(self, request, api_method, http=None):
+        """
+        Execute an API request and account for its quota cost
+        
+        Args:
+            request: googleapiclient HttpRequest
+            api_method (str): Method name, e.g. 'commentThreads.list'
+            http (httplib2.Http, optional): HTTP client to use instead of the shared one
+            
+        Returns:
+            dict: API response
+        """
+        def attempt():
+            self._throttle()
+            # YouTube charges quota for every request, including failed ones
+            self._record_quota(api_method)
+            return request.execute(http=http)
+        
+        return self._call(attempt)
     
     def get_channel_name(self):
         """
@@ -39,10 +195,11 @@ class YouTubeAPI:
         if not self.channel_info:
             try:
                 # Get channel info for the authenticated user
-                response = self.youtube.channels().list(
+                response = self._execute(self.youtube.channels().list(
                     part='snippet',
-                    mine=True
-                ).execute()
+                    mine=True,
+                    fields=CHANNEL_FIELDS
+                ), 'channels.list')
                 
                 if 'items' in response and len(response['items']) > 0:
                     self.channel_info = response['items'][0]
@@ -55,6 +212,18 @@ class YouTubeAPI:
         else:
             return self.channel_info['snippet']['title']
     
+    def get_channel_id(self):
+        """
+        Get the authenticated user's channel ID
+        
+        Returns:
+            str: Channel ID, or None if it could not be fetched
+        """
+        self.get_channel_name()
+        if self.channel_info:
+            return self.channel_info['id']
+        return None
+    
     def extract_video_id(self, url):
         """
         Extract video ID from a YouTube URL
@@ -83,54 +252,192 @@ class YouTubeAPI:
             return video_id
         return None
     
-    def get_comments(self, video_id, page_token=None, max_results=100):
+    def get_comments(self, video_id, page_token=None, max_results=100, text_format='html', include_replies=False):
         """
         Fetch comments for a YouTube video
         
+        When a page cache is configured, a previously fetched page is revalidated
+        with If-None-Match and reused if YouTube answers 304 Not Modified.
+        
         Args:
             video_id (str): YouTube video ID
             page_token (str, optional): Token for pagination
             max_results (int, optional): Maximum number of results per page
+            text_format (str, optional): 'html' or 'plainText'
+            include_replies (bool, optional): Also request the inline replies of each thread
             
         Returns:
             dict: API response containing comments
         """
+        part = 'snippet,replies' if include_replies else 'snippet'
+        fields = COMMENT_THREAD_WITH_REPLIES_FIELDS if include_replies else COMMENT_THREAD_FIELDS
+        
+        cache_key = None
+        cached_page = None
+        if self.page_cache:
+            cache_key = self.page_cache.make_key(
+                video_id, page_token, text_format,
+                max_results=max_results, fields=fields
+            )
+            cached_page = self.page_cache.get(cache_key)
+        
         try:
             # Call the API to get comment threads
-            response = self.youtube.commentThreads().list(
-                part='snippet',
+            request = self.youtube.commentThreads().list(
+                part=part,
                 videoId=video_id,
                 maxResults=max_results,
                 pageToken=page_token,
-                textFormat='html'  # Get formatted text with HTML
-            ).execute()
+                textFormat=text_format,  # 'html' gets formatted text with HTML
+                fields=fields  # Only the fields we actually use
+            )
+            if cached_page:
+                request.headers['If-None-Match'] = cached_page['etag']
+            
+            response = self._execute(request, 'commentThreads.list')
+            
+            if cache_key:
+                self.page_cache.put(cache_key, response.get('etag'), response)
             
             return response
         except HttpError as e:
-            error_message = str(e)
-            if "quotaExceeded" in error_message:
+            status = get_error_status(e)
+            if cached_page and status == 304:
+                logging.debug(f"Comment page not modified, using cached page for video: {video_id}")
+                return cached_page['response']
+            
+            reason = get_error_reason(e)
+            if is_quota_error(e):
                 logging.error("YouTube API quota exceeded. Please try again tomorrow.")
                 raise Exception("YouTube API quota exceeded. Please try again tomorrow.")
-            elif "videoNotFound" in error_message or "404" in error_message:
+            elif reason == "videoNotFound" or status == 404:
                 logging.error(f"Video not found: {video_id}")
                 raise Exception(f"Video not found or is private: {video_id}")
-            elif "commentsDisabled" in error_message:
+            elif reason == "commentsDisabled":
                 logging.error(f"Comments are disabled for video: {video_id}")
                 raise Exception(f"Comments are disabled for this video: {video_id}")
-            elif "403" in error_message:
+            elif status == 403:
                 logging.error(f"Permission denied: {e}")
                 raise Exception("Permission denied. Please check your authentication.")
             else:
                 logging.error(f"Error fetching comments: {e}")
                 raise Exception(f"Error fetching comments: {e}")
     
-    def delete_comment(self, comment_id, thread_id=None):
+    def get_replies(self, parent_id, max_results=100, text_format='html'):
+        """
+        Fetch every reply of a comment thread
+        
+        Safe to call from several threads at once: each thread uses its own HTTP client.
+        
+        Args:
+            parent_id (str): Comment thread ID
+            max_results (int, optional): Maximum number of results per page
+            text_format (str, optional): 'html' or 'plainText'
+            
+        Returns:
+            list: Reply comment resources
+        """
+        http = self._thread_http()
+        replies = []
+        next_page_token = None
+        
+        while True:
+            response = self._execute(self.youtube.comments().list(
+                part='snippet',
+                parentId=parent_id,
+                maxResults=max_results,
+                pageToken=next_page_token,
+                textFormat=text_format,
+                fields=COMMENT_LIST_FIELDS
+            ), 'comments.list', http=http)
+            
+            replies.extend(response.get('items', []))
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                return replies
+    
+    def expand_replies(self, threads, text_format='html'):
+        """
+        Collect the replies of a page of comment threads
+        
+        Replies that came inline with the thread are used as they are; threads with
+        more than INLINE_REPLY_LIMIT replies are fetched with comments.list, a few
+        threads at a time. The inline replies are removed from the threads.
+        
+        Args:
+            threads (list): Comment thread items, fetched with include_replies
+            text_format (str, optional): 'html' or 'plainText'
+            
+        Returns:
+            list: Replies wrapped like comment threads, in thread order, each with
+                'parent_id' set to its thread ID and 'is_reply' set to True
+        """
+        replies_by_thread = {}
+        fan_out = []
+        
+        for thread in threads:
+            inline_replies = thread.pop('replies', {}).get('comments', [])
+            reply_count = thread['snippet'].get('totalReplyCount', 0)
+            if not reply_count:
+                continue
+            
+            replies_by_thread[thread['id']] = inline_replies
+            if reply_count > INLINE_REPLY_LIMIT or len(inline_replies) < reply_count:
+                fan_out.append(thread['id'])
+        
+        if fan_out:
+            with ThreadPoolExecutor(max_workers=min(MAX_REPLY_WORKERS, len(fan_out))) as executor:
+                futures = {
+                    executor.submit(self.get_replies, thread_id, text_format=text_format): thread_id
+                    for thread_id in fan_out
+                }
+                for future in as_completed(futures):
+                    thread_id = futures[future]
+                    try:
+                        replies_by_thread[thread_id] = future.result()
+                    except Exception as e:
+                        # Keep the inline replies rather than failing the whole scan
+                        logging.error(f"Error fetching replies of thread {thread_id}: {e}")
+        
+        wrapped_replies = []
+        for thread in threads:
+            for reply in replies_by_thread.get(thread['id'], []):
+                wrapped_replies.append({
+                    'id': reply['id'],
+                    'snippet': {
+                        'channelId': thread['snippet'].get('channelId'),
+                        'videoId': thread['snippet'].get('videoId'),
+                        'totalReplyCount': 0,
+                        'topLevelComment': reply
+                    },
+                    'parent_id': thread['id'],
+                    'is_reply': True
+                })
+        return wrapped_replies
+    
+    def _get_moderation_path(self, channel_id):
+        """Get the moderation path that worked last time on a channel, if known"""
+        if not self.capability_cache:
+            return None
+        return self.capability_cache.get(self.credentials_key, channel_id)
+    
+    def _record_moderation_path(self, channel_id, path):
+        """Remember the moderation path that worked on a channel, or forget it if none did"""
+        if self.capability_cache:
+            self.capability_cache.record(self.credentials_key, channel_id, path)
+    
+    def delete_comment(self, comment_id, thread_id=None, channel_id=None):
         """
         Delete a YouTube comment
         
+        When the capability cache knows that the delete endpoint fails on this
+        channel, the comment is moderated right away.
+        
         Args:
             comment_id (str): Comment ID to delete
             thread_id (str, optional): Comment thread ID, used for moderation
+            channel_id (str, optional): Channel the comment belongs to, used as
+                capability cache key
             
         Returns:
             dict: Result with action_type ('deleted', 'marked_as_spam', or 'none') and success (bool)
@@ -143,53 +450,66 @@ class YouTubeAPI:
                 
             # Log the attempt for debugging
             logging.debug(f"Attempting to delete comment with ID: {comment_id}")
+            path = self._get_moderation_path(channel_id)
             
             # First try to delete using regular delete endpoint (works for your own comments)
-            try:
-                request = self.youtube.comments().delete(id=comment_id)
-                request.http.follow_redirects = True
-                response = request.execute()
-                logging.info(f"Successfully deleted comment using delete endpoint: {comment_id}")
-                return {'action_type': 'deleted', 'success': True, 'message': 'Comment deleted successfully'}
-            except HttpError as delete_error:
-                error_message = str(delete_error)
-                error_code = str(delete_error.status_code) if hasattr(delete_error, 'status_code') else 'unknown'
-                
-                # If we get permission error, try using markAsSpam instead
-                if "403" in error_message or "400" in error_message:
-                    if thread_id:
-                        logging.debug(f"Attempting to mark comment as spam: {thread_id}")
-                        result = self.moderate_comment(thread_id)
-                        if result:
-                            return {'action_type': 'marked_as_spam', 'success': True, 'message': 'Comment marked as spam'}
-                        else:
-                            return {'action_type': 'marked_as_spam', 'success': False, 'message': 'Failed to mark comment as spam'}
-                    else:
-                        logging.error("Cannot mark comment as spam: thread_id not provided")
-                        return {'action_type': 'none', 'success': False, 'message': 'Cannot mark as spam: thread_id not provided'}
+            if path in (None, PATH_DELETE) or not thread_id:
+                try:
+                    request = self.youtube.comments().delete(id=comment_id)
+                    request.http.follow_redirects = True
+                    self._execute(request, 'comments.delete')
+                    logging.info(f"Successfully deleted comment using delete endpoint: {comment_id}")
+                    self._record_moderation_path(channel_id, PATH_DELETE)
+                    return {'action_type': 'deleted', 'success': True, 'message': 'Comment deleted successfully'}
+                except HttpError as delete_error:
+                    if get_error_status(delete_error) not in (400, 403) or is_quota_error(delete_error):
+                        # Re-raise for the outer exception handler
+                        raise delete_error
+            
+            # If we get permission error, try moderating or marking as spam instead
+            if thread_id:
+                logging.debug(f"Attempting to mark comment as spam: {thread_id}")
+                moderation_path = self._moderate_single(thread_id, spam_only=path == PATH_SPAM)
+                self._record_moderation_path(channel_id, moderation_path)
+                if moderation_path:
+                    return {'action_type': 'marked_as_spam', 'success': True, 'message': 'Comment marked as spam'}
                 else:
-                    # Re-raise for the outer exception handler
-                    raise delete_error
+                    return {'action_type': 'marked_as_spam', 'success': False, 'message': 'Failed to mark comment as spam'}
+            else:
+                logging.error("Cannot mark comment as spam: thread_id not provided")
+                return {'action_type': 'none', 'success': False, 'message': 'Cannot mark as spam: thread_id not provided'}
                     
         except HttpError as e:
-            error_message = str(e)
-            error_code = str(e.status_code) if hasattr(e, 'status_code') else 'unknown'
+            return self._delete_error_result(e, comment_id)
+    
+    def _delete_error_result(self, e, comment_id):
+        """
+        Convert an error raised while deleting a comment into a result dict
+        
+        Args:
+            e (Exception): Error raised by the API call
+            comment_id (str): Comment ID the error belongs to
             
-            if "quotaExceeded" in error_message:
-                logging.error("YouTube API quota exceeded. Please try again tomorrow.")
-                return {'action_type': 'none', 'success': False, 'message': 'YouTube API quota exceeded'}
-            elif "commentNotFound" in error_message or "404" in error_message:
-                logging.error(f"Comment not found: {comment_id}")
-                return {'action_type': 'none', 'success': False, 'message': f'Comment not found: {comment_id}'}
-            elif "403" in error_message:
-                logging.error(f"Permission denied to delete comment: {comment_id}")
-                return {'action_type': 'none', 'success': False, 'message': 'Permission denied to delete comment'}
-            elif "400" in error_message:
-                logging.error(f"Bad request when deleting comment {comment_id}")
-                return {'action_type': 'none', 'success': False, 'message': 'Bad request when deleting comment'}
-            else:
-                logging.error(f"Error deleting comment {comment_id}: {e}")
-                return {'action_type': 'none', 'success': False, 'message': f'Error: {str(e)}'}
+        Returns:
+            dict: Result with action_type 'none' and success False
+        """
+        status = get_error_status(e)
+        
+        if is_quota_error(e):
+            logging.error("YouTube API quota exceeded. Please try again tomorrow.")
+            return {'action_type': 'none', 'success': False, 'message': 'YouTube API quota exceeded'}
+        elif get_error_reason(e) == "commentNotFound" or status == 404:
+            logging.error(f"Comment not found: {comment_id}")
+            return {'action_type': 'none', 'success': False, 'message': f'Comment not found: {comment_id}'}
+        elif status == 403:
+            logging.error(f"Permission denied to delete comment: {comment_id}")
+            return {'action_type': 'none', 'success': False, 'message': 'Permission denied to delete comment'}
+        elif status == 400:
+            logging.error(f"Bad request when deleting comment {comment_id}")
+            return {'action_type': 'none', 'success': False, 'message': 'Bad request when deleting comment'}
+        else:
+            logging.error(f"Error deleting comment {comment_id}: {e}")
+            return {'action_type': 'none', 'success': False, 'message': f'Error: {str(e)}'}
             
     def moderate_comment(self, comment_id, moderation_status="rejected"):
         """
@@ -202,129 +522,703 @@ class YouTubeAPI:
         Returns:
             bool: True if successful, False otherwise
         """
+        return self._moderate_single(comment_id, moderation_status) is not None
+    
+    def _moderate_single(self, comment_id, moderation_status="rejected", spam_only=False):
+        """
+        Moderate a comment, falling back to markAsSpam
+        
+        Args:
+            comment_id (str): Comment ID to moderate
+            moderation_status (str): Moderation status (rejected, published, heldForReview)
+            spam_only (bool, optional): Skip setModerationStatus, known to fail on this channel
+            
+        Returns:
+            str: PATH_MODERATE or PATH_SPAM for the call that succeeded, None if both failed
+        """
         try:
             # Verify the comment ID format
             if not comment_id or not isinstance(comment_id, str):
                 logging.error(f"Invalid comment ID format: {comment_id}")
-                return False
+                return None
                 
             logging.debug(f"Attempting to set moderation status to '{moderation_status}' for comment: {comment_id}")
             
-            # Try using the built-in service method first
-            try:
-                # Try to use the built-in method if available
+            if not spam_only:
                 try:
-                    # This might work if the library has the method but it's not documented
-                    request = self.youtube.comments().setModerationStatus(
-                        id=comment_id,
-                        moderationStatus=moderation_status,
-                        banAuthor=False
-                    )
-                    response = request.execute()
+                    self._set_moderation_status([comment_id], moderation_status)
                     logging.info(f"Successfully set moderation status to '{moderation_status}' for comment: {comment_id}")
-                    return True
-                except AttributeError:
-                    # Method not available, use the raw API request
-                    logging.debug("setModerationStatus method not available in client library, using raw request")
-                    
-                    # Use the YouTube API service's authorized http object directly
-                    http = self.youtube._http
-                    
-                    # Build the URL with query parameters
-                    url = "https://www.googleapis.com/youtube/v3/comments/setModerationStatus"
-                    params = {
-                        'id': comment_id,
-                        'moderationStatus': moderation_status,
-                        'banAuthor': 'false'  # API expects string 'false', not boolean
-                    }
-                    
-                    # Convert params to query string
-                    query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-                    full_url = f"{url}?{query_string}"
-                    
-                    # Make the POST request
-                    response, content = http.request(
-                        full_url,
-                        method="POST",
-                        headers={'Content-Type': 'application/json'}
-                    )
-                    
-                    # Check if the request was successful
-                    if response.status < 300:
-                        logging.info(f"Successfully set moderation status to '{moderation_status}' for comment: {comment_id}")
-                        return True
-                    else:
-                        content_str = content.decode('utf-8') if isinstance(content, bytes) else str(content)
-                        logging.error(f"Error setting moderation status: {content_str}")
-                        raise Exception(f"Error setting moderation status: {content_str}")
-                    
-            except Exception as direct_api_error:
-                logging.warning(f"Direct API request failed: {direct_api_error}")
-                logging.warning("Falling back to markAsSpam method...")
-                
-                # Fall back to markAsSpam if setModerationStatus fails
-                try:
-                    request = self.youtube.comments().markAsSpam(id=comment_id)
-                    response = request.execute()
-                    logging.info(f"Successfully marked comment as spam: {comment_id}")
-                    logging.info(f"Comment marked as spam. Note that YouTube may not remove it immediately.")
-                    return True
-                except Exception as mark_spam_error:
-                    logging.error(f"markAsSpam fallback also failed: {mark_spam_error}")
-                    raise mark_spam_error
+                    return PATH_MODERATE
+                except Exception as direct_api_error:
+                    logging.warning(f"Direct API request failed: {direct_api_error}")
+                    logging.warning("Falling back to markAsSpam method...")
+            
+            # Fall back to markAsSpam if setModerationStatus fails
+            try:
+                request = self.youtube.comments().markAsSpam(id=comment_id)
+                self._execute(request, 'comments.markAsSpam')
+                logging.info(f"Successfully marked comment as spam: {comment_id}")
+                logging.info(f"Comment marked as spam. Note that YouTube may not remove it immediately.")
+                return PATH_SPAM
+            except Exception as mark_spam_error:
+                logging.error(f"markAsSpam fallback also failed: {mark_spam_error}")
+                raise mark_spam_error
                     
         except HttpError as e:
-            error_message = str(e)
-            error_code = str(e.status_code) if hasattr(e, 'status_code') else 'unknown'
+            status = get_error_status(e)
             
-            if "quotaExceeded" in error_message:
+            if is_quota_error(e):
                 logging.error("YouTube API quota exceeded. Please try again tomorrow.")
-            elif "404" in error_message:
+            elif status == 404:
                 logging.error(f"Comment not found: {comment_id}")
-            elif "403" in error_message:
+            elif status == 403:
                 logging.error(f"Permission denied to moderate comment: {comment_id}. You can only moderate comments on your own videos.")
             else:
                 logging.error(f"Error moderating comment {comment_id}: {e}")
             
-            return False
+            return None
+    
+    def _set_moderation_status(self, comment_ids, moderation_status):
+        """
+        Call comments.setModerationStatus for up to MAX_MODERATION_IDS comments
+        
+        Uses the client library method when it exists and the raw request otherwise;
+        a library without the method is remembered in the capability cache.
+        
+        Args:
+            comment_ids (list): Comment IDs to moderate in a single request
+            moderation_status (str): Moderation status (rejected, published, heldForReview)
+            
+        Raises:
+            HttpError: If the API returns an error status
+        """
+        library_support = self.capability_cache.library_has_set_moderation_status if self.capability_cache else None
+        if library_support is not False:
+            try:
+                # This might work if the library has the method but it's not documented
+                request = self.youtube.comments().setModerationStatus(
+                    id=','.join(comment_ids),
+                    moderationStatus=moderation_status,
+                    banAuthor=False
+                )
+            except AttributeError:
+                # Method not available, use the raw API request
+                logging.debug("setModerationStatus method not available in client library, using raw request")
+                if self.capability_cache:
+                    self.capability_cache.library_has_set_moderation_status = False
+            else:
+                self._execute(request, 'comments.setModerationStatus')
+                return
+        
+        self._set_moderation_status_raw(comment_ids, moderation_status)
+    
+    def _set_moderation_status_raw(self, comment_ids, moderation_status):
+        """
+        Call comments.setModerationStatus through the authorized http object
+        
+        Used when the client library does not expose setModerationStatus.
+        
+        Args:
+            comment_ids (list): Comment IDs to moderate in a single request
+            moderation_status (str): Moderation status (rejected, published, heldForReview)
+            
+        Raises:
+            HttpError: If the API returns an error status
+        """
+        # Use the YouTube API service's authorized http object directly
+        http = self.youtube._http
+        
+        params = {
+            'id': ','.join(comment_ids),
+            'moderationStatus': moderation_status,
+            'banAuthor': 'false'  # API expects string 'false', not boolean
+        }
+        full_url = f"{self.set_moderation_status_url}?{urlencode(params)}"
+        
+        def attempt():
+            # Make the POST request
+            self._throttle()
+            self._record_quota('comments.setModerationStatus')
+            response, content = http.request(
+                full_url,
+                method="POST",
+                headers={'Content-Type': 'application/json'}
+            )
+            
+            # Check if the request was successful
+            if response.status >= 300:
+                content_str = content.decode('utf-8') if isinstance(content, bytes) else str(content)
+                logging.error(f"Error setting moderation status: {content_str}")
+                raise HttpError(response, content, uri=full_url)
+        
+        self._call(attempt)
+    
+    def moderate_comments(self, comment_ids, moderation_status="rejected"):
+        """
+        Moderate many comments with multi-ID setModerationStatus calls
+        
+        IDs are sent as comma-separated lists of up to MAX_MODERATION_IDS per request.
+        IDs in a chunk that fails fall back to markAsSpam, like moderate_comment.
+        
+        Args:
+            comment_ids (list): Comment IDs to moderate
+            moderation_status (str): Moderation status (rejected, published, heldForReview)
+            
+        Returns:
+            dict: Mapping of comment ID to True if moderated, False otherwise
+        """
+        return self._moderate_many(comment_ids, moderation_status)[0]
+    
+    def _moderate_many(self, comment_ids, moderation_status="rejected", spam_only=False):
+        """
+        Moderate many comments, falling back to markAsSpam
+        
+        Args:
+            comment_ids (list): Comment IDs to moderate
+            moderation_status (str): Moderation status (rejected, published, heldForReview)
+            spam_only (bool, optional): Skip setModerationStatus, known to fail on this channel
+            
+        Returns:
+            tuple: (mapping of comment ID to True if moderated, set of IDs that were
+                only marked as spam)
+        """
+        results = {}
+        failed_ids = []
+        comment_ids = [comment_id for comment_id in dict.fromkeys(comment_ids)
+                       if comment_id and isinstance(comment_id, str)]
+        
+        if spam_only:
+            failed_ids = comment_ids
+        else:
+            # Taken from the end, so chunks and their halves run in order
+            chunks = [comment_ids[start:start + MAX_MODERATION_IDS]
+                      for start in range(0, len(comment_ids), MAX_MODERATION_IDS)][::-1]
+            while chunks:
+                chunk = chunks.pop()
+                try:
+                    self._set_moderation_status(chunk, moderation_status)
+                    logging.info(f"Successfully set moderation status to '{moderation_status}' for {len(chunk)} comments")
+                    for comment_id in chunk:
+                        results[comment_id] = True
+                except Exception as e:
+                    if len(chunk) > 1 and (get_error_reason(e) in PER_ID_MODERATION_ERRORS or get_error_status(e) == 404):
+                        # One refused ID fails the whole call; retry both halves
+                        middle = len(chunk) // 2
+                        chunks.extend([chunk[middle:], chunk[:middle]])
+                    else:
+                        logging.warning(f"setModerationStatus failed for {len(chunk)} comments: {e}")
+                        failed_ids.extend(chunk)
+            
+            if failed_ids:
+                logging.warning(f"Falling back to markAsSpam for {len(failed_ids)} comments...")
+        
+        # Fall back to markAsSpam for the IDs setModerationStatus refused
+        spam_errors = self._execute_batch(
+            failed_ids,
+            lambda comment_id: self.youtube.comments().markAsSpam(id=comment_id),
+            'comments.markAsSpam'
+        )
+        marked_as_spam = set()
+        for comment_id in failed_ids:
+            error = spam_errors.get(comment_id)
+            if error is None:
+                logging.info(f"Successfully marked comment as spam: {comment_id}")
+                results[comment_id] = True
+                marked_as_spam.add(comment_id)
+            else:
+                logging.error(f"markAsSpam fallback also failed for {comment_id}: {error}")
+                results[comment_id] = False
+        
+        return results, marked_as_spam
+    
+    def _execute_batch(self, ids, build_request, api_method):
+        """
+        Execute one API call per ID, grouped into batch HTTP requests
+        
+        Sub-requests that fail with a transient error are sent again in a new
+        batch, following the backoff of the retry policy.
+        
+        Args:
+            ids (list): IDs to send, one sub-request each
+            build_request (callable): Builds the HttpRequest for a single ID
+            api_method (str): Method name used for quota accounting
+            
+        Returns:
+            dict: Mapping of ID to the exception raised for it, or None on success
+        """
+        errors = {}
+        max_attempts = self.retry_policy.max_attempts if self.retry_policy else 1
+        
+        def callback(request_id, response, exception):
+            errors[request_id] = exception
+        
+        for start in range(0, len(ids), MAX_BATCH_SIZE):
+            pending = ids[start:start + MAX_BATCH_SIZE]
+            
+            for attempt in range(1, max_attempts + 1):
+                # A batch rejected by the open circuit is never sent, so it is
+                # neither throttled nor billed, and says nothing about the API
+                if self.retry_policy:
+                    try:
+                        self.retry_policy.breaker.before_call()
+                    except CircuitOpenError as open_error:
+                        logging.error(f"Batch request rejected: {open_error}")
+                        for item_id in pending:
+                            errors[item_id] = open_error
+                        break
+                
+                batch = self._new_batch(callback)
+                for item_id in pending:
+                    batch.add(build_request(item_id), request_id=item_id)
+                
+                # Every sub-request of a batch is billed as a separate call
+                self._throttle(len(pending))
+                self._record_quota(api_method, len(pending))
+                try:
+                    batch.execute()
+                except Exception as batch_error:
+                    # The whole batch failed (network error, auth failure, ...)
+                    logging.error(f"Batch request failed: {batch_error}")
+                    for item_id in pending:
+                        errors[item_id] = batch_error
+                
+                if not self.retry_policy:
+                    break
+                
+                sent = pending
+                pending = [item_id for item_id in sent if is_retryable(errors.get(item_id))]
+                # One batch is one round trip, so it counts once towards the circuit breaker:
+                # as a failure if a sub-request failed transiently, and as a success only if
+                # a sub-request went through; a batch that failed for good leaves it as it is
+                if pending:
+                    self.retry_policy.record_outcome(errors[pending[0]])
+                elif any(errors.get(item_id) is None for item_id in sent):
+                    self.retry_policy.record_outcome(None)
+                if not pending:
+                    break
+                if attempt < max_attempts:
+                    delay = self.retry_policy.get_delay(attempt)
+                    logging.warning(f"Retrying {len(pending)} failed batch sub-requests in {delay:.1f}s")
+                    time.sleep(delay)
+        
+        return errors
+    
+    def delete_comments(self, comments, moderation_status="rejected"):
+        """
+        Delete multiple YouTube comments using batch HTTP requests
+        
+        Comments are first deleted through the delete endpoint. Comments the user
+        is not allowed to delete are moderated through multi-ID setModerationStatus
+        calls, and any that still fail are marked as spam, mirroring delete_comment.
+        Comments are grouped by channel, and on channels where the capability cache
+        knows a path to fail, that path is skipped.
+        
+        Args:
+            comments (list): List of dicts with 'comment_id' and optional 'thread_id'
+                and 'channel_id'
+            moderation_status (str): Moderation status used for the fallback
+            
+        Returns:
+            list: One result per comment, in input order, with comment_id, action_type,
+                success and message
+        """
+        results = {}
+        channels = {}  # channel ID -> {comment ID: thread ID}
+        
+        for item in comments:
+            comment_id = item.get('comment_id')
+            if not comment_id or not isinstance(comment_id, str):
+                logging.error(f"Invalid comment ID format: {comment_id}")
+                continue
+            channels.setdefault(item.get('channel_id'), {})[comment_id] = item.get('thread_id')
+        
+        for channel_id, thread_ids in channels.items():
+            results.update(self._delete_channel_comments(channel_id, thread_ids, moderation_status))
+        
+        batch_results = []
+        for item in comments:
+            comment_id = item.get('comment_id')
+            result = results.get(comment_id, {'action_type': 'none', 'success': False, 'message': 'Invalid comment ID format'})
+            batch_results.append(dict(result, comment_id=comment_id))
+        return batch_results
+    
+    def _delete_channel_comments(self, channel_id, thread_ids, moderation_status):
+        """
+        Delete the comments of one channel, starting with the path that worked last time
+        
+        Args:
+            channel_id (str): Channel the comments belong to, None if unknown
+            thread_ids (dict): Mapping of comment ID to thread ID
+            moderation_status (str): Moderation status used for the fallback
+            
+        Returns:
+            dict: Mapping of comment ID to its result
+        """
+        results = {}
+        path = self._get_moderation_path(channel_id)
+        
+        if path in (PATH_MODERATE, PATH_SPAM):
+            # The delete endpoint fails on this channel, go straight to moderation
+            to_delete = [comment_id for comment_id, thread_id in thread_ids.items() if not thread_id]
+            to_moderate = {thread_id: comment_id for comment_id, thread_id in thread_ids.items() if thread_id}
+        else:
+            to_delete = list(thread_ids)
+            to_moderate = {}
+        
+        # First try the regular delete endpoint (works for your own comments)
+        delete_errors = self._execute_batch(
+            to_delete,
+            lambda comment_id: self.youtube.comments().delete(id=comment_id),
+            'comments.delete'
+        )
+        
+        for comment_id in to_delete:
+            error = delete_errors.get(comment_id)
+            if error is None:
+                logging.info(f"Successfully deleted comment using delete endpoint: {comment_id}")
+                results[comment_id] = {'action_type': 'deleted', 'success': True, 'message': 'Comment deleted successfully'}
+            elif get_error_status(error) in (400, 403) and not is_quota_error(error):
+                if thread_ids[comment_id]:
+                    to_moderate[thread_ids[comment_id]] = comment_id
+                else:
+                    logging.error("Cannot mark comment as spam: thread_id not provided")
+                    results[comment_id] = {'action_type': 'none', 'success': False, 'message': 'Cannot mark as spam: thread_id not provided'}
+            else:
+                results[comment_id] = self._delete_error_result(error, comment_id)
+        
+        # Moderate the comments we could not delete, falling back to markAsSpam
+        moderated, marked_as_spam = self._moderate_many(list(to_moderate), moderation_status, path == PATH_SPAM)
+        
+        for thread_id, comment_id in to_moderate.items():
+            if moderated.get(thread_id):
+                results[comment_id] = {'action_type': 'marked_as_spam', 'success': True, 'message': 'Comment marked as spam'}
+            else:
+                results[comment_id] = {'action_type': 'marked_as_spam', 'success': False, 'message': 'Failed to mark comment as spam'}
+        
+        # Remember the path that handled most of the comments
+        handled = {PATH_DELETE: 0, PATH_MODERATE: 0, PATH_SPAM: 0}
+        for comment_id in to_delete:
+            if results[comment_id]['action_type'] == 'deleted':
+                handled[PATH_DELETE] += 1
+        for thread_id in to_moderate:
+            if moderated.get(thread_id):
+                handled[PATH_SPAM if thread_id in marked_as_spam else PATH_MODERATE] += 1
+        best_path = max(handled, key=handled.get)
+        self._record_moderation_path(channel_id, best_path if handled[best_path] else None)
+        
+        return results
             
-    def get_all_comments(self, video_id, max_results=100, max_pages=10):
+    def get_all_comments(self, video_id, max_results=100, max_pages=10, checkpoint_store=None, scan_id=None,
+                         include_replies=False, on_page=None, keep_items=True):
         """
         Fetch all comments for a YouTube video using pagination
         
+        When a checkpoint store and scan ID are given, every fetched page is
+        checkpointed and a retried scan with the same scan ID resumes after the
+        last page that was fetched successfully.
+        
         Args:
             video_id (str): YouTube video ID
             max_results (int, optional): Maximum number of results per page
             max_pages (int, optional): Maximum number of pages to fetch
+            checkpoint_store (ScanCheckpointStore, optional): Store for scan checkpoints
+            scan_id (str, optional): ID of the scan, chosen by the client
+            include_replies (bool, optional): Also return the replies of every thread,
+                see expand_replies
+            on_page (callable, optional): Called with (pages fetched, items of the page)
+                after every page, and once with the items of a restored checkpoint;
+                returning False stops the scan and keeps its checkpoint
+            keep_items (bool, optional): Collect and return the comments; callers that
+                handle every page in on_page can turn it off to save memory
             
         Returns:
-            list: List of all comment items
+            list: List of all comment items, empty if keep_items is False
         """
         all_comments = []
         next_page_token = None
         page_count = 0
+        use_checkpoints = checkpoint_store is not None and scan_id is not None
+        
+        if use_checkpoints:
+            checkpoint = checkpoint_store.load(video_id, scan_id)
+            if checkpoint:
+                all_comments = checkpoint['items']
+                next_page_token = checkpoint['next_page_token']
+                page_count = checkpoint['pages_fetched']
+                logging.info(f"Resuming scan {scan_id} of video {video_id} after page {page_count}")
+                if on_page and on_page(page_count, list(all_comments)) is False:
+                    return all_comments if keep_items else []
+                if not keep_items:
+                    all_comments = []
         
         try:
             while page_count < max_pages:
+                response = self.get_comments(video_id, next_page_token, max_results, include_replies=include_replies)
                 page_count += 1
-                response = self.get_comments(video_id, next_page_token, max_results)
                 
-                if 'items' in response:
-                    all_comments.extend(response['items'])
+                items = response.get('items', [])
+                if include_replies:
+                    items.extend(self.expand_replies(items))
+                if keep_items:
+                    all_comments.extend(items)
                 
                 # Check if there are more pages
                 if 'nextPageToken' in response:
                     next_page_token = response['nextPageToken']
-                    # Add a small delay to avoid hitting rate limits
-                    time.sleep(0.5)
+                    if use_checkpoints:
+                        checkpoint_store.save_page(video_id, scan_id, page_count, items, next_page_token)
+                    if on_page and on_page(page_count, items) is False:
+                        logging.info(f"Scan of video {video_id} stopped after page {page_count}")
+                        return all_comments
                 else:
+                    if on_page:
+                        on_page(page_count, items)
                     break
             
+            if use_checkpoints:
+                checkpoint_store.delete(video_id, scan_id)
+            
             return all_comments
         except Exception as e:
             logging.error(f"Error fetching all comments: {e}")
             raise
     
+    def get_new_comments(self, video_id, last_seen_id=None, last_seen_published_at=None, max_pages=5,
+                         max_results=100):
+        """
+        Fetch the comment threads posted since the last check, newest first
+        
+        Paging stops at the last-seen comment, so a quiet video costs a single call.
+        
+        Args:
+            video_id (str): YouTube video ID
+            last_seen_id (str, optional): ID of the newest thread seen by the previous check
+            last_seen_published_at (str, optional): publishedAt of that thread
+            max_pages (int, optional): Maximum number of pages to fetch
+            max_results (int, optional): Maximum number of results per page
+            
+        Returns:
+            list: New comment thread items, newest first
+        """
+        new_items = []
+        next_page_token = None
+        
+        for _ in range(max_pages):
+            # commentThreads.list returns the newest threads first by default
+            response = self.get_comments(video_id, next_page_token, max_results)
+            
+            for item in response.get('items', []):
+                published_at = item['snippet']['topLevelComment']['snippet'].get('publishedAt', '')
+                if item['id'] == last_seen_id or (last_seen_published_at and published_at < last_seen_published_at):
+                    return new_items
+                new_items.append(item)
+            
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+        
+        return new_items
+    
+    def get_channel_comments(self, channel_id, page_token=None, max_results=100, text_format='html',
+                             include_replies=False):
+        """
+        Fetch comment threads across all videos of a channel, newest first
+        
+        Args:
+            channel_id (str): YouTube channel ID
+            page_token (str, optional): Token for pagination
+            max_results (int, optional): Maximum number of results per page
+            text_format (str, optional): 'html' or 'plainText'
+            include_replies (bool, optional): Also request the inline replies of each thread
+            
+        Returns:
+            dict: API response containing comment threads
+        """
+        try:
+            return self._execute(self.youtube.commentThreads().list(
+                part='snippet,replies' if include_replies else 'snippet',
+                allThreadsRelatedToChannelId=channel_id,
+                order='time',
+                maxResults=max_results,
+                pageToken=page_token,
+                textFormat=text_format,
+                fields=COMMENT_THREAD_WITH_REPLIES_FIELDS if include_replies else COMMENT_THREAD_FIELDS
+            ), 'commentThreads.list')
+        except HttpError as e:
+            status = get_error_status(e)
+            if is_quota_error(e):
+                logging.error("YouTube API quota exceeded. Please try again tomorrow.")
+                raise Exception("YouTube API quota exceeded. Please try again tomorrow.")
+            elif get_error_reason(e) == "channelNotFound" or status == 404:
+                logging.error(f"Channel not found: {channel_id}")
+                raise Exception(f"Channel not found: {channel_id}")
+            elif status == 403:
+                logging.error(f"Permission denied: {e}")
+                raise Exception("Permission denied. Please check your authentication.")
+            else:
+                logging.error(f"YouTube API error: {e}")
+                raise Exception(f"YouTube API error: {e}")
+    
+    def iter_channel_comments(self, channel_id, published_after=None, max_items=DEFAULT_CHANNEL_SCAN_ITEMS, max_results=100,
+                              include_replies=False):
+        """
+        Page through the comment threads of a channel as a single stream
+        
+        Threads come back newest first, so paging stops at the first thread that
+        is not newer than the watermark.
+        
+        Args:
+            channel_id (str): YouTube channel ID
+            published_after (str, optional): RFC 3339 timestamp; only newer threads are returned
+            max_items (int, optional): Maximum number of threads to return in total
+            max_results (int, optional): Maximum number of results per page
+            include_replies (bool, optional): Also yield the replies of every thread;
+                replies do not count towards max_items
+            
+        Yields:
+            list: Comment thread items of one page
+        """
+        next_page_token = None
+        item_count = 0
+        
+        while item_count < max_items:
+            response = self.get_channel_comments(
+                channel_id, next_page_token, min(max_results, max_items - item_count), include_replies=include_replies
+            )
+            
+            items = response.get('items', [])
+            reached_watermark = False
+            if published_after:
+                newer_items = [
+                    item for item in items
+                    if item['snippet']['topLevelComment']['snippet'].get('publishedAt', '') > published_after
+                ]
+                reached_watermark = len(newer_items) < len(items)
+                items = newer_items
+            
+            items = items[:max_items - item_count]
+            item_count += len(items)
+            if include_replies:
+                items.extend(self.expand_replies(items))
+            if items:
+                yield items
+            
+            next_page_token = response.get('nextPageToken')
+            if reached_watermark or not next_page_token:
+                break
+    
+    def scan_channel(self, analyzer, channel_id=None, published_after=None, max_items=DEFAULT_CHANNEL_SCAN_ITEMS,
+                     include_replies=False):
+        """
+        Scan the comments of every video on a channel, analyzing each page as it arrives
+        
+        Args:
+            analyzer (CommentAnalyzer): Analyzer the fetched comments are fed to
+            channel_id (str, optional): YouTube channel ID, defaults to the authenticated user's channel
+            published_after (str, optional): Watermark returned by a previous scan
+            max_items (int, optional): Maximum number of comment threads to scan
+            include_replies (bool, optional): Also scan the replies of every thread
+            
+        Returns:
+            dict: Flagged comments, number of scanned comments, pages fetched and
+                the watermark to pass to the next scan
+        """
+        if not channel_id:
+            channel_id = self.get_channel_id()
+            if not channel_id:
+                raise Exception("Could not determine the channel of the authenticated user")
+        
+        flagged_comments = []
+        scanned = 0
+        pages = 0
+        watermark = published_after
+        
+        for items in self.iter_channel_comments(channel_id, published_after, max_items, include_replies=include_replies):
+            pages += 1
+            scanned += len(items)
+            flagged_comments.extend(analyzer.analyze_comments_batch(items))
+            
+            for item in items:
+                if item.get('is_reply'):
+                    continue
+                published_at = item['snippet']['topLevelComment']['snippet'].get('publishedAt')
+                if published_at and (not watermark or published_at > watermark):
+                    watermark = published_at
+        
+        logging.info(f"Scanned {scanned} comments on channel {channel_id}, {len(flagged_comments)} flagged")
+        return {
+            'channel_id': channel_id,
+            'flagged': flagged_comments,
+            'scanned': scanned,
+            'pages': pages,
+            'watermark': watermark
+        }
+    
+    def get_upload_playlist_id(self, channel_id):
+        """
+        Get the ID of the playlist holding every upload of a channel
+        
+        Args:
+            channel_id (str): YouTube channel ID
+            
+        Returns:
+            str: Uploads playlist ID, or None if the channel was not found
+        """
+        try:
+            response = self._execute(self.youtube.channels().list(
+                part='contentDetails',
+                id=channel_id,
+                fields=CHANNEL_UPLOADS_FIELDS
+            ), 'channels.list')
+            
+            if 'items' in response and len(response['items']) > 0:
+                return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            else:
+                logging.error(f"Channel not found: {channel_id}")
+                return None
+        except HttpError as e:
+            logging.error(f"Error fetching channel uploads: {e}")
+            raise Exception(f"Error fetching channel uploads: {e}")
+    
+    def get_playlist_video_ids(self, playlist_id, max_items=50):
+        """
+        Get the video IDs of a playlist
+        
+        Args:
+            playlist_id (str): YouTube playlist ID
+            max_items (int, optional): Maximum number of video IDs to return
+            
+        Returns:
+            list: Video IDs in playlist order
+        """
+        video_ids = []
+        next_page_token = None
+        
+        try:
+            while len(video_ids) < max_items:
+                response = self._execute(self.youtube.playlistItems().list(
+                    part='contentDetails',
+                    playlistId=playlist_id,
+                    maxResults=min(50, max_items - len(video_ids)),
+                    pageToken=next_page_token,
+                    fields=PLAYLIST_ITEM_FIELDS
+                ), 'playlistItems.list')
+                
+                for item in response.get('items', []):
+                    video_ids.append(item['contentDetails']['videoId'])
+                
+                next_page_token = response.get('nextPageToken')
+                if not next_page_token:
+                    break
+            
+            return video_ids[:max_items]
+        except HttpError as e:
+            if get_error_reason(e) == "playlistNotFound" or get_error_status(e) == 404:
+                logging.error(f"Playlist not found: {playlist_id}")
+                raise Exception(f"Playlist not found or is private: {playlist_id}")
+            logging.error(f"Error fetching playlist items: {e}")
+            raise Exception(f"Error fetching playlist items: {e}")
+    
     def get_video_info(self, video_id):
         """
         Get information about a YouTube video
@@ -336,10 +1230,11 @@ class YouTubeAPI:
             dict: Video information
         """
         try:
-            response = self.youtube.videos().list(
+            response = self._execute(self.youtube.videos().list(
                 part='snippet,statistics',
-                id=video_id
-            ).execute()
+                id=video_id,
+                fields=VIDEO_FIELDS
+            ), 'videos.list')
             
             if 'items' in response and len(response['items']) > 0:
                 return response['items'][0]
@@ -350,23 +1245,52 @@ class YouTubeAPI:
             logging.error(f"Error fetching video info: {e}")
             raise Exception(f"Error fetching video info: {e}")
     
+    def is_public_video(self, video_id):
+        """
+        Check whether a video is public, i.e. its comments are the same for every reader
+        
+        Args:
+            video_id (str): YouTube video ID
+            
+        Returns:
+            bool: True if the video is public, False if it is private, unlisted or not found
+        """
+        try:
+            response = self._execute(self.youtube.videos().list(
+                part='status',
+                id=video_id,
+                fields=VIDEO_STATUS_FIELDS
+            ), 'videos.list')
+            
+            items = response.get('items', [])
+            return bool(items) and items[0].get('status', {}).get('privacyStatus') == 'public'
+        except HttpError as e:
+            logging.error(f"Error fetching video status: {e}")
+            return False
+    
     def check_api_quota(self):
         """
         Check if the API quota is still available
         
+        When a quota ledger is configured, the answer comes from the ledger
+        and costs no quota. Otherwise a minimal API call is made.
+        
         Returns:
             bool: True if quota is available, False otherwise
         """
+        if self.quota_ledger:
+            return self.quota_ledger.get_units_remaining(self.quota_project) > 0
+        
         try:
             # Make a minimal API call to check quota
-            self.youtube.channels().list(
+            self._execute(self.youtube.channels().list(
                 part='id',
                 mine=True,
                 maxResults=1
-            ).execute()
+            ), 'channels.list')
             return True
         except HttpError as e:
-            if "quotaExceeded" in str(e):
+            if is_quota_error(e):
                 logging.error("YouTube API quota exceeded")
                 return False
             # If it's another error, quota is probably still available
@@ -0,0 +1,587 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Fake YouTube Data API
+---------------------------------
+This module provides a local stand-in for the parts of the YouTube Data API v3 the
+server uses, so YouTubeAPI, fetch_comments and deletions can be benchmarked and
+load-tested without network access or quota.
+
+It serves synthetic comments or a recorded fixture and supports configurable
+latency, page size, error injection and quota exhaustion. Point the server at it
+with the `youtube_api_base_url` setting (or STOPJUDOL_YOUTUBE_API_BASE_URL).
+
+Fixture format:
+    {
+        "channel": {"id": "UC...", "title": "Channel name"},
+        "videos": [
+            {"id": "video_id", "title": "Video title", "privacy_status": "public",
+             "comment_threads": [<commentThread resources>]}
+        ]
+    }
+"""
+
+import json
+import random
+import asyncio
+import hashlib
+import logging
+from http import HTTPStatus
+from email.parser import Parser
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, parse_qs
+from aiohttp import web
+
+from .core.projection import apply_fields_mask
+from .core.quota_ledger import get_method_cost
+
+# Default behaviour of the fake API, every key can be changed at runtime
+DEFAULT_CONFIG = {
+    'latency_ms': 0,  # Added to every HTTP request
+    'latency_jitter_ms': 0,  # Random extra latency on top of latency_ms
+    'page_size': 100,  # Upper bound of maxResults
+    'error_rate': 0.0,  # Share of API calls that fail with an injected error
+    'error_codes': [403, 429, 500],  # Statuses the injected errors are picked from
+    'error_methods': [],  # Methods errors are injected into, empty means all
+    'quota_limit': 10000,  # Units available before every call fails with quotaExceeded
+    'delete_own_only': False,  # comments.delete fails with 403 unless the fake channel wrote the comment
+}
+
+# Reason and message sent with injected errors
+INJECTED_ERRORS = {
+    403: ('forbidden', 'The request is not properly authorized.'),
+    429: ('rateLimitExceeded', 'The request cannot be completed because you have exceeded your quota.'),
+    500: ('backendError', 'Backend Error'),
+    503: ('backendError', 'The service is currently unavailable.'),
+}
+
+SPAM_TEXTS = [
+    "Main di SL0T G4C0R pasti maxwin, link di bio!",
+    "Daftar sekarang di situs judi online terpercaya, bonus 100% deposit pertama",
+    "Mau cuan? Gabung togel online, hubungi wa 0812-3456-7890",
+    "𝐃𝐎𝐑𝐀𝟕𝟕 gacor hari ini, jangan sampai ketinggalan",
+]
+
+NORMAL_TEXTS = [
+    "Videonya bagus banget, ditunggu konten berikutnya!",
+    "Terima kasih tutorialnya kak, sangat membantu",
+    "Pertamax! Mantap bang",
+    "Jam berapa ini diupload? Baru nemu channel ini",
+    "Setuju banget sama pendapat di menit 5:20",
+]
+
+class FakeApiError(Exception):
+    """Error answered by the fake API in the YouTube error format"""
+    
+    def __init__(self, status, reason, message):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+    
+    def to_payload(self):
+        """Build the JSON error body the real API returns"""
+        return {
+            'error': {
+                'code': self.status,
+                'message': self.message,
+                'errors': [{'message': self.message, 'domain': 'youtube', 'reason': self.reason}]
+            }
+        }
+
+class FakeYouTubeAPI:
+    """In-memory YouTube channel served over HTTP like the YouTube Data API"""
+    
+    def __init__(self, config=None, fixture=None, videos=5, comments_per_video=250, spam_ratio=0.1,
+                 reply_ratio=0.2, max_replies=12, seed=42):
+        """
+        Initialize the fake API
+        
+        Args:
+            config (dict, optional): Overrides of DEFAULT_CONFIG
+            fixture (dict, optional): Recorded channel data, see the module docstring
+            videos (int, optional): Number of synthetic videos when no fixture is given
+            comments_per_video (int, optional): Synthetic comment threads per video
+            spam_ratio (float, optional): Share of synthetic comments that are spam
+            reply_ratio (float, optional): Share of synthetic threads that have replies
+            max_replies (int, optional): Maximum number of replies of a synthetic thread
+            seed (int, optional): Seed of the data generator and the error injection
+        """
+        self.config = dict(DEFAULT_CONFIG)
+        self.config.update(config or {})
+        self.random = random.Random(seed)
+        
+        self.channel = {'id': 'UCfakechannel0000000000', 'title': 'StopJudol Fake Channel'}
+        self.videos = {}  # video_id -> {'id', 'title', 'threads': [thread]}, threads newest first
+        self.comments = {}  # comment_id -> (video_id, thread), for replies the parent thread
+        self.replies = {}  # thread_id -> [reply], oldest first
+        self.moderation = {}  # comment_id -> moderation status
+        
+        if fixture:
+            self.load_fixture(fixture)
+        else:
+            self.generate(videos, comments_per_video, spam_ratio, reply_ratio, max_replies)
+        
+        self.reset_stats()
+        
+        self.routes = {
+            ('GET', '/youtube/v3/commentThreads'): ('commentThreads.list', self.comment_threads_list),
+            ('GET', '/youtube/v3/comments'): ('comments.list', self.comments_list),
+            ('DELETE', '/youtube/v3/comments'): ('comments.delete', self.comments_delete),
+            ('POST', '/youtube/v3/comments/setModerationStatus'): ('comments.setModerationStatus', self.comments_set_moderation_status),
+            ('POST', '/youtube/v3/comments/markAsSpam'): ('comments.markAsSpam', self.comments_mark_as_spam),
+            ('GET', '/youtube/v3/channels'): ('channels.list', self.channels_list),
+            ('GET', '/youtube/v3/videos'): ('videos.list', self.videos_list),
+            ('GET', '/youtube/v3/playlistItems'): ('playlistItems.list', self.playlist_items_list),
+        }
+    
+    def reset_stats(self):
+        """Reset the request counters and the used quota"""
+        self.stats = {'http_requests': 0, 'batches': 0, 'calls': {}, 'errors_injected': 0, 'quota_used': 0}
+    
+    def make_thread(self, video_id, index, text, published_at):
+        """
+        Build a comment thread resource with every field the API returns
+        
+        Args:
+            video_id (str): Video the comment belongs to
+            index (int): Comment number, used to make IDs unique
+            text (str): Comment text
+            published_at (str): RFC 3339 timestamp
+        
+        Returns:
+            dict: Comment thread resource
+        """
+        comment_id = f"Ugz{video_id[:6]}{index:012d}AaABAg"
+        author_channel = f"UC{index:022d}"
+        return {
+            'kind': 'youtube#commentThread',
+            'etag': hashlib.sha1(f"thread-{comment_id}".encode('utf-8')).hexdigest(),
+            'id': comment_id,
+            'snippet': {
+                'channelId': self.channel['id'],
+                'videoId': video_id,
+                'topLevelComment': {
+                    'kind': 'youtube#comment',
+                    'etag': hashlib.sha1(f"comment-{comment_id}".encode('utf-8')).hexdigest(),
+                    'id': comment_id,
+                    'snippet': {
+                        'channelId': self.channel['id'],
+                        'videoId': video_id,
+                        'textDisplay': text,
+                        'textOriginal': text,
+                        'authorDisplayName': f"@pengguna{index}",
+                        'authorProfileImageUrl': f"https://yt3.ggpht.com/ytc/{author_channel}=s48-c-k-c0x00ffffff-no-rj",
+                        'authorChannelUrl': f"http://www.youtube.com/@pengguna{index}",
+                        'authorChannelId': {'value': author_channel},
+                        'canRate': True,
+                        'viewerRating': 'none',
+                        'likeCount': index % 17,
+                        'publishedAt': published_at,
+                        'updatedAt': published_at
+                    }
+                },
+                'canReply': True,
+                'totalReplyCount': 0,
+                'isPublic': True
+            }
+        }
+    
+    def make_reply(self, thread, reply_number, text, published_at):
+        """
+        Build a reply comment resource
+        
+        Args:
+            thread (dict): Parent comment thread
+            reply_number (int): Position of the reply in the thread
+            text (str): Comment text
+            published_at (str): RFC 3339 timestamp
+        
+        Returns:
+            dict: Comment resource with parentId set
+        """
+        reply_id = f"{thread['id']}.{reply_number:04d}"
+        return {
+            'kind': 'youtube#comment',
+            'etag': hashlib.sha1(f"comment-{reply_id}".encode('utf-8')).hexdigest(),
+            'id': reply_id,
+            'snippet': {
+                'channelId': self.channel['id'],
+                'videoId': thread['snippet']['videoId'],
+                'textDisplay': text,
+                'textOriginal': text,
+                'parentId': thread['id'],
+                'authorDisplayName': f"@pembalas{reply_number}",
+                'authorChannelId': {'value': f"UCreply{reply_number:017d}"},
+                'canRate': True,
+                'viewerRating': 'none',
+                'likeCount': 0,
+                'publishedAt': published_at,
+                'updatedAt': published_at
+            }
+        }
+    
+    def generate(self, videos, comments_per_video, spam_ratio, reply_ratio=0.0, max_replies=0):
+        """
+        Generate synthetic videos and comments
+        
+        Args:
+            videos (int): Number of videos
+            comments_per_video (int): Comment threads per video
+            spam_ratio (float): Share of comments that are spam
+            reply_ratio (float, optional): Share of threads that have replies
+            max_replies (int, optional): Maximum number of replies of a thread
+        """
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        index = 0
+        for video_number in range(videos):
+            video_id = f"fakevid{video_number:04d}"
+            threads = []
+            for _ in range(comments_per_video):
+                is_spam = self.random.random() < spam_ratio
+                text = self.random.choice(SPAM_TEXTS if is_spam else NORMAL_TEXTS)
+                published_at = (now - timedelta(minutes=index)).strftime('%Y-%m-%dT%H:%M:%SZ')
+                thread = self.make_thread(video_id, index, text, published_at)
+                index += 1
+                
+                if max_replies and self.random.random() < reply_ratio:
+                    replies = []
+                    for reply_number in range(self.random.randint(1, max_replies)):
+                        is_spam = self.random.random() < spam_ratio
+                        text = self.random.choice(SPAM_TEXTS if is_spam else NORMAL_TEXTS)
+                        replies.append(self.make_reply(thread, reply_number, text, published_at))
+                    thread['replies'] = {'comments': replies}
+                threads.append(thread)
+            self.add_video(video_id, f"Video {video_number + 1}", threads)
+    
+    def load_fixture(self, fixture):
+        """
+        Load recorded channel data
+        
+        Args:
+            fixture (dict): Recorded channel data, see the module docstring
+        """
+        self.channel.update(fixture.get('channel', {}))
+        for video in fixture.get('videos', []):
+            self.add_video(video['id'], video.get('title', video['id']), video.get('comment_threads', []))
+            self.videos[video['id']]['privacy_status'] = video.get('privacy_status', 'public')
+    
+    def add_video(self, video_id, title, threads):
+        """Add a video and index its comments and replies"""
+        threads = sorted(threads, key=self.published_at, reverse=True)
+        self.videos[video_id] = {'id': video_id, 'title': title, 'threads': threads}
+        for thread in threads:
+            self.comments[thread['id']] = (video_id, thread)
+            self.replies[thread['id']] = thread.pop('replies', {}).get('comments', [])
+            for reply in self.replies[thread['id']]:
+                self.comments[reply['id']] = (video_id, thread)
+    
+    @staticmethod
+    def published_at(thread):
+        return thread['snippet']['topLevelComment']['snippet'].get('publishedAt', '')
+    
+    def visible_threads(self, threads):
+        """Filter out threads or replies that were deleted, rejected or held for review"""
+        return [thread for thread in threads if self.moderation.get(thread['id'], 'published') == 'published']
+    
+    def render_thread(self, thread, parts):
+        """
+        Build the thread resource returned by commentThreads.list
+        
+        Args:
+            thread (dict): Stored comment thread
+            parts (list): Requested parts
+        
+        Returns:
+            dict: Thread with the current reply count and, if requested, up to 5 inline replies
+        """
+        replies = self.visible_threads(self.replies.get(thread['id'], []))
+        rendered = dict(thread)
+        rendered['snippet'] = dict(thread['snippet'], totalReplyCount=len(replies))
+        if 'replies' in parts and replies:
+            rendered['replies'] = {'comments': replies[:5]}
+        return rendered
+    
+    # API methods
+    
+    def paginate(self, items, query):
+        """
+        Cut one page out of a list
+        
+        Args:
+            items (list): All items
+            query (dict): Request parameters with pageToken and maxResults
+        
+        Returns:
+            dict: Response with items and, if there are more, nextPageToken
+        """
+        max_results = min(int(query.get('maxResults', 20)), int(self.config['page_size']))
+        offset = int(query.get('pageToken') or 0)
+        response = {'items': items[offset:offset + max_results]}
+        if offset + max_results < len(items):
+            response['nextPageToken'] = str(offset + max_results)
+        response['pageInfo'] = {'totalResults': len(items), 'resultsPerPage': max_results}
+        return response
+    
+    def comment_threads_list(self, query):
+        if 'videoId' in query:
+            video = self.videos.get(query['videoId'])
+            if not video:
+                raise FakeApiError(404, 'videoNotFound', 'The video identified by the videoId parameter could not be found.')
+            threads = self.visible_threads(video['threads'])
+        elif query.get('allThreadsRelatedToChannelId') == self.channel['id']:
+            threads = []
+            for video in self.videos.values():
+                threads.extend(self.visible_threads(video['threads']))
+            threads.sort(key=self.published_at, reverse=True)
+        elif 'allThreadsRelatedToChannelId' in query:
+            raise FakeApiError(404, 'channelNotFound', 'The channel could not be found.')
+        else:
+            raise FakeApiError(400, 'missingRequiredParameter', 'No filter selected.')
+        
+        parts = query.get('part', 'snippet').split(',')
+        response = {'kind': 'youtube#commentThreadListResponse'}
+        response.update(self.paginate(threads, query))
+        response['items'] = [self.render_thread(thread, parts) for thread in response['items']]
+        return 200, response
+    
+    def comments_list(self, query):
+        parent_id = query.get('parentId')
+        if not parent_id:
+            raise FakeApiError(400, 'missingRequiredParameter', 'No filter selected.')
+        if parent_id not in self.replies:
+            raise FakeApiError(404, 'commentNotFound', 'The comment could not be found.')
+        
+        response = {'kind': 'youtube#commentListResponse'}
+        response.update(self.paginate(self.visible_threads(self.replies[parent_id]), query))
+        return 200, response
+    
+    def comment_author(self, comment_id):
+        """Get the channel ID of the author of a stored comment or reply"""
+        video_id, thread = self.comments[comment_id]
+        comment = thread['snippet']['topLevelComment']
+        for reply in self.replies.get(thread['id'], []):
+            if reply['id'] == comment_id:
+                comment = reply
+        return comment['snippet'].get('authorChannelId', {}).get('value')
+    
+    def comments_delete(self, query):
+        comment_id = query.get('id', '')
+        if comment_id not in self.comments or self.moderation.get(comment_id) == 'deleted':
+            raise FakeApiError(404, 'commentNotFound', 'The comment could not be found.')
+        if self.config['delete_own_only'] and self.comment_author(comment_id) != self.channel['id']:
+            raise FakeApiError(403, 'forbidden', 'The comment could not be deleted.')
+        self.moderation[comment_id] = 'deleted'
+        return 204, None
+    
+    def comments_set_moderation_status(self, query):
+        status = query.get('moderationStatus')
+        if status not in ('published', 'heldForReview', 'rejected'):
+            raise FakeApiError(400, 'invalidModerationStatus', 'The moderation status is invalid.')
+        comment_ids = query.get('id', '').split(',')
+        for comment_id in comment_ids:
+            if comment_id not in self.comments or self.moderation.get(comment_id) == 'deleted':
+                raise FakeApiError(404, 'commentNotFound', 'The comment could not be found.')
+        for comment_id in comment_ids:
+            self.moderation[comment_id] = status
+        return 204, None
+    
+    def comments_mark_as_spam(self, query):
+        for comment_id in query.get('id', '').split(','):
+            if comment_id not in self.comments:
+                raise FakeApiError(404, 'commentNotFound', 'The comment could not be found.')
+            self.moderation[comment_id] = 'heldForReview'
+        return 204, None
+    
+    def channels_list(self, query):
+        if query.get('mine') != 'true' and self.channel['id'] not in query.get('id', '').split(','):
+            return 200, {'kind': 'youtube#channelListResponse', 'items': []}
+        channel = {
+            'kind': 'youtube#channel',
+            'id': self.channel['id'],
+            'snippet': {'title': self.channel['title']},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + self.channel['id'][2:]}}
+        }
+        return 200, {'kind': 'youtube#channelListResponse', 'items': [channel]}
+    
+    def videos_list(self, query):
+        items = []
+        for video_id in query.get('id', '').split(','):
+            video = self.videos.get(video_id)
+            if video:
+                items.append({
+                    'kind': 'youtube#video',
+                    'id': video_id,
+                    'snippet': {'title': video['title'], 'channelId': self.channel['id'], 'publishedAt': '2025-01-01T00:00:00Z'},
+                    'statistics': {'commentCount': str(len(self.visible_threads(video['threads'])))},
+                    'status': {'privacyStatus': video.get('privacy_status', 'public')}
+                })
+        return 200, {'kind': 'youtube#videoListResponse', 'items': items}
+    
+    def playlist_items_list(self, query):
+        if query.get('playlistId') != 'UU' + self.channel['id'][2:]:
+            raise FakeApiError(404, 'playlistNotFound', 'The playlist could not be found.')
+        items = [{'kind': 'youtube#playlistItem', 'contentDetails': {'videoId': video_id}} for video_id in self.videos]
+        response = {'kind': 'youtube#playlistItemListResponse'}
+        response.update(self.paginate(items, query))
+        return 200, response
+    
+    # Request handling
+    
+    def call(self, http_method, path, query, headers):
+        """
+        Handle one API call
+        
+        Args:
+            http_method (str): HTTP method
+            path (str): Request path
+            query (dict): Request parameters
+            headers (dict): Request headers
+        
+        Returns:
+            tuple: (status, JSON payload or None, response headers)
+        """
+        route = self.routes.get((http_method, path))
+        if not route:
+            error = FakeApiError(404, 'notFound', f"Unknown method {http_method} {path}")
+            return error.status, error.to_payload(), {}
+        api_method, handler = route
+        
+        self.stats['calls'][api_method] = self.stats['calls'].get(api_method, 0) + 1
+        
+        try:
+            # Quota is charged for every call, including failed ones
+            cost = get_method_cost(api_method)
+            if self.stats['quota_used'] + cost > self.config['quota_limit']:
+                raise FakeApiError(403, 'quotaExceeded', 'The request cannot be completed because you have exceeded your quota.')
+            self.stats['quota_used'] += cost
+            
+            error_methods = self.config['error_methods']
+            if self.config['error_rate'] and (not error_methods or api_method in error_methods):
+                if self.random.random() < self.config['error_rate']:
+                    status = int(self.random.choice(self.config['error_codes']))
+                    reason, message = INJECTED_ERRORS.get(status, ('backendError', 'Backend Error'))
+                    self.stats['errors_injected'] += 1
+                    raise FakeApiError(status, reason, message)
+            
+            status, payload = handler(query)
+        except FakeApiError as e:
+            return e.status, e.to_payload(), {}
+        
+        if payload is None:
+            return status, None, {}
+        
+        # The etag covers the full resource, like the real API
+        etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest() + '"'
+        if headers.get('if-none-match') == etag:
+            return 304, None, {'ETag': etag}
+        payload['etag'] = etag
+        
+        if query.get('fields'):
+            payload = apply_fields_mask(payload, query['fields'])
+        return status, payload, {'ETag': etag}
+    
+    async def simulate_latency(self):
+        """Sleep for the configured latency"""
+        delay = self.config['latency_ms'] + self.random.uniform(0, self.config['latency_jitter_ms'])
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+    
+    @staticmethod
+    def parse_query(query_string):
+        return {name: values[-1] for name, values in parse_qs(query_string, keep_blank_values=True).items()}
+    
+    async def handle(self, request):
+        """Handle a plain API request"""
+        self.stats['http_requests'] += 1
+        await self.simulate_latency()
+        
+        headers = {name.lower(): value for name, value in request.headers.items()}
+        status, payload, response_headers = self.call(
+            request.method, request.path, self.parse_query(request.query_string), headers
+        )
+        if payload is None:
+            return web.Response(status=status, headers=response_headers)
+        return web.json_response(payload, status=status, headers=response_headers)
+    
+    async def handle_batch(self, request):
+        """Handle a multipart/mixed batch request the way the real batch endpoint does"""
+        self.stats['http_requests'] += 1
+        self.stats['batches'] += 1
+        await self.simulate_latency()
+        
+        body = await request.text()
+        message = Parser().parsestr(f"Content-Type: {request.headers['Content-Type']}\r\n\r\n{body}")
+        
+        boundary = f"batch_{hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]}"
+        parts = []
+        for part in message.get_payload():
+            request_line, _, rest = part.get_payload().partition('\n')
+            http_method, target, _ = request_line.strip().split(' ', 2)
+            sub_request = Parser().parsestr(rest)
+            url = urlsplit(target)
+            
+            headers = {name.lower(): value for name, value in sub_request.items()}
+            status, payload, response_headers = self.call(http_method, url.path, self.parse_query(url.query), headers)
+            
+            content = json.dumps(payload) if payload is not None else ''
+            # Long Content-ID headers arrive folded over several lines
+            content_id = ''.join(part['Content-ID'].splitlines())
+            lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+            lines.extend(f"{name}: {value}" for name, value in response_headers.items())
+            if payload is not None:
+                lines.append('Content-Type: application/json; charset=UTF-8')
+            lines.append(f"Content-Length: {len(content.encode('utf-8'))}")
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                + '\r\n'.join(lines) + f"\r\n\r\n{content}\r\n"
+            )
+        
+        return web.Response(
+            body=(''.join(parts) + f"--{boundary}--\r\n").encode('utf-8'),
+            headers={'Content-Type': f'multipart/mixed; boundary={boundary}'}
+        )
+    
+    async def handle_stats(self, request):
+        """Return the request counters"""
+        return web.json_response(self.stats)
+    
+    async def handle_config(self, request):
+        """Return the configuration, updating it first on POST"""
+        if request.method == 'POST':
+            updates = await request.json()
+            unknown = set(updates) - set(DEFAULT_CONFIG)
+            if unknown:
+                return web.json_response({'error': f"Unknown settings: {', '.join(sorted(unknown))}"}, status=400)
+            self.config.update(updates)
+            logging.info(f"Fake YouTube API configuration updated: {updates}")
+        return web.json_response(self.config)
+    
+    async def handle_reset(self, request):
+        """Restore deleted and moderated comments and reset the counters"""
+        self.moderation.clear()
+        self.reset_stats()
+        return web.json_response({'status': 'ok'})
+
+def create_app(fake_api=None):
+    """
+    Create the aiohttp application serving the fake API
+    
+    Args:
+        fake_api (FakeYouTubeAPI, optional): Fake API to serve, a synthetic one by default
+    
+    Returns:
+        web.Application: aiohttp application
+    """
+    fake_api = fake_api or FakeYouTubeAPI()
+    app = web.Application()
+    app['fake_api'] = fake_api
+    app.router.add_get('/_fake/stats', fake_api.handle_stats)
+    app.router.add_route('*', '/_fake/config', fake_api.handle_config)
+    app.router.add_post('/_fake/reset', fake_api.handle_reset)
+    app.router.add_post('/batch', fake_api.handle_batch)
+    app.router.add_route('*', '/{tail:.*}', fake_api.handle)
+    return app
@@ -9,30 +9,47 @@ This module provides the main server application for StopJudol.
 
 import os
 import json
+import time
+import asyncio
 import logging
-from aiohttp import web
+from aiohttp import web, WSCloseCode
 from jsonrpcserver import async_dispatch, Success, Error
 import jwt
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("server.log", mode='a', encoding='utf-8', delay=False)
-    ]
-)
+from shared.utils import logger_config
+
+# Configure logging; records are written by a background thread, off the event loop
+logger_config.configure_queue_logging("server.log")
 
 # Import RPC handlers
 from .rpc.handler import *
-from .rpc.auth import authenticate, create_token
+from .rpc.auth import verify_token, create_token, get_rpc_methods, check_access, get_admin_users, ROLE_ADMIN, ROLE_USER
+from .core.scan_stream import stream_scan
+from . import prefork
+from shared.utils import json_codec, compression
 
 # Load environment variables
 load_dotenv()
 
+# Requests of one WebSocket connection running at the same time
+WS_MAX_IN_FLIGHT = 32
+
+# Methods whose result names a scan job the WebSocket connection gets the progress of
+SCAN_JOB_METHODS = {"start_scan", "scan_videos"}
+
+# Logger of the RPC requests and responses
+rpc_logger = logging.getLogger("stopjudol.rpc")
+
+# Build the error response of a refused request
+def auth_error(status, message):
+    return web.Response(
+        text=json.dumps({"error": {"code": status, "message": message}}),
+        status=status,
+        content_type="application/json"
+    )
+
 # Authentication middleware
 @web.middleware
 async def auth_middleware(request, handler):
@@ -44,69 +61,346 @@ async def auth_middleware(request, handler):
     if request.method == "OPTIONS":
         return await handler(request)
     
-    # Get the authorization header
+    # Validate the token, if one is sent; its claims are cached until it expires
     auth_header = request.headers.get("Authorization")
+    claims = None
+    if auth_header:
+        claims = verify_token(auth_header.replace("Bearer ", ""))
+        if claims is None:
+            return auth_error(401, "Invalid token")
+    request["claims"] = claims
     
-    # If no auth header is provided, check if the method requires authentication
-    if not auth_header:
-        # Parse the request to get the method name
-        try:
-            request_data = await request.json()
-            method = request_data.get("method")
-            
-            # List of methods that don't require authentication
-            public_methods = [
-                "extract_video_id", 
-                "get_blacklist", 
-                "get_whitelist",
-                "get_setting"
-            ]
-            
-            if method in public_methods:
-                return await handler(request)
-                
-        except Exception:
-            pass
-            
-        return web.Response(
-            text=json.dumps({"error": {"code": 401, "message": "Unauthorized"}}),
-            status=401,
-            content_type="application/json"
-        )
+    # RPC calls are checked against the policy of every method, batches included;
+    # the other endpoints need a valid token
+    if request.path == "/rpc":
+        request["rpc_methods"] = get_rpc_methods(await read_rpc_payload(request))
+        refusal = check_access(request["rpc_methods"], claims)
+    else:
+        refusal = (401, "Unauthorized") if claims is None else None
     
-    # Validate the token
-    token = auth_header.replace("Bearer ", "")
-    if not authenticate(token):
-        return web.Response(
-            text=json.dumps({"error": {"code": 401, "message": "Invalid token"}}),
-            status=401,
-            content_type="application/json"
-        )
+    if refusal:
+        return auth_error(*refusal)
     
     # Continue with the request
     return await handler(request)
 
-# Handle RPC requests
-async def handle_rpc(request):
-    """Handle JSON-RPC requests"""
+# Dispatch a JSON-RPC request or batch, shared by the HTTP and WebSocket transports
+async def dispatch_rpc(request_data, payload=None):
+    """
+    Run a JSON-RPC request or batch
+    
+    Args:
+        request_data (str): Request body
+        payload (optional): Request body already decoded, so it is not parsed again
+        
+    Returns:
+        str: Response body, empty for notifications
+    """
     try:
-        # Get the request body
-        request_data = await request.text()
-        logging.info(f"Received RPC request: {request_data}")
+        if payload is None:
+            try:
+                payload = json_codec.loads(request_data)
+            except ValueError:
+                # Left to the dispatcher, which answers with a parse error
+                payload = None
         
-        # Dispatch the request
-        response = await async_dispatch(request_data)
-        logging.info(f"RPC response: {response}")
+        # Bodies are logged as redacted summaries, and in full for a sample of the calls
+        sampled = logger_config.should_sample(float(config_manager.get_setting("rpc_log_sample_rate", 0.0)))
+        max_chars = int(config_manager.get_setting("rpc_log_max_chars", logger_config.MAX_BODY_CHARS))
+        full_max_chars = int(config_manager.get_setting("rpc_log_full_max_chars", logger_config.MAX_FULL_BODY_CHARS))
         
-        # Return the response
-        return web.Response(text=response, content_type="application/json")
+        if isinstance(payload, list):
+            # Refuse oversized batches before running any of them
+            max_batch_size = int(config_manager.get_setting("rpc_max_batch_size", 100))
+            if len(payload) > max_batch_size:
+                logging.warning(f"Rejected RPC batch of {len(payload)} requests (limit {max_batch_size})")
+                return json_codec.dumps({
+                    "jsonrpc": "2.0",
+                    "error": {"code": -32600, "message": f"Batch too large, limit is {max_batch_size} requests"},
+                    "id": None
+                })
+            
+            methods = [item.get("method") for item in payload if isinstance(item, dict)]
+            method = f"batch of {len(payload)}"
+            rpc_logger.info(f"Received RPC batch of {len(payload)} requests: {', '.join(map(str, methods))}")
+            if sampled:
+                logger_config.log_rpc_request(rpc_logger, method, payload, len(request_data), full=True,
+                                              full_max_chars=full_max_chars)
+        elif isinstance(payload, dict):
+            method = payload.get("method")
+            logger_config.log_rpc_request(rpc_logger, method, payload.get("params"), len(request_data),
+                                          full=sampled, max_chars=max_chars, full_max_chars=full_max_chars)
+        else:
+            method = None
+            logger_config.log_rpc_request(rpc_logger, method, request_data, len(request_data), max_chars=max_chars)
+        
+        # Dispatch the already decoded request; the requests of a batch run concurrently
+        started = time.perf_counter()
+        response = await async_dispatch(
+            request_data,
+            deserializer=json_codec.loads if payload is None else lambda _: payload,
+            serializer=json_codec.dumps
+        )
+        logger_config.log_rpc_response(rpc_logger, method, response, time.perf_counter() - started,
+                                       full=sampled, max_chars=max_chars, full_max_chars=full_max_chars)
+        return response
     except Exception as e:
         logging.error(f"Error handling RPC request: {e}")
-        return web.Response(text=json.dumps({
+        return json_codec.dumps({
             "jsonrpc": "2.0",
             "error": {"code": -32603, "message": "Internal error"},
             "id": None
-        }), content_type="application/json")
+        })
+
+# Decode the body of an RPC request once, for the auth middleware and the handler
+async def read_rpc_payload(request):
+    if "rpc_payload" not in request:
+        try:
+            request["rpc_payload"] = json_codec.loads(await request.read())
+        except (ValueError, web.RequestPayloadError):
+            # Answered by the handler, with a parse error or a 400
+            request["rpc_payload"] = None
+    return request["rpc_payload"]
+
+# Handle RPC requests
+async def handle_rpc(request):
+    """Handle JSON-RPC requests, single or batched"""
+    # Get the request body, gunzipped by aiohttp if it was sent compressed
+    try:
+        request_data = await request.text()
+    except web.RequestPayloadError as e:
+        logging.error(f"Error reading RPC request: {e}")
+        return web.Response(
+            text=json.dumps({"error": {"code": 400, "message": "Invalid request body"}}),
+            status=400,
+            content_type="application/json"
+        )
+    response = await dispatch_rpc(request_data, await read_rpc_payload(request))
+    
+    # Notifications, and batches made only of notifications, have no response
+    if not response:
+        return web.Response(status=204)
+    
+    # Return the response, compressed when it is large and the client accepts it
+    return await encode_rpc_response(request, response.encode("utf-8"))
+
+# Build an RPC response, compressing large bodies
+async def encode_rpc_response(request, body):
+    """
+    Build the HTTP response of an RPC call
+    
+    Args:
+        request (web.Request): The RPC request, for its Accept-Encoding
+        body (bytes): JSON response body
+        
+    Returns:
+        web.Response: Response, with a Content-Encoding if the body was compressed
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    min_bytes = int(config_manager.get_setting("rpc_compress_min_bytes", compression.DEFAULT_MIN_BYTES))
+    encoding = compression.choose_encoding(request.headers.get("Accept-Encoding")) if len(body) >= min_bytes else None
+    if encoding:
+        # Megabyte bodies take tens of milliseconds to compress; keep that off the event loop
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, compression.compress, body, encoding)
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+# Handle WebSocket connections
+async def handle_websocket(request):
+    """Speak JSON-RPC over one long-lived connection and push server events to it"""
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    
+    claims = request["claims"]
+    send_lock = asyncio.Lock()
+    in_flight = asyncio.Semaphore(WS_MAX_IN_FLIGHT)
+    pending = set()
+    events = event_hub.subscribe()
+    
+    # The connection ends when its token expires, so it is not used past the token's life
+    expiry = asyncio.get_running_loop().call_later(
+        max(0, claims["exp"] - time.time()),
+        lambda: asyncio.ensure_future(ws.close(code=WSCloseCode.POLICY_VIOLATION, message=b"Token expired"))
+    )
+    
+    def claim_event_owners(payload):
+        """Deliver the events of the credentials and scan jobs a request names to this connection"""
+        for item in (payload if isinstance(payload, list) else [payload]):
+            params = item.get("params") if isinstance(item, dict) else None
+            if not isinstance(params, dict):
+                continue
+            if isinstance(params.get("job_id"), str):
+                event_hub.claim(events, params["job_id"])
+            if isinstance(params.get("credentials_json"), str):
+                try:
+                    event_hub.claim(events, get_credentials_owner(params["credentials_json"]))
+                except Exception:
+                    # Invalid credentials are reported by the method itself
+                    pass
+    
+    def claim_started_jobs(response):
+        """Deliver the events of the scan jobs a response started to this connection"""
+        results = json_codec.loads(response)
+        for item in (results if isinstance(results, list) else [results]):
+            result = item.get("result") if isinstance(item, dict) else None
+            if isinstance(result, dict) and isinstance(result.get("job_id"), str):
+                event_hub.claim(events, result["job_id"])
+    
+    async def send(text):
+        async with send_lock:
+            await ws.send_str(text)
+    
+    async def forward_events():
+        while True:
+            notification = await events.get()
+            await send(json_codec.dumps(notification))
+    
+    async def answer(request_data):
+        try:
+            try:
+                payload = json_codec.loads(request_data)
+            except ValueError:
+                payload = None
+            
+            # Every message is checked against the method policies, like /rpc requests
+            methods = get_rpc_methods(payload) if payload is not None else []
+            refusal = check_access(methods, claims) if payload is not None else None
+            if refusal:
+                error = {"code": refusal[0], "message": refusal[1]}
+                errors = [
+                    {"jsonrpc": "2.0", "error": error, "id": item.get("id")}
+                    for item in (payload if isinstance(payload, list) else [payload]) if isinstance(item, dict)
+                ]
+                if isinstance(payload, list) and errors:
+                    response = json_codec.dumps(errors)
+                else:
+                    # Scalars and lists without request objects get one error without an ID
+                    response = json_codec.dumps(errors[0] if errors else {"jsonrpc": "2.0", "error": error, "id": None})
+            else:
+                claim_event_owners(payload)
+                response = await dispatch_rpc(request_data, payload)
+                if response and SCAN_JOB_METHODS.intersection(methods):
+                    claim_started_jobs(response)
+            if response and not ws.closed:
+                await send(response)
+        except Exception as e:
+            logging.error(f"Error answering WebSocket request: {e}")
+        finally:
+            in_flight.release()
+    
+    forwarder = asyncio.ensure_future(forward_events())
+    logging.info("WebSocket client connected")
+    try:
+        async for message in ws:
+            if message.type == web.WSMsgType.TEXT:
+                # Requests run concurrently and are answered as they finish,
+                # matched by their IDs on the client
+                await in_flight.acquire()
+                task = asyncio.ensure_future(answer(message.data))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            elif message.type == web.WSMsgType.ERROR:
+                logging.error(f"WebSocket connection error: {ws.exception()}")
+    finally:
+        expiry.cancel()
+        event_hub.unsubscribe(events)
+        forwarder.cancel()
+        for task in pending:
+            task.cancel()
+        logging.info("WebSocket client disconnected")
+    return ws
+
+# Handle streamed scans
+async def handle_scan_stream(request):
+    """Run a scan and stream its records as NDJSON while pages are analyzed"""
+    try:
+        params = json_codec.loads(await request.read())
+    except Exception:
+        params = None
+    if not isinstance(params, dict) or not params.get("video_id"):
+        return web.Response(
+            text=json.dumps({"error": {"code": 422, "message": "video_id is required"}}),
+            status=422,
+            content_type="application/json"
+        )
+    
+    # Without credentials the scan runs with the configured API key
+    credentials_json = params.get("credentials_json")
+    if not credentials_json and not config_manager.get_api_key():
+        return web.Response(
+            text=json.dumps({"error": {"code": 403, "message": "No API key or credentials provided"}}),
+            status=403,
+            content_type="application/json"
+        )
+    
+    include_replies = params.get("include_replies")
+    if include_replies is None:
+        include_replies = bool(config_manager.get_setting("scan_replies", False))
+    max_pages = params.get("max_pages") or int(config_manager.get_setting("scan_job_max_pages", 100))
+    
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    response.enable_chunked_encoding()
+    add_cors_headers(response)
+    await response.prepare(request)
+    
+    # The scan runs in a worker thread and hands records over through a bounded
+    # queue, so a slow reader slows the scan down instead of piling up records
+    loop = asyncio.get_running_loop()
+    records = asyncio.Queue(maxsize=64)
+    state = {"connected": True, "closed": False}
+    
+    def emit(record):
+        if not state["connected"]:
+            return False
+        asyncio.run_coroutine_threadsafe(records.put(record), loop).result()
+        return state["connected"]
+    
+    def scan():
+        return stream_scan(
+            create_watch_api(credentials_json),
+            CommentAnalyzer(config_manager),
+            params["video_id"],
+            emit,
+            checkpoint_store=checkpoint_store,
+            scan_id=params.get("scan_id"),
+            include_replies=include_replies,
+            max_pages=int(max_pages),
+            on_flagged=lambda flagged: auto_moderator.submit(flagged, credentials_json, params["video_id"])
+        )
+    
+    def finish(_):
+        # Nobody reads the queue once the handler returned, a put could block forever
+        if not state["closed"]:
+            asyncio.ensure_future(records.put(None))
+    
+    task = loop.run_in_executor(None, scan)
+    task.add_done_callback(finish)
+    logging.info(f"Streaming scan of video {params['video_id']}")
+    
+    try:
+        while True:
+            record = await records.get()
+            if record is None:
+                break
+            if state["connected"]:
+                try:
+                    await response.write(json_codec.dumps_bytes(record) + b"\n")
+                except (ConnectionResetError, RuntimeError):
+                    # The reader went away; keep draining so the scan can stop
+                    state["connected"] = False
+        if state["connected"]:
+            try:
+                await response.write_eof()
+            except (ConnectionResetError, RuntimeError):
+                pass
+    finally:
+        # Unblock the scan thread if this handler is cancelled mid-stream
+        state["connected"] = False
+        state["closed"] = True
+        while not records.empty():
+            records.get_nowait()
+    return response
 
 # Handle token requests
 async def handle_token(request):
@@ -121,7 +415,8 @@ async def handle_token(request):
         valid_password = os.environ.get("API_PASSWORD", "password")
         
         if username == valid_username and password == valid_password:
-            token = create_token({"username": username})
+            role = ROLE_ADMIN if username in get_admin_users() else ROLE_USER
+            token = create_token({"username": username, "role": role})
             return web.Response(
                 text=json.dumps({"token": token}),
                 content_type="application/json"
@@ -140,26 +435,65 @@ async def handle_token(request):
             content_type="application/json"
         )
 
+# Add CORS headers to a response
+def add_cors_headers(response):
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+
 # CORS middleware
 @web.middleware
 async def cors_middleware(request, handler):
     response = await handler(request)
     
-    # Add CORS headers
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    # Streamed responses got their headers before the first record was sent
+    if not response.prepared:
+        add_cors_headers(response)
     
     return response
 
-# Create the application
-app = web.Application(middlewares=[cors_middleware, auth_middleware])
+# Create the application; a 10k-comment analyze_comments request is well over aiohttp's 1 MB default
+app = web.Application(
+    middlewares=[cors_middleware, auth_middleware],
+    client_max_size=int(float(config_manager.get_setting("rpc_max_request_mb", 64)) * 1024 * 1024)
+)
 
 # Add routes
 app.router.add_post("/rpc", handle_rpc)
 app.router.add_post("/token", handle_token)
+app.router.add_post("/stream/scan", handle_scan_stream)
+app.router.add_get("/ws", handle_websocket)
 app.router.add_options("/rpc", lambda request: web.Response())  # Handle CORS preflight
 app.router.add_options("/token", lambda request: web.Response())  # Handle CORS preflight
+app.router.add_options("/stream/scan", lambda request: web.Response())  # Handle CORS preflight
+
+# Run the watchlist monitor and the deletion queue alongside the server,
+# flush quota usage, and pick up configuration changes made by other server workers
+async def start_background_tasks(app):
+    loop = asyncio.get_running_loop()
+    app["background_tasks"] = [
+        loop.create_task(config_manager.run()),
+        loop.create_task(quota_ledger.run()),
+        loop.create_task(moderation_queue.run())
+    ]
+    
+    # One monitor for the whole server, in the primary worker
+    if prefork.is_primary():
+        app["background_tasks"].append(loop.create_task(watchlist_monitor.run()))
+        if not get_admin_users():
+            logging.warning("API_ADMIN_USERS is not set; no user can change the blacklist, whitelist or settings")
+
+async def stop_background_tasks(app):
+    for task in app["background_tasks"]:
+        task.cancel()
+    await asyncio.gather(*app["background_tasks"], return_exceptions=True)
+    scan_jobs.shutdown()
+    video_scan_executor.shutdown(wait=False)
+    # Usage of the calls made while the scans stopped
+    quota_ledger.flush()
+
+app.on_startup.append(start_background_tasks)
+app.on_cleanup.append(stop_background_tasks)
 
 if __name__ == "__main__":
     # Get port from environment or use default
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Prefork Server
+--------------------------
+This module runs the server as several worker processes sharing one port through
+SO_REUSEPORT, so comment analysis uses more than one core. The kernel spreads
+incoming connections over the workers.
+
+Every worker is a separate process with its own copy of the server state. State
+that has to be seen by every worker is handled like this:
+
+- The configuration is reloaded by every worker when its file changes.
+- Scan jobs live in the worker that started them; job IDs carry the worker
+  number, and job calls reaching another worker are forwarded to the owner.
+- The watchlist lives in the primary worker (worker 0), which also runs the
+  watchlist monitor; watchlist calls are forwarded to it.
+
+Workers also listen on a private Unix socket used for those forwarded calls.
+
+The master process restarts workers that exit, and replaces them one at a time
+on SIGHUP (graceful restart): a new worker is started and ready before the old
+one stops accepting connections and finishes its requests. SIGTERM and SIGINT
+stop every worker gracefully. The master never imports the server application,
+so it holds none of the server state.
+"""
+
+import os
+import time
+import shutil
+import signal
+import socket
+import asyncio
+import logging
+import tempfile
+import multiprocessing
+
+import aiohttp
+from aiohttp import web
+
+# Seconds a new worker gets to start listening during a graceful restart
+WORKER_START_TIMEOUT = 60
+
+# Seconds between checks of the worker processes
+SUPERVISE_SECONDS = 0.5
+
+# Number of this worker, None when the server runs as a single process
+WORKER_ID = int(os.environ['STOPJUDOL_WORKER_ID']) if os.environ.get('STOPJUDOL_WORKER_ID') else None
+
+# Directory of the workers' private sockets
+RUN_DIR = os.environ.get('STOPJUDOL_RUN_DIR')
+
+def is_supported():
+    """
+    Check whether the platform can run several workers on one port
+    
+    Returns:
+        bool: True if SO_REUSEPORT is available
+    """
+    return hasattr(socket, 'SO_REUSEPORT') and hasattr(socket, 'AF_UNIX')
+
+def is_primary():
+    """
+    Check whether this process runs the server's singleton tasks
+    
+    Returns:
+        bool: True for a single-process server and for worker 0
+    """
+    return WORKER_ID in (None, 0)
+
+def get_socket_path(worker_id):
+    """
+    Get the private socket of a worker
+    
+    Args:
+        worker_id (int): Worker number
+    
+    Returns:
+        str: Path of the Unix socket
+    """
+    return os.path.join(RUN_DIR, f"worker-{worker_id}.sock")
+
+def get_job_id_prefix():
+    """
+    Get the prefix of the scan job IDs of this process
+    
+    Returns:
+        str: "w<worker>-" for a worker, empty for a single-process server
+    """
+    return f"w{WORKER_ID}-" if WORKER_ID is not None else ""
+
+def get_job_owner(job_id):
+    """
+    Get the worker a scan job runs in
+    
+    Args:
+        job_id (str): Job ID returned by start_scan
+    
+    Returns:
+        int: Worker number, this process's own for IDs without a worker prefix
+    """
+    if WORKER_ID is not None and job_id.startswith('w') and '-' in job_id:
+        number = job_id[1:job_id.index('-')]
+        if number.isdigit():
+            return int(number)
+    return WORKER_ID
+
+async def call_worker(worker_id, method_name, params, token):
+    """
+    Call an RPC method on another worker through its private socket
+    
+    Args:
+        worker_id (int): Worker to call
+        method_name (str): RPC method
+        params (dict): Method parameters
+        token (str): Authentication token of the call
+    
+    Returns:
+        dict: JSON-RPC response of the worker
+    """
+    connector = aiohttp.UnixConnector(path=get_socket_path(worker_id))
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.post(
+            "http://worker/rpc",
+            json={"jsonrpc": "2.0", "method": method_name, "params": params, "id": 1},
+            headers={"Authorization": f"Bearer {token}"}
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Worker {worker_id} answered with HTTP {response.status}")
+            return await response.json(content_type=None)
+
+def install_uvloop():
+    """
+    Run asyncio on uvloop when it is installed
+    
+    Returns:
+        bool: True if uvloop is used
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logging.warning("uvloop is not installed, using the default event loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+async def serve_worker(app, host, port, ready):
+    """
+    Serve the application on the shared port and the private socket until SIGTERM
+    
+    Args:
+        app (web.Application): Server application
+        host (str): Interface to listen on
+        port (int): Port shared by the workers
+        ready: multiprocessing.Event set once the worker accepts connections
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port, reuse_port=True).start()
+    await web.UnixSite(runner, get_socket_path(WORKER_ID)).start()
+    ready.set()
+    logging.info(f"Worker {WORKER_ID} (pid {os.getpid()}) listening on {host}:{port}")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+    
+    # Stop accepting connections, let running requests finish, run the cleanup
+    logging.info(f"Worker {WORKER_ID} stopping")
+    await runner.cleanup()
+
+def run_worker(worker_id, host, port, run_dir, use_uvloop, ready):
+    """
+    Entry point of a worker process; its number and run directory are also in the
+    environment it was started with
+    
+    Args:
+        worker_id (int): Worker number
+        host (str): Interface to listen on
+        port (int): Port shared by the workers
+        run_dir (str): Directory of the workers' private sockets
+        use_uvloop (bool): Run on uvloop when it is installed
+        ready: multiprocessing.Event set once the worker accepts connections
+    """
+    if use_uvloop:
+        install_uvloop()
+    
+    from .main import app
+    asyncio.run(serve_worker(app, host, port, ready))
+
+class PreforkServer:
+    """Master process starting, supervising and restarting the workers"""
+    
+    def __init__(self, host, port, workers, use_uvloop=False):
+        """
+        Initialize the master
+        
+        Args:
+            host (str): Interface to listen on
+            port (int): Port shared by the workers
+            workers (int): Number of worker processes
+            use_uvloop (bool, optional): Run the workers on uvloop when it is installed
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.use_uvloop = use_uvloop
+        self.context = multiprocessing.get_context('spawn')
+        self.run_dir = tempfile.mkdtemp(prefix='stopjudol-')
+        self.processes = {}  # worker number -> process
+        self.stopping = False
+        self.restart_requested = False
+    
+    def start_worker(self, worker_id):
+        """
+        Start a worker process and wait until it accepts connections
+        
+        Args:
+            worker_id (int): Worker number
+        
+        Returns:
+            multiprocessing.Process: The worker, or None if it did not start
+        """
+        ready = self.context.Event()
+        process = self.context.Process(
+            target=run_worker,
+            args=(worker_id, self.host, self.port, self.run_dir, self.use_uvloop, ready),
+            name=f"stopjudol-worker-{worker_id}"
+        )
+        
+        # The worker inherits the environment when it starts, before any server
+        # module (including the runner script, imported again by spawn) reads it
+        os.environ['STOPJUDOL_WORKER_ID'] = str(worker_id)
+        os.environ['STOPJUDOL_RUN_DIR'] = self.run_dir
+        try:
+            process.start()
+        finally:
+            del os.environ['STOPJUDOL_WORKER_ID']
+            del os.environ['STOPJUDOL_RUN_DIR']
+        
+        deadline = time.time() + WORKER_START_TIMEOUT
+        while not ready.wait(SUPERVISE_SECONDS):
+            if not process.is_alive() or time.time() > deadline:
+                logging.error(f"Worker {worker_id} failed to start")
+                process.terminate()
+                process.join()
+                return None
+        return process
+    
+    def stop_worker(self, process):
+        """Stop a worker gracefully and wait for it to exit"""
+        if process.is_alive():
+            os.kill(process.pid, signal.SIGTERM)
+        process.join()
+    
+    def restart_workers(self):
+        """Replace the workers one at a time, so the port keeps being served"""
+        logging.info("Gracefully restarting workers")
+        for worker_id in sorted(self.processes):
+            process = self.start_worker(worker_id)
+            if process is None:
+                logging.error(f"Keeping the old worker {worker_id}")
+                continue
+            self.stop_worker(self.processes[worker_id])
+            self.processes[worker_id] = process
+    
+    def run(self):
+        """Run the workers until SIGTERM or SIGINT"""
+        def stop(signum, frame):
+            self.stopping = True
+        
+        def restart(signum, frame):
+            self.restart_requested = True
+        
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, restart)
+        
+        for worker_id in range(self.workers):
+            process = self.start_worker(worker_id)
+            if process is None:
+                self.stopping = True
+                break
+            self.processes[worker_id] = process
+        logging.info(f"Started {len(self.processes)} workers on {self.host}:{self.port}")
+        
+        while not self.stopping:
+            if self.restart_requested:
+                self.restart_requested = False
+                self.restart_workers()
+            
+            # Replace workers that exited on their own
+            for worker_id, process in list(self.processes.items()):
+                if not process.is_alive() and not self.stopping:
+                    logging.error(f"Worker {worker_id} exited with code {process.exitcode}, restarting it")
+                    self.processes[worker_id] = self.start_worker(worker_id) or process
+            time.sleep(SUPERVISE_SECONDS)
+        
+        logging.info("Stopping workers")
+        for process in self.processes.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+        for process in self.processes.values():
+            process.join()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+def run(host, port, workers=1, use_uvloop=False):
+    """
+    Run the server, with several workers when asked and supported
+    
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        workers (int, optional): Number of worker processes
+        use_uvloop (bool, optional): Run on uvloop when it is installed
+    """
+    if workers > 1 and not is_supported():
+        logging.warning("Several workers need SO_REUSEPORT, which this platform lacks; running one process")
+        workers = 1
+    
+    if workers <= 1:
+        if use_uvloop:
+            install_uvloop()
+        from .main import app
+        web.run_app(app, host=host, port=port)
+        return
+    
+    PreforkServer(host, port, workers, use_uvloop).run()
@@ -11,6 +11,7 @@ import os
 import jwt
 import time
 import logging
+import threading
 from datetime import datetime, timedelta
 
 # Get JWT secret key from environment or use default (in production, always use environment variable)
@@ -18,6 +19,35 @@ SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "StopJudol_Secret_Key_Change_This_
 ALGORITHM = "HS256"
 TOKEN_EXPIRE_HOURS = 24  # Token expires after 24 hours
 
+# Access levels of RPC methods
+PUBLIC = "public"
+AUTHENTICATED = "authenticated"
+ADMIN = "admin"
+
+# Roles carried in the "role" claim of a token
+ROLE_USER = "user"
+ROLE_ADMIN = "admin"
+
+# Access level of every RPC method; methods not listed need a valid token
+METHOD_POLICIES = {
+    "extract_video_id": PUBLIC,
+    "get_blacklist": PUBLIC,
+    "get_whitelist": PUBLIC,
+    "get_setting": PUBLIC,
+    "add_blacklist_term": ADMIN,
+    "remove_blacklist_term": ADMIN,
+    "add_whitelist_term": ADMIN,
+    "remove_whitelist_term": ADMIN,
+    "set_setting": ADMIN,
+}
+DEFAULT_POLICY = AUTHENTICATED
+
+# Verified tokens remembered, so a token's signature is checked once
+TOKEN_CACHE_SIZE = 1024
+
+_token_cache = {}  # token -> verified claims
+_token_cache_lock = threading.Lock()
+
 def create_token(data: dict):
     """
     Create a JWT token
@@ -38,29 +68,100 @@ def create_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate(token: str) -> bool:
+def verify_token(token: str):
     """
-    Authenticate a JWT token
+    Verify a JWT token, remembering its claims until it expires
     
     Args:
         token (str): JWT token
         
     Returns:
-        bool: True if token is valid, False otherwise
+        dict: Claims of the token, or None if it is invalid or expired
     """
+    now = time.time()
+    with _token_cache_lock:
+        claims = _token_cache.get(token)
+    if claims is not None:
+        if now <= claims["exp"]:
+            return claims
+        with _token_cache_lock:
+            _token_cache.pop(token, None)
+        return None
+    
     try:
         # Decode and verify the token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        
-        # Check if token is expired
-        expiration = payload.get("exp")
-        if expiration is None:
-            return False
-            
-        if time.time() > expiration:
-            return False
-            
-        return True
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError as e:
         logging.error(f"JWT authentication error: {e}")
-        return False
+        return None
+    
+    # Check if token is expired
+    expiration = claims.get("exp")
+    if expiration is None or now > expiration:
+        return None
+    
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_SIZE:
+            # Forget expired tokens first, then the oldest ones
+            for cached_token in [t for t, c in _token_cache.items() if now > c["exp"]]:
+                del _token_cache[cached_token]
+            while len(_token_cache) >= TOKEN_CACHE_SIZE:
+                del _token_cache[next(iter(_token_cache))]
+        _token_cache[token] = claims
+    return claims
+
+def authenticate(token: str) -> bool:
+    """
+    Authenticate a JWT token
+    
+    Args:
+        token (str): JWT token
+        
+    Returns:
+        bool: True if token is valid, False otherwise
+    """
+    return verify_token(token) is not None
+
+def get_admin_users():
+    """
+    Get the users granted the admin role
+    
+    Returns:
+        set: Usernames listed in API_ADMIN_USERS, comma-separated; empty when it
+            is not set, so no user is an admin by default
+    """
+    return {user.strip() for user in os.environ.get("API_ADMIN_USERS", "").split(",") if user.strip()}
+
+def get_rpc_methods(payload):
+    """
+    Get the method names of a JSON-RPC request or batch
+    
+    Args:
+        payload: Decoded request body
+        
+    Returns:
+        list: Method names, one per request; None for requests without a method
+    """
+    requests_data = payload if isinstance(payload, list) else [payload]
+    return [item.get("method") if isinstance(item, dict) else None for item in requests_data]
+
+def check_access(methods, claims):
+    """
+    Check calls against the method policies
+    
+    Args:
+        methods (list): Method names of the calls
+        claims (dict): Claims of the caller's token, or None without a valid token
+        
+    Returns:
+        tuple: (HTTP status, message) of the refusal, or None if every call is allowed
+    """
+    policies = [METHOD_POLICIES.get(method, DEFAULT_POLICY) for method in methods]
+    if claims is None and (not policies or any(policy != PUBLIC for policy in policies)):
+        return 401, "Unauthorized"
+    if ADMIN in policies and claims.get("role") != ROLE_ADMIN:
+        if "role" not in claims:
+            # Issued before tokens carried a role; logging in again gets one
+            return 401, "Token has no role, log in again"
+        return 403, "Forbidden"
+    return None
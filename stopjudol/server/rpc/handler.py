@@ -7,49 +7,356 @@ StopJudol - JSON-RPC Handler
 This module provides the JSON-RPC methods for the StopJudol server.
 """
 
+import os
+import time
+import asyncio
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from jsonrpcserver import method, Success, Error
+from .. import prefork
+from .auth import create_token
 from ..core.youtube_api import YouTubeAPI
 from ..core.analysis import CommentAnalyzer
 from ..core.config_manager import ConfigManager
+from ..core.quota_ledger import QuotaLedger
+from ..core.page_cache import CommentPageCache
+from ..core.scan_checkpoint import ScanCheckpointStore
+from ..core.retry import RetryPolicy, CircuitBreaker
+from ..core.scan_scheduler import RateLimiter, ScanScheduler, resolve_video_ids
+from ..core.shared_cache import SharedCommentCache
+from ..core.watchlist import WatchlistMonitor
+from ..core.auto_moderation import AutoModerator
+from ..core.moderation_queue import ModerationQueue, get_credentials_owner
+from ..core.capability_cache import ModerationCapabilityCache
+from ..core.scan_jobs import ScanJobManager
+from ..core.events import EventHub
 from google.oauth2.credentials import Credentials
 import json
 
 # Initialize the config manager
 config_manager = ConfigManager()
 
+# Scan progress, deletion progress and ruleset changes pushed to WebSocket clients;
+# progress only reaches the connections that claimed its credentials or scan job
+event_hub = EventHub()
+config_manager.add_listener(lambda section, change: event_hub.publish('ruleset_changed', dict(change, section=section)))
+
+# Shared ledger of YouTube API quota usage
+quota_ledger = QuotaLedger(config_manager)
+
+# On-disk cache of comment pages, revalidated with etags on rescans
+page_cache = CommentPageCache(
+    os.path.join(config_manager.user_config_dir, 'cache', 'comment_pages'),
+    max_bytes=int(config_manager.get_setting('page_cache_max_mb', 50)) * 1024 * 1024
+)
+
+# Page-token checkpoints of unfinished scans
+checkpoint_store = ScanCheckpointStore(os.path.join(config_manager.user_config_dir, 'cache', 'scan_checkpoints'))
+
+# Retry policy shared by every API wrapper so the circuit breaker sees all calls
+retry_policy = RetryPolicy(breaker=CircuitBreaker())
+
+# Comments of public videos shared by every client, so concurrent and repeated
+# scans of the same video cost one upstream fetch
+shared_cache = SharedCommentCache(
+    ttl_seconds=float(config_manager.get_setting('shared_cache_ttl_seconds', 300)),
+    max_bytes=int(config_manager.get_setting('shared_cache_max_mb', 64)) * 1024 * 1024
+)
+
+# Request budget shared by every API wrapper, including parallel scan workers
+rate_limiter = RateLimiter(float(config_manager.get_setting('scan_rate_limit', 10)))
+
+# Moderation path that worked per channel and credentials, so deletions skip known failures
+capability_cache = ModerationCapabilityCache(
+    ttl_seconds=float(config_manager.get_setting('capability_cache_ttl_seconds', 3600))
+)
+
+def create_youtube_api(credentials_json):
+    """
+    Create a YouTube API wrapper from a credentials JSON string
+    
+    Args:
+        credentials_json (str): OAuth credentials as JSON string
+        
+    Returns:
+        YouTubeAPI: API wrapper that records its quota usage in the shared ledger
+    """
+    credentials_data = json.loads(credentials_json)
+    credentials = Credentials.from_authorized_user_info(credentials_data)
+    return YouTubeAPI(credentials, quota_ledger=quota_ledger, page_cache=page_cache,
+                      retry_policy=retry_policy, rate_limiter=rate_limiter,
+                      api_base_url=config_manager.get_setting('youtube_api_base_url'),
+                      capability_cache=capability_cache)
+
+def create_watch_api(credentials_json=None):
+    """
+    Create the API wrapper of a watchlist check
+    
+    Args:
+        credentials_json (str, optional): OAuth credentials as JSON string; the
+            configured API key is used without them
+        
+    Returns:
+        YouTubeAPI: API wrapper sharing the quota ledger, caches and budgets
+    
+    Raises:
+        Exception: If neither credentials nor an API key are available
+    """
+    if credentials_json:
+        return create_youtube_api(credentials_json)
+    api_key = config_manager.get_api_key()
+    if not api_key:
+        raise Exception("No API key or credentials provided")
+    return YouTubeAPI(None, quota_ledger=quota_ledger, page_cache=page_cache,
+                      retry_policy=retry_policy, rate_limiter=rate_limiter,
+                      api_base_url=config_manager.get_setting('youtube_api_base_url'),
+                      api_key=api_key)
+
+def on_deletions_processed(items, owner):
+    """
+    Report the state of a processed batch of the deletion queue
+    
+    Args:
+        items (list): State of every comment of the batch
+        owner (str): Owner key of the credentials of the batch
+    """
+    event_hub.publish('deletion_progress', {'items': items}, owners=[owner])
+    auto_moderator.on_processed(items)
+
+def on_scan_progress(status, credentials_json):
+    """
+    Report the progress of a scan job
+    
+    Args:
+        status (dict): Progress of the job
+        credentials_json (str): OAuth credentials the job runs with, or None
+    """
+    owners = [status['job_id']]
+    if credentials_json:
+        owners.append(get_credentials_owner(credentials_json))
+    event_hub.publish('scan_progress', status, owners=owners)
+
+# Durable queue of deletions that survives restarts and retries failures
+moderation_queue = ModerationQueue(
+    os.path.join(config_manager.user_config_dir, 'moderation_queue.db'),
+    create_youtube_api,
+    on_processed=on_deletions_processed
+)
+
+# Moderation of confidently flagged comments through the deletion queue, enabled by auto_delete
+auto_moderator = AutoModerator(config_manager, moderation_queue)
+
+# Background rescans of watched videos, enabled by check_interval_seconds
+watchlist_monitor = WatchlistMonitor(
+    config_manager,
+    create_watch_api,
+    lambda: CommentAnalyzer(config_manager),
+    quota_ledger=quota_ledger,
+    on_flagged=lambda video_id, flagged, credentials_json: auto_moderator.submit(flagged, credentials_json, video_id)
+)
+
+# Videos of every multi-video scan run on one pool, so scan_concurrency bounds
+# the whole server rather than each scan
+video_scan_executor = ThreadPoolExecutor(
+    max_workers=max(1, int(config_manager.get_setting('scan_concurrency', 4))),
+    thread_name_prefix='scan'
+)
+
+# Background scans polled by the client, so no request stays open for a whole scan
+scan_jobs = ScanJobManager(
+    create_watch_api,
+    lambda: CommentAnalyzer(config_manager),
+    checkpoint_store=checkpoint_store,
+    on_flagged=lambda video_id, flagged, credentials_json: auto_moderator.submit(flagged, credentials_json, video_id),
+    on_progress=on_scan_progress,
+    concurrency=int(config_manager.get_setting('scan_job_concurrency', 4)),
+    max_age_seconds=float(config_manager.get_setting('scan_job_ttl_seconds', 3600)),
+    id_prefix=prefork.get_job_id_prefix(),
+    comment_cache=shared_cache
+)
+
+# Token of the calls this worker forwards to other workers, renewed well before it expires
+WORKER_TOKEN_MAX_AGE_SECONDS = 3600
+worker_token = {'token': None, 'created_at': 0}
+
+async def call_worker(worker_id, method_name, **params):
+    """
+    Run an RPC method on the server worker that holds its state
+    
+    Args:
+        worker_id (int): Worker to run the method on
+        method_name (str): RPC method
+        **params: Method parameters
+        
+    Returns:
+        Success or Error: Result of the method on that worker
+    """
+    if time.time() - worker_token['created_at'] > WORKER_TOKEN_MAX_AGE_SECONDS:
+        worker_token['token'] = create_token({"username": f"worker-{prefork.WORKER_ID}"})
+        worker_token['created_at'] = time.time()
+    
+    response = await prefork.call_worker(worker_id, method_name, params, worker_token['token'])
+    if 'error' in response:
+        return Error(response['error'].get('code', 500), response['error'].get('message'))
+    return Success(response.get('result'))
+
 @method
-async def fetch_comments(video_id: str, credentials_json: str = None):
+async def fetch_comments(video_id: str, credentials_json: str = None, scan_id: str = None,
+                         include_replies: bool = None):
     """
     Fetch comments for a YouTube video
     
     Args:
         video_id (str): YouTube video ID
         credentials_json (str, optional): OAuth credentials as JSON string
+        scan_id (str, optional): Scan ID; retrying a failed scan with the same ID
+            resumes from the last fetched page
+        include_replies (bool, optional): Also fetch replies, defaults to the
+            scan_replies setting
         
     Returns:
         dict: API response containing comments
     """
     try:
-        # Initialize YouTube API with credentials if provided
-        if credentials_json:
-            credentials_data = json.loads(credentials_json)
-            credentials = Credentials.from_authorized_user_info(credentials_data)
-            youtube_api = YouTubeAPI(credentials)
-        else:
-            # Use API key instead (limited functionality)
-            api_key = config_manager.get_api_key()
-            if not api_key:
-                return Error(403, "No API key or credentials provided")
-            youtube_api = YouTubeAPI(None)  # TODO: Implement API key support
+        # Initialize YouTube API with credentials if provided, otherwise with the API key
+        if not credentials_json and not config_manager.get_api_key():
+            return Error(403, "No API key or credentials provided")
+        youtube_api = create_watch_api(credentials_json)
             
-        # Get comments
-        comments = youtube_api.get_all_comments(video_id)
+        if include_replies is None:
+            include_replies = bool(config_manager.get_setting('scan_replies', False))
+            
+        def fetch():
+            comments = youtube_api.get_all_comments(
+                video_id, checkpoint_store=checkpoint_store, scan_id=scan_id, include_replies=include_replies
+            )
+            # Only public videos have the same comments for every reader
+            return comments, youtube_api.is_public_video(video_id)
+        
+        # Get comments, sharing the fetch with other clients scanning the same video
+        loop = asyncio.get_running_loop()
+        comments = await loop.run_in_executor(
+            None, shared_cache.get_or_fetch, (video_id, include_replies), fetch
+        )
         return Success(comments)
     except Exception as e:
         logging.error(f"Error fetching comments: {e}")
         return Error(500, str(e))
 
+@method
+async def start_scan(video_id: str, credentials_json: str = None, scan_id: str = None,
+                     include_replies: bool = None, max_pages: int = None):
+    """
+    Start fetching and analyzing the comments of a video in the background
+    
+    Args:
+        video_id (str): YouTube video ID
+        credentials_json (str, optional): OAuth credentials as JSON string; the
+            configured API key is used without them
+        scan_id (str, optional): Scan ID; reusing the ID of a failed job resumes
+            from the last fetched page
+        include_replies (bool, optional): Also scan replies, defaults to the
+            scan_replies setting
+        max_pages (int, optional): Most comment pages to fetch, defaults to the
+            scan_job_max_pages setting
+        
+    Returns:
+        dict: Job ID and progress of the new job
+    """
+    try:
+        # Reject up front, the job would otherwise only fail in the background
+        if not credentials_json and not config_manager.get_api_key():
+            return Error(403, "No API key or credentials provided")
+        if include_replies is None:
+            include_replies = bool(config_manager.get_setting('scan_replies', False))
+        if max_pages is None:
+            max_pages = int(config_manager.get_setting('scan_job_max_pages', 100))
+        
+        status = scan_jobs.start(video_id, credentials_json, scan_id, include_replies, max_pages)
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error starting scan: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_job_status(job_id: str):
+    """
+    Get the progress of a scan job
+    
+    Args:
+        job_id (str): Job ID returned by start_scan
+        
+    Returns:
+        dict: Status, pages fetched, comments analyzed and flagged so far
+    """
+    try:
+        # Jobs live in the worker that started them
+        owner = prefork.get_job_owner(job_id)
+        if owner != prefork.WORKER_ID:
+            return await call_worker(owner, "get_job_status", job_id=job_id)
+        
+        status = scan_jobs.get_status(job_id)
+        if status is None:
+            return Error(404, "Job not found")
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error getting job status: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    """
+    Get a page of the comments a scan job flagged so far
+    
+    Args:
+        job_id (str): Job ID returned by start_scan
+        offset (int, optional): Index of the first flagged comment to return
+        limit (int, optional): Most flagged comments to return, at most 500
+        
+    Returns:
+        dict: Flagged comments and the offset of the next page, None once the
+            job finished and every flagged comment was returned
+    """
+    try:
+        # Jobs live in the worker that started them
+        owner = prefork.get_job_owner(job_id)
+        if owner != prefork.WORKER_ID:
+            return await call_worker(owner, "get_job_results", job_id=job_id, offset=offset, limit=limit)
+        
+        results = scan_jobs.get_results(job_id, offset, limit)
+        if results is None:
+            return Error(404, "Job not found")
+        return Success(results)
+    except Exception as e:
+        logging.error(f"Error getting job results: {e}")
+        return Error(500, str(e))
+
+@method
+async def cancel_job(job_id: str):
+    """
+    Stop a scan job after the page it is fetching
+    
+    Args:
+        job_id (str): Job ID returned by start_scan
+        
+    Returns:
+        dict: Progress of the job; comments flagged so far stay available
+    """
+    try:
+        # Jobs live in the worker that started them
+        owner = prefork.get_job_owner(job_id)
+        if owner != prefork.WORKER_ID:
+            return await call_worker(owner, "cancel_job", job_id=job_id)
+        
+        status = scan_jobs.cancel(job_id)
+        if status is None:
+            return Error(404, "Job not found")
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error cancelling job: {e}")
+        return Error(500, str(e))
+
 @method
 async def analyze_comments(comments: list):
     """
@@ -70,7 +377,96 @@ async def analyze_comments(comments: list):
         return Error(500, str(e))
 
 @method
-async def delete_comment(comment_id: str, thread_id: str = None, credentials_json: str = None):
+async def scan_channel(credentials_json: str = None, channel_id: str = None, published_after: str = None,
+                       max_items: int = None, include_replies: bool = None):
+    """
+    Scan the comments on every video of a channel and analyze them
+    
+    Args:
+        credentials_json (str): OAuth credentials as JSON string
+        channel_id (str, optional): YouTube channel ID, defaults to the authenticated user's channel
+        published_after (str, optional): Only scan comments newer than this RFC 3339
+            timestamp, usually the watermark returned by the previous scan
+        max_items (int, optional): Maximum number of comment threads to scan
+        include_replies (bool, optional): Also scan replies, defaults to the
+            scan_replies setting
+        
+    Returns:
+        dict: Flagged comments, scan counters and the new watermark
+    """
+    try:
+        if not credentials_json:
+            return Error(401, "Credentials required for channel scans")
+        
+        if max_items is None:
+            max_items = int(config_manager.get_setting('max_channel_scan_items', 1000))
+        if include_replies is None:
+            include_replies = bool(config_manager.get_setting('scan_replies', False))
+        
+        youtube_api = create_youtube_api(credentials_json)
+        analyzer = CommentAnalyzer(config_manager)
+        
+        # The scan fetches page after page, so it runs off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, functools.partial(
+            youtube_api.scan_channel, analyzer, channel_id, published_after, max_items, include_replies
+        ))
+        auto_moderator.submit(result['flagged'], credentials_json)
+        return Success(result)
+    except Exception as e:
+        logging.error(f"Error scanning channel: {e}")
+        return Error(500, str(e))
+
+@method
+async def scan_videos(credentials_json: str = None, video_ids: list = None, playlist_ids: list = None,
+                      channel_ids: list = None, scan_id: str = None, include_replies: bool = None):
+    """
+    Start scanning several videos in parallel in the background
+    
+    Args:
+        credentials_json (str): OAuth credentials as JSON string
+        video_ids (list, optional): Video IDs or URLs
+        playlist_ids (list, optional): Playlist IDs; every video in them is scanned
+        channel_ids (list, optional): Channel IDs; every upload of the channel is scanned
+        scan_id (str, optional): Scan ID; retrying a failed job with the same ID
+            resumes where it stopped
+        include_replies (bool, optional): Also scan replies, defaults to the
+            scan_replies setting
+        
+    Returns:
+        dict: Job ID and progress of the new job, polled like start_scan jobs
+    """
+    try:
+        if not credentials_json:
+            return Error(401, "Credentials required for multi-video scans")
+        
+        loop = asyncio.get_running_loop()
+        youtube_api = create_youtube_api(credentials_json)
+        max_videos = int(config_manager.get_setting('max_videos_per_scan', 50))
+        targets = await loop.run_in_executor(None, functools.partial(
+            resolve_video_ids, youtube_api, video_ids, playlist_ids, channel_ids, max_videos
+        ))
+        if not targets:
+            return Error(422, "No videos to scan")
+        if include_replies is None:
+            include_replies = bool(config_manager.get_setting('scan_replies', False))
+        
+        scheduler = ScanScheduler(
+            lambda: create_youtube_api(credentials_json),
+            CommentAnalyzer(config_manager),
+            checkpoint_store=checkpoint_store,
+            include_replies=include_replies,
+            executor=video_scan_executor
+        )
+        status = scan_jobs.start_videos(targets, scheduler, credentials_json, scan_id)
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error scanning videos: {e}")
+        return Error(500, str(e))
+
+@method
+async def delete_comment(comment_id: str, thread_id: str = None, credentials_json: str = None,
+                         channel_id: str = None):
     """
     Delete a YouTube comment
     
@@ -78,6 +474,8 @@ async def delete_comment(comment_id: str, thread_id: str = None, credentials_jso
         comment_id (str): Comment ID to delete
         thread_id (str, optional): Comment thread ID, used for moderation
         credentials_json (str): OAuth credentials as JSON string
+        channel_id (str, optional): Channel the comment belongs to; lets repeated
+            deletions skip moderation paths that failed on it before
         
     Returns:
         dict: Result of the deletion operation
@@ -86,16 +484,123 @@ async def delete_comment(comment_id: str, thread_id: str = None, credentials_jso
         if not credentials_json:
             return Error(401, "Credentials required for deletion")
             
-        credentials_data = json.loads(credentials_json)
-        credentials = Credentials.from_authorized_user_info(credentials_data)
-        youtube_api = YouTubeAPI(credentials)
+        youtube_api = create_youtube_api(credentials_json)
         
-        result = youtube_api.delete_comment(comment_id, thread_id)
+        # Off the event loop, so the deletions of a JSON-RPC batch overlap
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, youtube_api.delete_comment, comment_id, thread_id, channel_id)
         return Success(result)
     except Exception as e:
         logging.error(f"Error deleting comment: {e}")
         return Error(500, str(e))
 
+@method
+async def delete_comments(comments: list, credentials_json: str = None):
+    """
+    Delete multiple YouTube comments using batched YouTube API requests
+    
+    Args:
+        comments (list): List of {"comment_id": str, "thread_id": str, "channel_id": str}
+            objects; channel_id is optional
+        credentials_json (str): OAuth credentials as JSON string
+        
+    Returns:
+        list: One deletion result per comment, in the same order
+    """
+    try:
+        if not credentials_json:
+            return Error(401, "Credentials required for deletion")
+            
+        youtube_api = create_youtube_api(credentials_json)
+        
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, youtube_api.delete_comments, comments)
+        return Success(results)
+    except Exception as e:
+        logging.error(f"Error deleting comments: {e}")
+        return Error(500, str(e))
+
+@method
+async def enqueue_deletions(comments: list, credentials_json: str = None):
+    """
+    Queue comments for deletion and return immediately
+    
+    The server deletes the queued comments in batches in the background, retries
+    failures and resumes after a restart. Comments that are already queued are
+    skipped, so the same list can be sent again safely.
+    
+    Args:
+        comments (list): List of {"comment_id": str, "thread_id": str} objects
+        credentials_json (str): OAuth credentials as JSON string
+        
+    Returns:
+        dict: Number of comments queued and of duplicates that were skipped
+    """
+    try:
+        if not credentials_json:
+            return Error(401, "Credentials required for deletion")
+        
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, moderation_queue.enqueue, comments, credentials_json)
+        return Success(result)
+    except Exception as e:
+        logging.error(f"Error queueing deletions: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_moderation_queue_status(credentials_json: str = None, comment_ids: list = None):
+    """
+    Get the state of the deletions queued with the given credentials
+    
+    Passing credentials also lets deletions queued before a server restart resume.
+    
+    Args:
+        credentials_json (str): OAuth credentials as JSON string; only their deletions
+            are counted and returned
+        comment_ids (list, optional): Comment IDs to return the state of
+        
+    Returns:
+        dict: Counts per status, deletions waiting for credentials and the state
+            of the given comments
+    """
+    try:
+        if not credentials_json:
+            return Error(403, "Credentials required")
+        moderation_queue.register_credentials(credentials_json)
+        
+        loop = asyncio.get_running_loop()
+        status = await loop.run_in_executor(None, moderation_queue.get_status, credentials_json, comment_ids)
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error getting moderation queue status: {e}")
+        return Error(500, str(e))
+
+@method
+async def moderate_comments(comment_ids: list, moderation_status: str = "rejected", credentials_json: str = None):
+    """
+    Set the moderation status of multiple comments using multi-ID requests
+    
+    Args:
+        comment_ids (list): Comment IDs to moderate
+        moderation_status (str, optional): rejected, published or heldForReview
+        credentials_json (str): OAuth credentials as JSON string
+        
+    Returns:
+        dict: Mapping of comment ID to moderation success
+    """
+    try:
+        if not credentials_json:
+            return Error(401, "Credentials required for moderation")
+            
+        youtube_api = create_youtube_api(credentials_json)
+        
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, youtube_api.moderate_comments, comment_ids, moderation_status)
+        return Success(results)
+    except Exception as e:
+        logging.error(f"Error moderating comments: {e}")
+        return Error(500, str(e))
+
 @method
 async def get_channel_info(credentials_json: str):
     """
@@ -111,11 +616,10 @@ async def get_channel_info(credentials_json: str):
         if not credentials_json:
             return Error(401, "Credentials required")
             
-        credentials_data = json.loads(credentials_json)
-        credentials = Credentials.from_authorized_user_info(credentials_data)
-        youtube_api = YouTubeAPI(credentials)
+        youtube_api = create_youtube_api(credentials_json)
         
-        channel_name = youtube_api.get_channel_name()
+        loop = asyncio.get_running_loop()
+        channel_name = await loop.run_in_executor(None, youtube_api.get_channel_name)
         return Success({"channel_name": channel_name})
     except Exception as e:
         logging.error(f"Error getting channel info: {e}")
@@ -314,10 +818,9 @@ async def check_api_quota(credentials_json: str = None):
     try:
         # If credentials were provided, use them
         if credentials_json:
-            credentials_data = json.loads(credentials_json)
-            credentials = Credentials.from_authorized_user_info(credentials_data)
-            youtube_api = YouTubeAPI(credentials)
-            quota_available = youtube_api.check_api_quota()
+            youtube_api = create_youtube_api(credentials_json)
+            loop = asyncio.get_running_loop()
+            quota_available = await loop.run_in_executor(None, youtube_api.check_api_quota)
             return Success(quota_available)
         
         # If no credentials provided, we'll just return success
@@ -327,6 +830,134 @@ async def check_api_quota(credentials_json: str = None):
         logging.error(f"Error checking API quota: {e}")
         return Error(500, str(e))
 
+@method
+async def get_quota_status(credentials_json: str = None, planned_pages: int = 0, planned_deletions: int = 0):
+    """
+    Get today's YouTube API quota usage and a cost forecast
+    
+    Args:
+        credentials_json (str, optional): OAuth credentials as JSON string, used to
+            identify the project the quota is billed to
+        planned_pages (int, optional): Comment pages of a planned scan
+        planned_deletions (int, optional): Comments of a planned deletion batch
+        
+    Returns:
+        dict: Units used, units remaining and forecast for the planned work
+    """
+    try:
+        project = 'default'
+        if credentials_json:
+            project = json.loads(credentials_json).get('client_id') or 'default'
+        
+        status = quota_ledger.get_status(project, planned_pages, planned_deletions)
+        return Success(status)
+    except Exception as e:
+        logging.error(f"Error getting quota status: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_api_health():
+    """
+    Get the retry, circuit breaker and cache counters of the YouTube API calls
+    
+    Returns:
+        dict: Calls, retries, calls that gave up, circuit breaker state, shared cache,
+            capability cache and WebSocket event stats of the worker that answered
+    """
+    try:
+        stats = retry_policy.get_stats()
+        stats['shared_cache'] = shared_cache.get_stats()
+        stats['capability_cache'] = capability_cache.get_stats()
+        stats['events'] = event_hub.get_stats()
+        stats['worker'] = prefork.WORKER_ID
+        return Success(stats)
+    except Exception as e:
+        logging.error(f"Error getting API health: {e}")
+        return Error(500, str(e))
+
+@method
+async def watch_video(video_id: str, credentials_json: str = None):
+    """
+    Add a video to the watchlist of the background monitor
+    
+    Args:
+        video_id (str): YouTube video ID
+        credentials_json (str, optional): OAuth credentials as JSON string; kept in
+            memory only, so watching again after a server restart supplies them anew
+        
+    Returns:
+        dict: Watchlist entry of the video
+    """
+    try:
+        # The watchlist lives in the primary worker, which runs the monitor
+        if not prefork.is_primary():
+            return await call_worker(0, "watch_video", video_id=video_id, credentials_json=credentials_json)
+        
+        entry = watchlist_monitor.watch(video_id, credentials_json)
+        if not watchlist_monitor.is_enabled():
+            logging.warning("Watchlist monitor is disabled, set check_interval_seconds to enable it")
+        return Success(entry)
+    except Exception as e:
+        logging.error(f"Error watching video: {e}")
+        return Error(500, str(e))
+
+@method
+async def unwatch_video(video_id: str):
+    """
+    Remove a video from the watchlist
+    
+    Args:
+        video_id (str): YouTube video ID
+        
+    Returns:
+        bool: True if the video was on the watchlist
+    """
+    try:
+        # The watchlist lives in the primary worker, which runs the monitor
+        if not prefork.is_primary():
+            return await call_worker(0, "unwatch_video", video_id=video_id)
+        
+        return Success(watchlist_monitor.unwatch(video_id))
+    except Exception as e:
+        logging.error(f"Error unwatching video: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_watchlist():
+    """
+    Get the watched videos with their check schedule and flagged comments
+    
+    Returns:
+        dict: Whether the monitor is enabled and the watchlist entries
+    """
+    try:
+        # The watchlist lives in the primary worker, which runs the monitor
+        if not prefork.is_primary():
+            return await call_worker(0, "get_watchlist")
+        
+        return Success({
+            'enabled': watchlist_monitor.is_enabled(),
+            'videos': watchlist_monitor.get_watchlist()
+        })
+    except Exception as e:
+        logging.error(f"Error getting watchlist: {e}")
+        return Error(500, str(e))
+
+@method
+async def get_auto_moderation_status():
+    """
+    Get the state of the auto-moderation queue
+    
+    Returns:
+        dict: Whether auto_delete and dry run are enabled, queue size, counters and
+            the most recent results in the action_type format
+    """
+    try:
+        return Success(auto_moderator.get_status())
+    except Exception as e:
+        logging.error(f"Error getting auto-moderation status: {e}")
+        return Error(500, str(e))
+
 @method
 async def get_client_secret():
     """
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Body Compression
+---------------------------
+This module compresses JSON-RPC bodies for the HTTP transport. Comment lists
+and flagged results are repetitive JSON that shrinks many times over, so large
+bodies are sent with a Content-Encoding: the client gzips large requests, and
+the server compresses large responses with the best encoding the client
+accepts. zstd is used when the zstandard package is installed, gzip otherwise.
+"""
+
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies smaller than this are sent as they are
+DEFAULT_MIN_BYTES = 1024
+
+# Fast levels: JSON compresses well even there, and bodies can be megabytes
+GZIP_LEVEL = 3
+ZSTD_LEVEL = 3
+
+# Encodings this side can produce, best first
+ENCODINGS = ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header
+    
+    Args:
+        header (str): Header value, e.g. "gzip, zstd;q=0.5"
+    
+    Returns:
+        dict: Quality of every listed encoding
+    """
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+def choose_encoding(accept_encoding):
+    """
+    Pick the encoding of a response
+    
+    Args:
+        accept_encoding (str): Accept-Encoding header of the request
+    
+    Returns:
+        str: Encoding to compress with, or None if the client accepts none of ours
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    best = None
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+def compress(data, encoding):
+    """
+    Compress a body
+    
+    Args:
+        data (bytes): Body to compress
+        encoding (str): "gzip" or "zstd"
+    
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    raise Exception(f"Unsupported content encoding: {encoding}")
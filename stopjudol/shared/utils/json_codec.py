@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - JSON Codec
+---------------------
+This module provides the JSON encoder and decoder used by both client and server
+for RPC traffic. orjson is used when it is installed, falling back to the
+standard library json module otherwise. The STOPJUDOL_JSON_CODEC environment
+variable ("json" or "orjson") picks a codec explicitly.
+"""
+
+import os
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class StdlibCodec:
+    """JSON codec backed by the standard library"""
+    
+    name = 'json'
+    
+    def dumps(self, obj):
+        """
+        Encode an object as a JSON string
+        
+        Args:
+            obj: JSON-serializable object
+        
+        Returns:
+            str: JSON text
+        """
+        return json.dumps(obj)
+    
+    def dumps_bytes(self, obj):
+        """
+        Encode an object as UTF-8 JSON bytes
+        
+        Args:
+            obj: JSON-serializable object
+        
+        Returns:
+            bytes: JSON text encoded as UTF-8
+        """
+        return json.dumps(obj).encode('utf-8')
+    
+    def loads(self, data):
+        """
+        Decode JSON text
+        
+        Args:
+            data (str or bytes): JSON text
+        
+        Returns:
+            Decoded object
+        
+        Raises:
+            ValueError: If the text is not valid JSON
+        """
+        return json.loads(data)
+
+class OrjsonCodec(StdlibCodec):
+    """JSON codec backed by orjson, several times faster on large comment lists"""
+    
+    name = 'orjson'
+    
+    def dumps(self, obj):
+        return self.dumps_bytes(obj).decode('utf-8')
+    
+    def dumps_bytes(self, obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Values orjson refuses, e.g. integers beyond 64 bits
+            return super().dumps_bytes(obj)
+    
+    def loads(self, data):
+        return orjson.loads(data)
+
+CODECS = {'json': StdlibCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+def get_codec(name=None):
+    """
+    Get a JSON codec
+    
+    Args:
+        name (str, optional): "json" or "orjson"; defaults to STOPJUDOL_JSON_CODEC,
+            or the fastest codec installed
+    
+    Returns:
+        StdlibCodec: The codec, the standard library one if the named codec is not installed
+    """
+    name = name or os.environ.get('STOPJUDOL_JSON_CODEC') or ('orjson' if 'orjson' in CODECS else 'json')
+    if name not in CODECS:
+        logging.warning(f"JSON codec {name} is not available, using json")
+        name = 'json'
+    return CODECS[name]()
+
+# Codec used by dumps, dumps_bytes and loads
+codec = get_codec()
+
+def use_codec(name):
+    """
+    Switch the codec used by dumps, dumps_bytes and loads
+    
+    Args:
+        name (str): "json" or "orjson"
+    
+    Returns:
+        str: Name of the codec now in use
+    """
+    global codec
+    codec = get_codec(name)
+    return codec.name
+
+def dumps(obj):
+    """Encode an object as a JSON string with the current codec"""
+    return codec.dumps(obj)
+
+def dumps_bytes(obj):
+    """Encode an object as UTF-8 JSON bytes with the current codec"""
+    return codec.dumps_bytes(obj)
+
+def loads(data):
+    """Decode JSON text with the current codec; raises ValueError on invalid JSON"""
+    return codec.loads(data)
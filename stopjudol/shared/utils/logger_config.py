@@ -5,13 +5,50 @@
 StopJudol - Logger Configuration
 -------------------------------
 This module provides a common logging configuration for both client and server.
+
+RPC bodies are logged as bounded summaries with secrets (OAuth credentials,
+tokens, passwords, Authorization headers) redacted; full payloads are logged
+only for a sample of the calls.
 """
 
 import os
+import re
+import json
+import queue
+import atexit
+import random
 import logging
 import logging.handlers
 from datetime import datetime
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Longest RPC body summary written to the log
+MAX_BODY_CHARS = 1000
+
+# Longest body written for sampled calls, so a multi-MB batch is not logged whole
+MAX_FULL_BODY_CHARS = 100000
+
+# Keys whose values never reach the log
+SECRET_KEYS = frozenset([
+    'credentials_json', 'token', 'access_token', 'refresh_token', 'id_token',
+    'client_secret', 'password', 'authorization', 'api_key', 'youtube_api_key',
+    'jwt_secret_key'
+])
+REDACTED = '[REDACTED]'
+
+# A secret key and its string value in JSON text; the value may be cut off by truncation
+_SECRET_JSON_PATTERN = re.compile(
+    r'("(?:%s)"\s*:\s*)"(?:[^"\\]|\\.)*"?' % '|'.join(sorted(SECRET_KEYS)),
+    re.IGNORECASE
+)
+_BEARER_PATTERN = re.compile(r'(Bearer\s+)[^\s"\',]+', re.IGNORECASE)
+
+# Limits of a body summary, so summarizing a 5k-comment request stays cheap
+_SUMMARY_MAX_DEPTH = 4
+_SUMMARY_MAX_ITEMS = 10
+_SUMMARY_MAX_STRING = 200
+
 def configure_logger(name, log_file=None, console_level=logging.INFO, file_level=logging.DEBUG):
     """
     Configure a logger with console and file handlers
@@ -21,7 +58,7 @@ def configure_logger(name, log_file=None, console_level=logging.INFO, file_level
         log_file (str, optional): Path to log file. If None, use name.log
         console_level (int, optional): Console logging level
         file_level (int, optional): File logging level
-        
+    
     Returns:
         logging.Logger: Configured logger
     """
@@ -60,32 +97,207 @@ def configure_logger(name, log_file=None, console_level=logging.INFO, file_level
     
     return logger
 
-def log_rpc_request(logger, method, params):
+def configure_queue_logging(log_file=None, level=logging.INFO):
+    """
+    Configure the root logger to hand records to a background thread, which
+    writes them to the console and the log file, so logging never blocks on I/O.
+    Like logging.basicConfig, nothing is done if the root logger already has handlers.
+    
+    Args:
+        log_file (str, optional): Path to log file. If None, log to the console only
+        level (int, optional): Root logging level
+    
+    Returns:
+        logging.handlers.QueueListener: Running listener, or None if logging was already configured
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, mode='a', encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    # Records are formatted by the QueueHandler and written by the listener thread
+    log_queue = queue.SimpleQueue()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    
+    # Write the records still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
+
+def is_secret_key(key):
+    """
+    Check whether a parameter or field holds a secret
+    
+    Args:
+        key: Dictionary key
+    
+    Returns:
+        bool: True if the value must not be logged
+    """
+    return isinstance(key, str) and key.lower() in SECRET_KEYS
+
+def redact(value):
+    """
+    Copy a decoded body with every secret replaced
+    
+    Args:
+        value: Decoded JSON value
+    
+    Returns:
+        The value with the secrets redacted
+    """
+    if isinstance(value, dict):
+        redacted = {key: REDACTED if is_secret_key(key) else redact(item) for key, item in value.items()}
+        # set_setting carries the setting name and its value separately
+        if is_secret_key(value.get('key')) and 'value' in value:
+            redacted['value'] = REDACTED
+        return redacted
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+def redact_text(text):
     """
-    Log an RPC request
+    Redact the secrets of a JSON text, which may be truncated
+    
+    Args:
+        text (str): JSON text
+    
+    Returns:
+        str: Text with secret values and bearer tokens replaced
+    """
+    text = _SECRET_JSON_PATTERN.sub(lambda match: f'{match.group(1)}"{REDACTED}"', text)
+    return _BEARER_PATTERN.sub(lambda match: match.group(1) + REDACTED, text)
+
+def truncate(text, max_chars=MAX_BODY_CHARS):
+    """
+    Truncate a text for the log
+    
+    Args:
+        text (str): Text to truncate
+        max_chars (int, optional): Longest text kept
+    
+    Returns:
+        str: The text, cut off with the number of characters left out
+    """
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... ({len(text) - max_chars} more chars)"
+
+def summarize(value, max_chars=MAX_BODY_CHARS, depth=0):
+    """
+    Describe a decoded body without walking all of it: the description stops
+    once it is max_chars long, long strings are cut short, and secrets are redacted
+    
+    Args:
+        value: Decoded JSON value
+        max_chars (int, optional): Length after which the description stops
+        depth (int, optional): Nesting level of the value
+    
+    Returns:
+        str: Bounded description of the value
+    """
+    if isinstance(value, (dict, list)):
+        if not value:
+            return repr(value)
+        opening, closing = ('{', '}') if isinstance(value, dict) else ('[', ']')
+        if depth >= _SUMMARY_MAX_DEPTH:
+            return f"{opening}...{closing}"
+        
+        secret_setting = isinstance(value, dict) and is_secret_key(value.get('key'))
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        pieces = []
+        used = 0
+        for index, (key, item) in enumerate(items):
+            if index == _SUMMARY_MAX_ITEMS or used >= max_chars:
+                pieces.append(f"... ({len(value) - index} more)")
+                break
+            if isinstance(value, dict):
+                if is_secret_key(key) or (secret_setting and key == 'value'):
+                    item = REDACTED
+                piece = f"{key!r}: {summarize(item, max_chars - used, depth + 1)}"
+            else:
+                piece = summarize(item, max_chars - used, depth + 1)
+            pieces.append(piece)
+            used += len(piece) + 2
+        return opening + ', '.join(pieces) + closing
+    if isinstance(value, str):
+        if len(value) > _SUMMARY_MAX_STRING:
+            value = value[:_SUMMARY_MAX_STRING] + '...'
+        return repr(redact_text(value))
+    return repr(value)
+
+def should_sample(rate):
+    """
+    Decide whether the full payload of a call is logged
+    
+    Args:
+        rate (float): Share of the calls logged in full, from 0 to 1
+    
+    Returns:
+        bool: True if this call is sampled
+    """
+    return rate > 0 and random.random() < rate
+
+def log_rpc_request(logger, method, params, size=None, full=False, max_chars=MAX_BODY_CHARS,
+                    full_max_chars=MAX_FULL_BODY_CHARS):
+    """
+    Log an RPC request, with its parameters summarized or, for sampled calls, in full;
+    secrets are redacted either way
     
     Args:
         logger (logging.Logger): Logger to use
         method (str): RPC method name
-        params (dict): RPC parameters
+        params: RPC parameters
+        size (int, optional): Length of the request body
+        full (bool, optional): Log the whole parameters instead of a summary
+        max_chars (int, optional): Longest summary logged
+        full_max_chars (int, optional): Longest parameters logged in full
     """
-    logger.debug(f"RPC Request: {method} - {params}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    
+    size_info = f" ({size} chars)" if size is not None else ""
+    if full:
+        body = json.dumps(redact(params), ensure_ascii=False, default=str)
+        logger.info(f"RPC Request: {method}{size_info} - full: {truncate(body, full_max_chars)}")
+    else:
+        logger.info(f"RPC Request: {method}{size_info} - {truncate(summarize(params, max_chars), max_chars)}")
 
-def log_rpc_response(logger, method, result):
+def log_rpc_response(logger, method, result, elapsed=None, full=False, max_chars=MAX_BODY_CHARS,
+                     full_max_chars=MAX_FULL_BODY_CHARS):
     """
-    Log an RPC response
+    Log an RPC response, truncated to a longer limit if the call is sampled; secrets are redacted
     
     Args:
         logger (logging.Logger): Logger to use
         method (str): RPC method name
-        result: RPC result
+        result (str): Response body
+        elapsed (float, optional): Seconds the call took
+        full (bool, optional): Log the whole response instead of its beginning
+        max_chars (int, optional): Longest response text logged
+        full_max_chars (int, optional): Longest response text logged in full
     """
-    # Truncate result if it's too long
-    result_str = str(result)
-    if len(result_str) > 1000:
-        result_str = result_str[:1000] + "..."
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
-    logger.debug(f"RPC Response: {method} - {result_str}")
+    result_str = str(result)
+    details = f"{len(result_str)} chars"
+    if elapsed is not None:
+        details += f", {elapsed * 1000:.1f} ms"
+    if full:
+        logger.info(f"RPC Response: {method} ({details}) - full: {redact_text(truncate(result_str, full_max_chars))}")
+    else:
+        # Only the kept part is redacted, so large responses are not scanned
+        logger.info(f"RPC Response: {method} ({details}) - {redact_text(truncate(result_str, max_chars))}")
 
 def log_rpc_error(logger, method, error):
     """
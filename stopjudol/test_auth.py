@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Authentication Test Script
+--------------------------------------
+This script tests the access levels of the RPC methods and the admin role.
+Run it with pytest.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.rpc.auth import check_access, get_admin_users, ROLE_ADMIN, ROLE_USER
+
+def test_public_methods_need_no_token():
+    assert check_access(["get_blacklist", "get_setting"], None) is None
+    assert check_access(["get_blacklist", "fetch_comments"], None) == (401, "Unauthorized")
+    assert check_access([], None) == (401, "Unauthorized")
+
+def test_admin_methods_need_admin_role():
+    assert check_access(["set_setting"], {"username": "admin", "role": ROLE_ADMIN}) is None
+    assert check_access(["set_setting"], {"username": "moderator", "role": ROLE_USER}) == (403, "Forbidden")
+    assert check_access(["fetch_comments"], {"username": "moderator", "role": ROLE_USER}) is None
+
+def test_token_without_role_must_log_in_again():
+    claims = {"username": "admin"}
+    assert check_access(["add_blacklist_term"], claims) == (401, "Token has no role, log in again")
+    assert check_access(["fetch_comments"], claims) is None
+
+def test_no_admin_unless_configured(monkeypatch):
+    monkeypatch.delenv("API_ADMIN_USERS", raising=False)
+    assert get_admin_users() == set()
+    monkeypatch.setenv("API_ADMIN_USERS", "admin, owner,")
+    assert get_admin_users() == {"admin", "owner"}
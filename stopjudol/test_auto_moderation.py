@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Auto-Moderation Test Script
+---------------------------------------
+This script tests the confidence scoring of flagged comments and their hand-off
+to the durable deletion queue. Run it with pytest.
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.core.moderation_queue import ModerationQueue
+from server.core.auto_moderation import AutoModerator, score_reason, DEFAULT_MIN_CONFIDENCE
+
+CREDENTIALS = json.dumps({'token': 'access', 'refresh_token': 'refresh-a', 'client_secret': 'secret'})
+
+class FakeConfig:
+    """Settings source of the auto-moderator"""
+    
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+    
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+class FakeYouTubeAPI:
+    """Fails the first deletions with a transient error, then deletes"""
+    
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.deleted = []
+    
+    def delete_comments(self, comments):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("Network unreachable")
+        self.deleted.extend(comment['comment_id'] for comment in comments)
+        return [{'comment_id': comment['comment_id'], 'action_type': 'deleted', 'success': True,
+                 'message': 'Comment deleted successfully'} for comment in comments]
+
+def make_comment(comment_id, reason):
+    return {
+        'id': comment_id,
+        'snippet': {'channelId': 'UCchannel', 'videoId': 'video', 'topLevelComment': {'id': comment_id}},
+        'analysis_result': {'is_flagged': True, 'reason': reason}
+    }
+
+def make_moderator(tmp_path, api, settings=None):
+    moderator = None
+    queue = ModerationQueue(str(tmp_path / 'moderation_queue.db'), lambda credentials_json: api,
+                            on_processed=lambda items, owner: moderator.on_processed(items))
+    moderator = AutoModerator(FakeConfig(dict({'auto_delete': True}, **(settings or {}))), queue)
+    return moderator, queue
+
+@pytest.mark.parametrize('reason, category, confidence', [
+    ('Blacklisted term: slot gacor', 'blacklist', 0.9),
+    ('Suspicious pattern: whatsapp', 'whatsapp', 0.85),
+    ('Suspicious pattern: phone_number', 'phone_number', 0.5),
+    ('Suspicious pattern: something_new', 'something_new', 0.5),
+    ('Multiple gambling indicators: 2 found', 'gambling_indicators', 0.5),
+    ('Multiple gambling indicators: 4 found', 'gambling_indicators', 0.7),
+    ('Multiple gambling indicators: 5 found', 'gambling_indicators', 0.8),
+    ('Multiple gambling indicators: 12 found', 'gambling_indicators', 0.9),
+    ('Long comment with numbers', 'long_comment', 0.4),
+    (None, 'other', 0.0)
+])
+def test_score_reason(reason, category, confidence):
+    assert score_reason(reason) == (category, confidence)
+
+def test_gambling_indicators_reach_default_threshold_at_five():
+    for count in range(2, 5):
+        assert score_reason(f"Multiple gambling indicators: {count} found")[1] < DEFAULT_MIN_CONFIDENCE
+    assert score_reason("Multiple gambling indicators: 5 found")[1] >= DEFAULT_MIN_CONFIDENCE
+
+def test_thresholds_per_category():
+    moderator = AutoModerator(FakeConfig({'auto_moderation_thresholds': {'url': 0.5}}), None)
+    assert moderator.get_threshold('url') == 0.5
+    assert moderator.get_threshold('blacklist') == DEFAULT_MIN_CONFIDENCE
+    
+    moderator = AutoModerator(FakeConfig({'auto_moderation_min_confidence': 0.95}), None)
+    assert moderator.get_threshold('blacklist') == 0.95
+
+def test_submit_queues_confident_comments(tmp_path):
+    api = FakeYouTubeAPI()
+    moderator, queue = make_moderator(tmp_path, api)
+    queued = moderator.submit([
+        make_comment('c1', 'Blacklisted term: judi'),
+        make_comment('c2', 'Suspicious pattern: phone_number')
+    ], CREDENTIALS)
+    assert queued == 1
+    assert moderator.get_status()['queued'] == 1
+    
+    # Queued again by a later scan before the deletion ran
+    assert moderator.submit([make_comment('c1', 'Blacklisted term: judi')], CREDENTIALS) == 0
+    
+    queue.process_due()
+    status = moderator.get_status()
+    assert api.deleted == ['c1']
+    assert status['queued'] == 0
+    assert status['counters'] == {'queued': 1, 'skipped': 2, 'deleted': 1, 'marked_as_spam': 0, 'failed': 0, 'dry_run': 0}
+    assert status['recent_results'][0]['reason'] == 'Blacklisted term: judi'
+
+def test_failed_moderation_is_retried(tmp_path):
+    api = FakeYouTubeAPI(failures=1)
+    moderator, queue = make_moderator(tmp_path, api)
+    moderator.submit([make_comment('c1', 'Blacklisted term: judi')], CREDENTIALS)
+    
+    queue.process_due()
+    assert api.deleted == []
+    assert moderator.get_status()['queued'] == 1
+    
+    # The queue retries the deletion once its backoff elapsed
+    with queue.db:
+        queue.db.execute("UPDATE moderation_queue SET next_attempt_at = 0")
+    queue.process_due()
+    assert api.deleted == ['c1']
+    assert moderator.get_status()['counters']['deleted'] == 1
+
+def test_queued_comments_survive_a_restart(tmp_path):
+    api = FakeYouTubeAPI()
+    moderator, _ = make_moderator(tmp_path, api)
+    moderator.submit([make_comment('c1', 'Blacklisted term: judi')], CREDENTIALS)
+    
+    _, queue = make_moderator(tmp_path, api)
+    queue.register_credentials(CREDENTIALS)
+    queue.process_due()
+    assert api.deleted == ['c1']
+
+def test_dry_run_does_not_queue(tmp_path):
+    api = FakeYouTubeAPI()
+    moderator, queue = make_moderator(tmp_path, api, {'auto_moderation_dry_run': True})
+    assert moderator.submit([make_comment('c1', 'Blacklisted term: judi')], CREDENTIALS) == 1
+    
+    assert queue.process_due() == 0
+    status = moderator.get_status()
+    assert status['counters']['dry_run'] == 1
+    assert status['recent_results'][0]['dry_run'] is True
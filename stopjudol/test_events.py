@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Server Events Test Script
+-------------------------------------
+This script tests the delivery of server events to WebSocket subscribers.
+Run it with pytest.
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.core.events import EventHub
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return [(event['method'], event['params']) for event in events]
+
+def test_owned_events_reach_only_their_owners():
+    async def run():
+        hub = EventHub()
+        first, second = hub.subscribe(), hub.subscribe()
+        hub.claim(first, 'owner-a')
+        hub.claim(second, 'job-b')
+        
+        hub.publish('deletion_progress', {'items': ['a']}, owners=['owner-a'])
+        hub.publish('scan_progress', {'job_id': 'job-b'}, owners=['job-b', 'owner-b'])
+        hub.publish('ruleset_changed', {'section': 'all'})
+        await asyncio.sleep(0)
+        return drain(first), drain(second)
+    
+    first, second = asyncio.run(run())
+    assert first == [('deletion_progress', {'items': ['a']}), ('ruleset_changed', {'section': 'all'})]
+    assert second == [('scan_progress', {'job_id': 'job-b'}), ('ruleset_changed', {'section': 'all'})]
+
+def test_slow_subscriber_drops_oldest_events():
+    async def run():
+        hub = EventHub(max_queued=2)
+        queue = hub.subscribe()
+        for index in range(3):
+            hub.publish('ruleset_changed', {'index': index})
+        await asyncio.sleep(0)
+        return hub, drain(queue)
+    
+    hub, events = asyncio.run(run())
+    assert [params['index'] for _, params in events] == [1, 2]
+    assert hub.get_stats()['dropped'] == 1
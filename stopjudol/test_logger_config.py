@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Logging Test Script
+-------------------------------
+This script tests that logged RPC bodies are redacted and bounded in size.
+Run it with pytest.
+"""
+
+import os
+import sys
+import json
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.utils import logger_config
+
+CREDENTIALS = json.dumps({'token': 'access', 'refresh_token': 'refresh-a', 'client_secret': 'secret'})
+
+def test_redact_replaces_secrets():
+    params = {
+        'credentials_json': CREDENTIALS,
+        'video_id': 'abc',
+        'comments': [{'comment_id': 'c1', 'Authorization': 'Bearer xyz'}],
+        'setting': {'key': 'youtube_api_key', 'value': 'AIza-secret'}
+    }
+    redacted = logger_config.redact(params)
+    assert redacted['credentials_json'] == logger_config.REDACTED
+    assert redacted['video_id'] == 'abc'
+    assert redacted['comments'][0]['Authorization'] == logger_config.REDACTED
+    assert redacted['setting']['value'] == logger_config.REDACTED
+    # The input is left untouched
+    assert params['credentials_json'] == CREDENTIALS
+
+def test_redact_text_handles_truncated_json():
+    text = '{"token": "abc", "refresh_token": "def'
+    redacted = logger_config.redact_text(text)
+    assert 'abc' not in redacted and 'def' not in redacted
+    assert 'xyz' not in logger_config.redact_text('Authorization: Bearer xyz')
+
+def test_summarize_is_bounded_and_redacted():
+    params = {
+        'credentials_json': CREDENTIALS,
+        'comments': [{'id': f"c{index}", 'text': 'x' * 5000} for index in range(5000)]
+    }
+    summary = logger_config.summarize(params, max_chars=500)
+    assert 'refresh-a' not in summary
+    assert logger_config.REDACTED in summary
+    assert 'more)' in summary
+    assert len(summary) < 2000
+
+def test_full_bodies_are_capped(caplog):
+    logger = logging.getLogger('stopjudol.test')
+    batch = [{'method': 'delete_comments', 'params': {'credentials_json': CREDENTIALS, 'text': 'x' * 5000}}] * 100
+    with caplog.at_level(logging.INFO, logger='stopjudol.test'):
+        logger_config.log_rpc_request(logger, 'batch', batch, full=True, full_max_chars=1000)
+        logger_config.log_rpc_response(logger, 'batch', json.dumps(batch), full=True, full_max_chars=1000)
+    for record in caplog.records:
+        message = record.getMessage()
+        assert len(message) < 1200
+        assert 'refresh-a' not in message
+
+def test_should_sample_bounds():
+    assert not any(logger_config.should_sample(0.0) for _ in range(100))
+    assert all(logger_config.should_sample(1.0) for _ in range(100))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Moderation Queue Test Script
+----------------------------------------
+This script tests the durable deletion queue with a temporary database and a
+scripted stand-in for the YouTube API. Run it with pytest.
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.core import moderation_queue
+from server.core.moderation_queue import ModerationQueue
+
+CREDENTIALS = json.dumps({'token': 'access', 'refresh_token': 'refresh-a', 'client_secret': 'secret'})
+OTHER_CREDENTIALS = json.dumps({'token': 'access', 'refresh_token': 'refresh-b', 'client_secret': 'secret'})
+
+class FakeClock:
+    """Replacement of the time module of the queue module"""
+    
+    def __init__(self, now=1000000.0):
+        self.now = now
+    
+    def time(self):
+        return self.now
+
+class FakeYouTubeAPI:
+    """Records deletions and answers with a scripted message per call"""
+    
+    def __init__(self, messages=()):
+        self.messages = list(messages)
+        self.calls = []
+    
+    def delete_comments(self, comments):
+        self.calls.append([comment['comment_id'] for comment in comments])
+        message = self.messages.pop(0) if self.messages else 'Comment deleted successfully'
+        success = message == 'Comment deleted successfully'
+        return [
+            {'comment_id': comment['comment_id'], 'action_type': 'deleted' if success else 'none',
+             'success': success, 'message': message}
+            for comment in comments
+        ]
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(moderation_queue, 'time', fake_clock)
+    return fake_clock
+
+def make_queue(tmp_path, api):
+    return ModerationQueue(str(tmp_path / 'moderation_queue.db'), lambda credentials_json: api)
+
+def get_item(queue, comment_id, credentials_json=CREDENTIALS):
+    return queue.get_status(credentials_json, [comment_id])['items'][0]
+
+def test_queue_deletes_and_skips_duplicates(tmp_path, clock):
+    api = FakeYouTubeAPI()
+    queue = make_queue(tmp_path, api)
+    assert queue.enqueue([{'comment_id': 'c1'}, {'comment_id': 'c2'}], CREDENTIALS) == {'queued': 2, 'duplicates': 0}
+    assert queue.enqueue([{'comment_id': 'c1'}], CREDENTIALS) == {'queued': 0, 'duplicates': 1}
+    
+    assert queue.process_due() == 2
+    assert queue.process_due() == 0
+    assert api.calls == [['c1', 'c2']]
+    assert queue.get_status(CREDENTIALS)['counts']['done'] == 2
+
+def test_queue_retries_with_backoff(tmp_path, clock):
+    queue = make_queue(tmp_path, FakeYouTubeAPI(['Error: backend error']))
+    queue.enqueue([{'comment_id': 'c1'}], CREDENTIALS)
+    
+    assert queue.process_due() == 1
+    item = get_item(queue, 'c1')
+    assert item['status'] == 'pending'
+    assert item['attempts'] == 1
+    assert item['next_attempt_at'] >= clock.now + moderation_queue.BASE_RETRY_SECONDS * 0.8
+    
+    # Not due before the backoff elapsed
+    assert queue.process_due() == 0
+    clock.now = item['next_attempt_at']
+    assert queue.process_due() == 1
+    item = get_item(queue, 'c1')
+    assert item['status'] == 'done'
+    assert item['attempts'] == 2
+
+def test_queue_gives_up_on_permanent_errors(tmp_path, clock):
+    queue = make_queue(tmp_path, FakeYouTubeAPI(['Permission denied: not the channel owner']))
+    queue.enqueue([{'comment_id': 'c1'}], CREDENTIALS)
+    queue.process_due()
+    assert get_item(queue, 'c1')['status'] == 'failed'
+    
+    # A failed deletion can be queued again
+    assert queue.enqueue([{'comment_id': 'c1'}], CREDENTIALS)['queued'] == 1
+
+def test_queue_waits_for_credentials(tmp_path, clock):
+    api = FakeYouTubeAPI()
+    make_queue(tmp_path, api).enqueue([{'comment_id': 'c1'}], CREDENTIALS)
+    
+    # After a restart, deletions resume once the credentials are supplied again
+    queue = make_queue(tmp_path, api)
+    assert queue.get_status(CREDENTIALS)['waiting_for_credentials'] == 1
+    assert queue.process_due() == 0
+    queue.register_credentials(CREDENTIALS)
+    assert queue.process_due() == 1
+
+def test_queue_status_is_limited_to_the_owner(tmp_path, clock):
+    queue = make_queue(tmp_path, FakeYouTubeAPI())
+    queue.enqueue([{'comment_id': 'c1'}], CREDENTIALS)
+    queue.enqueue([{'comment_id': 'c2'}, {'comment_id': 'c3'}], OTHER_CREDENTIALS)
+    
+    status = queue.get_status(CREDENTIALS, ['c1', 'c2'])
+    assert status['counts']['pending'] == 1
+    assert [item['status'] for item in status['items']] == ['pending', 'unknown']
+    assert queue.get_status(OTHER_CREDENTIALS)['counts']['pending'] == 2
+
+def test_queue_recovers_expired_leases(tmp_path, clock):
+    api = FakeYouTubeAPI()
+    stopped = make_queue(tmp_path, api)
+    stopped.enqueue([{'comment_id': 'c1'}], CREDENTIALS)
+    credentials_json, rows = stopped._take_due_batch()
+    assert [row['comment_id'] for row in rows] == ['c1']
+    
+    # Another worker leaves the leased deletion alone until the lease expires
+    queue = make_queue(tmp_path, api)
+    queue.register_credentials(CREDENTIALS)
+    assert queue.process_due() == 0
+    assert get_item(queue, 'c1')['status'] == 'in_progress'
+    
+    clock.now += moderation_queue.LEASE_SECONDS + 1
+    assert queue.process_due() == 1
+    item = get_item(queue, 'c1')
+    assert item['status'] == 'done'
+    assert item['attempts'] == 2
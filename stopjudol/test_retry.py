@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - Retry Policy Test Script
+------------------------------------
+This script tests the circuit breaker and the retry policy shared by the
+YouTube API calls. Run it with pytest.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.core import retry
+from server.core.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+class FakeClock:
+    """Replacement of the time module of the retry module"""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(retry, 'time', fake_clock)
+    return fake_clock
+
+def open_breaker(clock, failure_threshold=1):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=30)
+    for _ in range(failure_threshold):
+        breaker.record_failure()
+    return breaker
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected_calls == 1
+
+def test_breaker_success_resets_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 1
+
+def test_breaker_half_open_trial(clock):
+    breaker = open_breaker(clock)
+    
+    # A failed trial call opens the circuit again right away
+    clock.now += 31
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    # A successful trial call closes it
+    clock.now += 31
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+def test_breaker_lets_one_trial_call_through(clock):
+    breaker = open_breaker(clock)
+    clock.now += 31
+    breaker.before_call()
+    
+    # Other calls wait for the outcome of the trial call
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    
+    breaker.record_success()
+    breaker.before_call()
+    breaker.before_call()
+
+def test_breaker_gives_up_unfinished_trial_call(clock):
+    breaker = open_breaker(clock)
+    clock.now += 31
+    breaker.before_call()
+    
+    # The trial call never reported back, so another one is let through later
+    clock.now += 31
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_breaker_trial_call_under_concurrency():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.5)
+    breaker.record_failure()
+    threading.Event().wait(0.6)
+    
+    passed = []
+    barrier = threading.Barrier(8)
+    
+    def call():
+        barrier.wait()
+        try:
+            breaker.before_call()
+            passed.append(True)
+        except CircuitOpenError:
+            pass
+    
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(passed) == 1
+
+def test_non_retryable_outcome_counts_as_success(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    policy = RetryPolicy(breaker=breaker)
+    policy.record_outcome(ValueError("Bad request"))
+    assert breaker.state == CircuitBreaker.CLOSED
+    policy.record_outcome(ConnectionError("Connection reset"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_policy_retries_transient_errors(clock):
+    policy = RetryPolicy(max_attempts=3, base_delay=0.1, breaker=CircuitBreaker(failure_threshold=5))
+    attempts = []
+    
+    def flaky():
+        attempts.append(True)
+        if len(attempts) < 3:
+            raise ConnectionError("Connection reset")
+        return 'ok'
+    
+    assert policy.call(flaky) == 'ok'
+    assert len(attempts) == 3
+    assert policy.get_stats()['retries'] == 2
+    assert policy.breaker.state == CircuitBreaker.CLOSED
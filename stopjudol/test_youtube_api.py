@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StopJudol - YouTube API Test Script
+-----------------------------------
+This script tests the YouTubeAPI wrapper against the fake YouTube Data API,
+served in-process, so no network access or quota is needed. Run it with pytest.
+"""
+
+import os
+import sys
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+from google.oauth2.credentials import Credentials
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.fake_youtube import FakeYouTubeAPI, create_app
+from server.core.youtube_api import YouTubeAPI
+
+@pytest.fixture
+def fake_api():
+    return FakeYouTubeAPI(config={'quota_limit': 10 ** 9}, videos=1, comments_per_video=150)
+
+@pytest.fixture
+def base_url(fake_api):
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(fake_api))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}"
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+def make_api(base_url):
+    return YouTubeAPI(Credentials(token='fake'), api_base_url=base_url)
+
+def test_delete_comments_uses_batches(fake_api, base_url):
+    comment_ids = [comment_id for comment_id, (_, thread) in fake_api.comments.items()
+                   if thread['id'] == comment_id][:120]
+    fake_api.reset_stats()
+    
+    results = make_api(base_url).delete_comments([{'comment_id': comment_id} for comment_id in comment_ids])
+    
+    # 120 deletions are sent as batches of at most 50 sub-requests
+    assert fake_api.stats['batches'] == 3
+    assert fake_api.stats['http_requests'] == 3
+    assert [result['comment_id'] for result in results] == comment_ids
+    assert all(result['success'] and result['action_type'] == 'deleted' for result in results)
+    assert all(fake_api.moderation[comment_id] == 'deleted' for comment_id in comment_ids)
+
+def test_delete_comments_reports_each_item(fake_api, base_url):
+    comment_id = next(iter(fake_api.comments))
+    results = make_api(base_url).delete_comments([
+        {'comment_id': comment_id},
+        {'comment_id': 'Ugxmissing0000000000000'},
+        {'comment_id': None}
+    ])
+    
+    assert results[0]['success'] is True
+    assert results[1]['success'] is False
+    assert results[1]['message'].startswith('Comment not found')
+    assert results[2] == {'comment_id': None, 'action_type': 'none', 'success': False,
+                          'message': 'Invalid comment ID format'}
+
+def test_delete_comments_falls_back_to_moderation(fake_api, base_url):
+    # The fake channel wrote none of the comments, so the delete endpoint is refused
+    fake_api.config['delete_own_only'] = True
+    comment_ids = [comment_id for comment_id, (_, thread) in fake_api.comments.items()
+                   if thread['id'] == comment_id][:10]
+    
+    results = make_api(base_url).delete_comments([
+        {'comment_id': comment_id, 'thread_id': comment_id, 'channel_id': fake_api.channel['id']}
+        for comment_id in comment_ids
+    ])
+    
+    assert all(result['success'] for result in results)
+    assert all(fake_api.moderation[comment_id] == 'rejected' for comment_id in comment_ids)
+    assert fake_api.stats['calls'].get('comments.setModerationStatus') == 1
+
+def test_moderation_falls_back_only_for_refused_ids(fake_api, base_url):
+    comment_ids = list(fake_api.comments)[:60]
+    missing_id = 'Ugxmissing0000000000000'
+    
+    # The unknown ID fails its whole setModerationStatus call
+    results = make_api(base_url).moderate_comments(comment_ids[:55] + [missing_id] + comment_ids[55:])
+    
+    assert all(results[comment_id] for comment_id in comment_ids)
+    assert all(fake_api.moderation[comment_id] == 'rejected' for comment_id in comment_ids)
+    assert results[missing_id] is False
+    assert fake_api.stats['calls'].get('comments.markAsSpam') == 1